@@ -6,14 +6,23 @@ Views only check if the user is authenticated.
 """
 
 import logging
+import threading
 
+from werkzeug.urls import url_encode
 from werkzeug.exceptions import Unauthorized, NotFound
 
 from flask.views import MethodView
-from flask import jsonify, request
+from flask import Response, jsonify, request, stream_with_context, copy_current_request_context
 
 from . import constants
 from . import errors
+from .stream import Stream
+from .cache import Cache, Generations, SingleFlight
+from .purge import Purger
+from .controller import Controller
+from .controller.router import Router
+from .serializers import Serializer
+from .warmer import Warmer
 
 logger = logging.getLogger(__name__)
 
@@ -24,32 +33,104 @@ class API(MethodView):
     All views in this app should inherit from this class definition.
     """
 
+    YIELD_PER = 100
+
+    # Entity types that GET responses depend on. GET responses
+    # of views with dependencies are cached as final bytes, by
+    # path, query, and the generations of their dependencies.
+    DEPENDENCIES = ()
+    RESPONSES = Cache(size=1024, ttl=300, budget=64 * 1024 * 1024)
+    GENERATIONS = Generations()
+
+    # Concurrent identical GET requests of cached views wait
+    # for the first one, and share its response.
+    FLIGHTS = SingleFlight(timeout=5)
+
+    # GET responses of views with dependencies are public, and
+    # sent with the surrogate keys of the entities they include,
+    # and of the view, if it is a list. Reverse proxies may keep
+    # them for this number of seconds, unless they are purged.
+    SURROGATE_KEY = None
+    PROXY_MAX_AGE = 0
+
+    # Maximum number of surrogate keys of a response, so that
+    # its header fits the limits of proxies. Above it, the keys
+    # of the lists of the types of the entities are sent instead.
+    MAX_SURROGATE_KEYS = 100
+
+    # Successful GET requests of the details of this entity
+    # type are counted in the popularity record, if any, to
+    # warm the caches with the most requested entities.
+    # Requests of the warmer itself are not counted.
+    ENTITY = None
+    POPULARITY = None
+
+    # Access log of the app, if any, reported in the metrics.
+    ACCESS_LOG = None
+
+    # Expired GET responses, within the stale time of the cache,
+    # are sent while they are built again in the background,
+    # and for as long as building them fails.
+    STALE_WARNING = '110 - "Response is Stale"'
+    __revalidating = set()
+    __revalidating_lock = threading.Lock()
+
     ERROR_MAP = {
         Unauthorized: errors.AuthException(),
         NotFound: errors.EndpointNotFoundException(),
     }
 
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        API initializer.
+        Views are initialized once per request.
+        """
+        super().__init__(*args, **kwargs)
+        self.__etag = None
+        self.__not_modified = False
+        self.__conditional = True
+
+    def is_not_modified(self, etag: str) -> bool:
+        """
+        Sets the entity tag of the response.
+        Returns True if the client sent it in If-None-Match,
+        in which case the view may return nothing, and the
+        response is a 304 Not Modified without a body.
+        """
+        self.__etag = etag
+        self.__not_modified = self.__conditional and etag in request.if_none_match
+        return self.__not_modified
+
     def __call(self, method: str, callback: object, *args, **kwargs) -> tuple:
         """
         Handler for all methods.
+        Callbacks return a dict, or a Stream to send
+        the response while it is being serialized.
+        Requests are logged by the access log. Only unexpected
+        errors are logged here, with their traceback.
         """
         try:
-            logger.debug("[%s] [%s] [%s]", method, self, request.json)
             response = callback(*args, **kwargs) or {}
-            logger.debug("[%s] [%s] [%s]", method, self, response)
         except Exception as e:
-            logger.exception("[%s] [%s] [FAILED]", method, self)
             e = self.ERROR_MAP.get(e.__class__, e)
             if not isinstance(e, errors.MariaException):
                 e = errors.MariaException(str(e))
+            if e.code >= 500:
+                logger.exception("[%s] [%s] [FAILED]", method, self)
             return jsonify({
                 constants.Error.PLURAL: e.to_json(),
             }), e.code
         else:
-            logger.exception("[%s] [%s] [OK]", method, self)
-            return jsonify(response)
-        finally:
-            logger.exception("[%s] [%s] [END]", method, self)
+            if isinstance(response, Stream):
+                return Response(stream_with_context(iter(response)),
+                                mimetype=response.mimetype)
+            if self.__not_modified:
+                response = Response(status=304)
+            else:
+                response = jsonify(response)
+            if self.__etag is not None:
+                response.set_etag(self.__etag)
+            return response
 
     def get(self, *args, **kwargs) -> tuple:
         """
@@ -61,8 +142,187 @@ class API(MethodView):
         then a 405 error is returned.
 
         404 and 403 errors are caught by custom exceptions.
+
+        Successful responses of views with dependencies are
+        cached, except for streams. On a miss, concurrent
+        identical requests are coalesced: only one of them
+        builds the response, which the others share.
+        Expired responses are sent stale, if the cache keeps
+        them, while they are revalidated in the background.
+        Successful responses are public, with surrogate keys.
+        Reads are sent to a replica, if any, unless the
+        client wrote recently.
+        """
+        Router.read()
+        response = self.__get(*args, **kwargs)
+        if self.ENTITY is not None and self.POPULARITY is not None and not Warmer.is_warming() \
+                and isinstance(response, Response) and response.status_code in (200, 304):
+            for entity_id in kwargs.values():
+                self.POPULARITY.record(self.ENTITY, entity_id)
+        return response
+
+    def __get(self, *args, **kwargs) -> tuple:
+        """
+        Handler for GET requests, cached if the view has dependencies.
+        """
+        if not self.DEPENDENCIES:
+            return self.__call("GET", self._get, *args, **kwargs)
+        key = self.get_cache_key()
+        cached, _ = self.RESPONSES.get(key)
+        if cached is not None:
+            logger.debug("[GET] [%s] [CACHED]", self)
+            return self.get_cached_response(*cached)
+        stale, _ = self.RESPONSES.get_stale(key)
+        if stale is not None:
+            logger.debug("[GET] [%s] [STALE]", self)
+            self.revalidate(key, *args, **kwargs)
+            response = self.get_cached_response(*stale)
+            response.headers["Warning"] = self.STALE_WARNING
+            return response
+        built = []
+
+        def build() -> tuple:
+            response = self.__build(*args, **kwargs)
+            built.append(response)
+            return self.__store(key, response)
+
+        # Responses that can not be shared, such as errors, are
+        # built again by one of the requests that were waiting.
+        while True:
+            shared = self.FLIGHTS.do(key, build)
+            if built:
+                return built[0]
+            if shared is not None:
+                logger.debug("[GET] [%s] [SHARED]", self)
+                return self.get_cached_response(*shared)
+
+    def revalidate(self, key: str, *args, **kwargs) -> None:
+        """
+        Builds a GET response again in a background thread,
+        unless it is being built already. Failures are logged,
+        and the stale response is kept.
+        """
+        with self.__revalidating_lock:
+            if key in self.__revalidating:
+                return
+            self.__revalidating.add(key)
+        view = type(self)()
+        view.__conditional = False
+
+        @copy_current_request_context
+        def run() -> None:
+            try:
+                self.FLIGHTS.do(key, lambda: view.__store(key, view.__build(*args, **kwargs)))
+            finally:
+                with self.__revalidating_lock:
+                    self.__revalidating.discard(key)
+
+        threading.Thread(target=run, name="revalidate", daemon=True).start()
+
+    def __build(self, *args, **kwargs) -> object:
         """
-        return self.__call("GET", self._get, *args, **kwargs)
+        Builds a GET response. Successful responses are sent
+        with the surrogate keys of the entities serialized, unless
+        they were read from a replica that may be behind a write.
+        """
+        with Serializer.CACHE.collect() as tags:
+            response = self.__call("GET", self._get, *args, **kwargs)
+        if not isinstance(response, Response) or response.status_code != 200:
+            return response
+        if Router.is_lagging():
+            response.headers["Cache-Control"] = "no-store"
+        else:
+            self.set_cache_headers(response, " ".join(self.get_surrogate_keys(tags)))
+        return response
+
+    @classmethod
+    def get_surrogate_keys(cls, tags: set) -> list:
+        """
+        Returns the surrogate keys of a response, from the tags
+        of the entities it includes, such as "movie:12", and the
+        key of the view. Above MAX_SURROGATE_KEYS, the keys of the
+        lists of their types are returned instead, which are
+        purged on every write of those types.
+        """
+        entities = [tag.split(":") for tag in tags]
+        if len(entities) <= cls.MAX_SURROGATE_KEYS:
+            keys = sorted(Purger.get_key(*entity) for entity in entities)
+        else:
+            keys = sorted({constants.Surrogate.TYPES[entity] for entity, _ in entities})
+        if cls.SURROGATE_KEY is not None and cls.SURROGATE_KEY not in keys:
+            keys.append(cls.SURROGATE_KEY)
+        return keys
+
+    def __store(self, key: str, response: object) -> tuple:
+        """
+        Caches a GET response, if it is successful, not streamed,
+        and not read from a replica that may be behind a write.
+        Returns its data, mimetype, entity tag and
+        surrogate keys, or None if it is not cached.
+        """
+        if not isinstance(response, Response) or response.status_code != 200 \
+                or response.is_streamed or Router.is_lagging():
+            return None
+        data = response.get_data()
+        etag, _ = response.get_etag()
+        keys = response.headers.get(constants.Surrogate.HEADER)
+        self.RESPONSES.set(key, (data, response.mimetype, etag, keys), cost=len(data))
+        return data, response.mimetype, etag, keys
+
+    def get_cache_key(self) -> str:
+        """
+        Returns the cache key of a GET request, made of the view,
+        the path, the query sorted by name, and the generations
+        of the dependencies. The generations are read before
+        the response is built, so responses built while a write
+        happens are stored under generations that are outdated.
+        """
+        query = url_encode([
+            (name, value)
+            for name, values in sorted(request.args.lists())
+            for value in values
+        ])
+        generations = self.GENERATIONS.get(*self.DEPENDENCIES)
+        return "{}:{}?{}:{}".format(self.__class__.__name__, request.path, query, generations)
+
+    @classmethod
+    def get_cached_response(cls,
+                            data: bytes,
+                            mimetype: str,
+                            etag: str=None,
+                            keys: str=None) -> Response:
+        """
+        Rebuilds a cached response. If the client has its
+        entity tag, a 304 Not Modified is returned instead.
+        """
+        if etag is not None and etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(data, mimetype=mimetype)
+            if keys is not None:
+                cls.set_cache_headers(response, keys)
+        if etag is not None:
+            response.set_etag(etag)
+        return response
+
+    @classmethod
+    def set_cache_headers(cls, response: Response, keys: str) -> None:
+        """
+        Marks a response as public, for PROXY_MAX_AGE seconds in
+        reverse proxies, and sets its surrogate keys. Clients
+        revalidate it on every request, with its entity tag.
+        """
+        response.headers["Cache-Control"] = "public, max-age=0, s-maxage={}".format(
+            cls.PROXY_MAX_AGE)
+        response.headers[constants.Surrogate.HEADER] = keys
+
+    @classmethod
+    def invalidate(cls, *entities) -> None:
+        """
+        Increments the generations of the types of the
+        changed entities, such as ("movie", 1).
+        """
+        cls.GENERATIONS.bump(*[entity for entity, _ in entities])
 
     def post(self, *args, **kwargs) -> tuple:
         """
@@ -74,8 +334,13 @@ class API(MethodView):
         then a 405 error is returned.
 
         404 and 403 errors are caught by custom exceptions.
+
+        Successful writes send the next reads of the client
+        to the primary.
         """
-        return self.__call("POST", self._post, *args, **kwargs)
+        response = self.__call("POST", self._post, *args, **kwargs)
+        Router.stick(response)
+        return response
 
     def delete(self, *args, **kwargs) -> tuple:
         """
@@ -87,8 +352,13 @@ class API(MethodView):
         then a 405 error is returned.
 
         404 and 403 errors are caught by custom exceptions.
+
+        Successful writes send the next reads of the client
+        to the primary.
         """
-        return self.__call("DELETE", self._delete, *args, **kwargs)
+        response = self.__call("DELETE", self._delete, *args, **kwargs)
+        Router.stick(response)
+        return response
 
     def put(self, *args, **kwargs) -> tuple:
         """
@@ -100,8 +370,13 @@ class API(MethodView):
         then a 405 error is returned.
 
         404 and 403 errors are caught by custom exceptions.
+
+        Successful writes send the next reads of the client
+        to the primary.
         """
-        return self.__call("PUT", self._put, *args, **kwargs)
+        response = self.__call("PUT", self._put, *args, **kwargs)
+        Router.stick(response)
+        return response
 
     def _get(self, *args, **kwargs) -> dict:
         """
@@ -126,3 +401,6 @@ class API(MethodView):
         Override this method in subclasses.
         """
         raise errors.MethodNotImplementedException()
+
+
+Controller.listen(API.invalidate)
@@ -0,0 +1,203 @@
+"""
+Access Log.
+
+Every request is logged once, after its response, as a JSON
+line with its method, route, status, duration, and the time
+spent in the DB. Records are put in a queue, and formatted
+and written in batches by a background thread, so that
+requests never wait for the log, nor wake the thread up.
+Successful requests may be sampled, while server errors
+are always logged.
+"""
+
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import logging.handlers
+
+from flask import Flask, Response, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .preload import Daemon
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats access records as JSON lines.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Returns the JSON line of a record.
+        """
+        fields = {"time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S")}
+        fields.update(getattr(record, "access", {}))
+        return json.dumps(fields)
+
+
+class AccessHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks, and does not format
+    records in the thread of the request. Records are dropped
+    when the queue is full.
+    """
+
+    def __init__(self, size: int=10000) -> None:
+        """
+        Access handler initializer.
+        """
+        super().__init__(queue.Queue(size))
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Returns the record as it is. Access records only
+        hold their fields, which are formatted when written.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Queues a record, or drops it if the queue is full.
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AccessLog(Daemon):
+    """
+    Structured access log of a Flask app.
+    """
+
+    NAME = "access-log"
+
+    def __init__(self,
+                 sample: float=1.0,
+                 size: int=10000,
+                 handler: logging.Handler=None,
+                 interval: float=0.1) -> None:
+        """
+        Access log initializer.
+        Sample is the share of successful requests logged,
+        and size the maximum number of records queued.
+        Records are written by the handler, to stderr by default,
+        every interval, in seconds.
+        """
+        super().__init__()
+        if not isinstance(sample, (int, float)) or not 0 <= sample <= 1:
+            raise ValueError("Invalid sample:", sample)
+        self.sample = sample
+        self.interval = interval
+        self.handler = handler or logging.StreamHandler()
+        self.handler.setFormatter(JSONFormatter())
+        self.queue = AccessHandler(size)
+        self.__lock = threading.Lock()
+        self.__records = 0
+        self.__skipped = 0
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Logs every request of the app, and the time it
+        spends in the DB.
+        """
+        app.before_request(self.begin)
+        app.after_request(self.record)
+        if not event.contains(Engine, "before_cursor_execute", self.before_execute):
+            event.listen(Engine, "before_cursor_execute", self.before_execute)
+            event.listen(Engine, "after_cursor_execute", self.after_execute)
+
+    def run(self, stopped: threading.Event) -> None:
+        """
+        Writes the queued records every interval, until stopped.
+        """
+        while not stopped.wait(self.interval):
+            self.flush()
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the queued records.
+        """
+        while True:
+            try:
+                record = self.queue.queue.get_nowait()
+            except queue.Empty:
+                return
+            self.handler.handle(record)
+
+    @staticmethod
+    def begin() -> None:
+        """
+        Starts timing the current request.
+        """
+        g.access = {"start": time.perf_counter(), "db": 0.0, "queries": 0}
+
+    def record(self, response: Response) -> Response:
+        """
+        Logs the current request, if sampled.
+        """
+        timing = g.get("access")
+        if timing is None:
+            return response
+        if response.status_code < 500 and self.sample < 1 and random.random() >= self.sample:
+            with self.__lock:
+                self.__skipped += 1
+            return response
+        self.start()
+        with self.__lock:
+            self.__records += 1
+        rule = request.url_rule
+        fields = {
+            "method": request.method,
+            "route": rule.rule if rule is not None else None,
+            "path": request.path,
+            "status": response.status_code,
+            "bytes": response.content_length,
+            "duration_ms": round((time.perf_counter() - timing["start"]) * 1000, 3),
+            "db_ms": round(timing["db"] * 1000, 3),
+            "queries": timing["queries"],
+        }
+        self.queue.handle(logging.makeLogRecord({
+            "name": __name__,
+            "msg": "access",
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+            "access": fields,
+        }))
+        return response
+
+    @staticmethod
+    def before_execute(conn: object, cursor: object, statement: str, *args) -> None:
+        """
+        Starts timing a statement of the current request.
+        """
+        if has_request_context() and "access" in g:
+            conn.info["access_start"] = time.perf_counter()
+
+    @staticmethod
+    def after_execute(conn: object, cursor: object, statement: str, *args) -> None:
+        """
+        Adds the time of a statement to the current request.
+        """
+        start = conn.info.pop("access_start", None)
+        if start is not None and has_request_context() and "access" in g:
+            g.access["db"] += time.perf_counter() - start
+            g.access["queries"] += 1
+
+    def get_stats(self) -> dict:
+        """
+        Returns the number of records logged, skipped by
+        sampling, and dropped because the queue was full.
+        """
+        with self.__lock:
+            return {
+                "records": self.__records,
+                "skipped": self.__skipped,
+                "dropped": self.queue.dropped,
+            }
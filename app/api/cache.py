@@ -0,0 +1,332 @@
+"""
+API Caches.
+
+Caches are bounded, least-recently-used, and their entries
+expire after a time to live. Every entry is tagged with the
+entities it was built from, such as "movie:1", so that
+writes invalidate exactly the entries that depend on them.
+
+Entries may also depend on whole entity types, such as every
+movie, through generation counters that writes increment.
+Such entries are keyed by the generations they were built
+with, so they are never found again after a write.
+"""
+
+import time
+import typing
+import logging
+import threading
+import contextlib
+import collections
+
+logger = logging.getLogger(__name__)
+
+
+class Cache(object):
+    """
+    In-process LRU cache with a TTL and tags.
+    Safe to use from many threads.
+    """
+
+    def __init__(self,
+                 size: int=1024,
+                 ttl: float=300,
+                 budget: int=None,
+                 stale: float=0) -> None:
+        """
+        Cache initializer.
+        Size is the maximum number of entries.
+        TTL is the number of seconds entries are valid.
+        Budget is the maximum total cost of the entries,
+        such as their size in bytes, or None for no limit.
+        Stale is the number of seconds entries are kept after
+        they expire, to be served with get_stale() if they
+        can not be built again.
+        """
+        if not isinstance(size, int) or size < 1:
+            raise ValueError("Invalid size:", size)
+        if not isinstance(ttl, (int, float)) or ttl <= 0:
+            raise ValueError("Invalid TTL:", ttl)
+        if budget is not None and (not isinstance(budget, int) or budget < 1):
+            raise ValueError("Invalid budget:", budget)
+        if not isinstance(stale, (int, float)) or stale < 0:
+            raise ValueError("Invalid stale time:", stale)
+        self.size = size
+        self.ttl = ttl
+        self.budget = budget
+        self.stale = stale
+        self.__cost = 0
+        self.__lock = threading.RLock()
+        self.__local = threading.local()
+        self.__entries = collections.OrderedDict()
+        self.__tags = collections.defaultdict(set)
+        self.__counters = collections.Counter()
+        self.__generation = 0
+
+    def get(self, key: typing.Hashable, count_miss: bool=True) -> tuple:
+        """
+        Returns the value and the tags of an entry,
+        or (None, None) if it is missing or expired.
+        """
+        with self.__lock:
+            entry = self.__get_entry(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.__counters["misses"] += int(count_miss)
+                return None, None
+            self.__entries.move_to_end(key)
+            self.__counters["hits"] += 1
+            return entry[1], entry[2]
+
+    def get_stale(self, key: typing.Hashable) -> tuple:
+        """
+        Returns the value and the tags of an entry that
+        expired less than the stale time ago, or (None, None).
+        """
+        with self.__lock:
+            entry = self.__get_entry(key)
+            if entry is None or entry[0] >= time.monotonic():
+                return None, None
+            self.__counters["stale"] += 1
+            return entry[1], entry[2]
+
+    def __get_entry(self, key: typing.Hashable) -> tuple:
+        """
+        Returns an entry, removing it if it expired
+        more than the stale time ago.
+        """
+        entry = self.__entries.get(key)
+        if entry is not None and entry[0] + self.stale < time.monotonic():
+            self.__remove(key)
+            self.__counters["expirations"] += 1
+            return None
+        return entry
+
+    def set(self,
+            key: typing.Hashable,
+            value: object,
+            tags: frozenset=frozenset(),
+            cost: int=0,
+            generation: int=None) -> None:
+        """
+        Adds an entry, evicting the least recently used
+        entries if the cache is full, or over its budget.
+        Entries costing more than the budget are not added.
+        If a generation is passed, the entry is only added if
+        no entries were invalidated since that generation.
+        """
+        with self.__lock:
+            if generation is not None and generation != self.__generation:
+                logger.debug("Not caching %s, built before an invalidation.", key)
+                return
+            if key in self.__entries:
+                self.__remove(key)
+            if self.budget is not None and cost > self.budget:
+                logger.debug("Not caching %s, costing %s.", key, cost)
+                self.__counters["rejected"] += 1
+                return
+            self.__entries[key] = (time.monotonic() + self.ttl, value, frozenset(tags), cost)
+            self.__cost += cost
+            for tag in tags:
+                self.__tags[tag].add(key)
+            while len(self.__entries) > self.size or \
+                    (self.budget is not None and self.__cost > self.budget):
+                self.__remove(next(iter(self.__entries)))
+                self.__counters["evictions"] += 1
+
+    def invalidate(self, *tags) -> int:
+        """
+        Removes every entry tagged with any of the tags.
+        Returns the number of entries removed.
+        """
+        with self.__lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self.__tags.get(tag, ()))
+            for key in keys:
+                self.__remove(key)
+            self.__generation += 1
+            self.__counters["invalidations"] += len(keys)
+            logger.debug("Invalidated %s entries tagged: %s.", len(keys), tags)
+            return len(keys)
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__tags.clear()
+            self.__cost = 0
+            self.__generation += 1
+
+    def __remove(self, key: typing.Hashable) -> None:
+        """
+        Removes an entry and its tags.
+        """
+        _, _, tags, cost = self.__entries.pop(key)
+        self.__cost -= cost
+        for tag in tags:
+            keys = self.__tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.__tags[tag]
+
+    def get_generation(self) -> int:
+        """
+        Returns the number of invalidations so far.
+        """
+        with self.__lock:
+            return self.__generation
+
+    def get_stats(self) -> dict:
+        """
+        Returns the cache counters.
+        """
+        with self.__lock:
+            return {
+                "size": len(self.__entries),
+                "max_size": self.size,
+                "cost": self.__cost,
+                "budget": self.budget,
+                "hits": self.__counters["hits"],
+                "misses": self.__counters["misses"],
+                "evictions": self.__counters["evictions"],
+                "expirations": self.__counters["expirations"],
+                "invalidations": self.__counters["invalidations"],
+                "stale": self.__counters["stale"],
+                "rejected": self.__counters["rejected"],
+            }
+
+    def tag(self, *tags) -> None:
+        """
+        Tags the entries being built in this thread.
+        """
+        for collected in getattr(self.__local, "stack", []):
+            collected.update(tags)
+
+    @contextlib.contextmanager
+    def collect(self) -> typing.Generator:
+        """
+        Yields the set of tags added with tag() in this
+        thread until the context exits.
+        """
+        stack = self.__local.__dict__.setdefault("stack", [])
+        collected = set()
+        stack.append(collected)
+        try:
+            yield collected
+        finally:
+            stack.pop()
+
+    def fetch(self, key: typing.Hashable, build: typing.Callable) -> object:
+        """
+        Returns the value of an entry, building it on a miss.
+        The tags added with tag() while building are stored
+        with the entry. Entries built inside other entries
+        also tag the outer entries, on hits and on misses.
+        Values built while other threads invalidated entries
+        are not stored, since they may be stale already.
+        """
+        value, tags = self.get(key)
+        if tags is None:
+            generation = self.get_generation()
+            with self.collect() as tags:
+                value = build()
+            self.set(key, value, tags, generation=generation)
+        self.tag(*tags)
+        return value
+
+
+class Generations(object):
+    """
+    Generation counters, by entity type.
+    Safe to use from many threads.
+    """
+
+    def __init__(self) -> None:
+        """
+        Generations initializer.
+        """
+        self.__lock = threading.Lock()
+        self.__counters = collections.Counter()
+
+    def get(self, *types) -> tuple:
+        """
+        Returns the current generations of the types.
+        """
+        with self.__lock:
+            return tuple(self.__counters[name] for name in types)
+
+    def bump(self, *types) -> None:
+        """
+        Increments the generations of the types.
+        """
+        with self.__lock:
+            for name in set(types):
+                self.__counters[name] += 1
+        logger.debug("Generations bumped: %s.", types)
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key.
+
+    The first caller runs the function, while the next ones
+    wait for its result, and share it. Callers waiting for
+    longer than the timeout run the function themselves.
+    Errors are not shared: the waiting callers retry.
+    """
+
+    def __init__(self, timeout: float=5) -> None:
+        """
+        Single flight initializer.
+        """
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError("Invalid timeout:", timeout)
+        self.timeout = timeout
+        self.__lock = threading.Lock()
+        self.__calls = {}
+        self.__counters = collections.Counter()
+
+    def do(self, key: typing.Hashable, function: typing.Callable) -> object:
+        """
+        Returns the result of the function, or the result
+        of a concurrent call with the same key.
+        """
+        while True:
+            with self.__lock:
+                call = self.__calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self.__calls[key] = {"done": threading.Event()}
+                    self.__counters["calls"] += 1
+            if leader:
+                try:
+                    call["value"] = function()
+                    return call["value"]
+                finally:
+                    with self.__lock:
+                        del self.__calls[key]
+                    call["done"].set()
+            if not call["done"].wait(self.timeout):
+                logger.warning("Timeout waiting for: %s.", key)
+                with self.__lock:
+                    self.__counters["timeouts"] += 1
+                return function()
+            if "value" in call:
+                with self.__lock:
+                    self.__counters["shared"] += 1
+                return call["value"]
+
+    def get_stats(self) -> dict:
+        """
+        Returns the number of calls, of results shared,
+        and of timeouts.
+        """
+        with self.__lock:
+            return {
+                "calls": self.__counters["calls"],
+                "shared": self.__counters["shared"],
+                "timeouts": self.__counters["timeouts"],
+            }
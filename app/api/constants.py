@@ -16,6 +16,31 @@ class Health(object):
     WARNING = "warning"
 
 
+class Metrics(object):
+    """
+    Metrics constants.
+    """
+    CACHE = "cache"
+    DOCUMENTS = "documents"
+    RESPONSES = "responses"
+    FLIGHTS = "flights"
+    POOLS = "pools"
+    ACCESS = "access"
+
+
+class Surrogate(object):
+    """
+    Surrogate key constants.
+    Every list depends on every Person and Movie, so the key
+    of the list of a type is purged whenever any of them is.
+    """
+    HEADER = "Surrogate-Key"
+    MOVIES = "movies-list"
+    PEOPLE = "people-list"
+    LISTS = (MOVIES, PEOPLE)
+    TYPES = {"movie": MOVIES, "person": PEOPLE}
+
+
 class Error(object):
     """
     Error constants.
@@ -30,6 +55,51 @@ class Pagination(object):
     """
     LIMIT = "limit"
     PAGE = "page"
+    CURSOR = "cursor"
+    NEXT_CURSOR = "next_cursor"
+    COUNT = "count"
+    TOTAL = "total"
+
+
+class Batch(object):
+    """
+    Batch lookup constants.
+    """
+    IDS = "ids"
+    MISSING = "missing"
+
+
+class Filter(object):
+    """
+    Search filters and sorting constants.
+    """
+    SORT = "sort"
+    ACTIVE = "active"
+    ROLE = "role"
+    TITLE = "title"
+    YEAR_FROM = "year_from"
+    YEAR_TO = "year_to"
+    LAST_NAME = "last_name"
+
+
+class Format(object):
+    """
+    Response format constants.
+    """
+    FORMAT = "format"
+    NORMALIZED = "normalized"
+    STREAM = "stream"
+    NDJSON = "ndjson"
+    STREAMS = (STREAM, NDJSON)
+    INCLUDED = "included"
+
+
+class Fields(object):
+    """
+    Sparse fieldsets and expansion constants.
+    """
+    FIELDS = "fields"
+    EXPAND = "expand"
 
 
 class Auth(object):
@@ -53,6 +123,7 @@ class Person(object):
     LAST_NAME = "last_name"
     ACTIVE = "is_active"
     ALIASES = "aliases"
+    COUNTS = "counts"
 
 
 class Movie(object):
@@ -66,6 +137,7 @@ class Movie(object):
     TITLE = "title"
     CREATED_AT = "created_at"
     RELEASED_AT = "released_at"
+    COUNTS = "counts"
 
     class Release(object):
         """
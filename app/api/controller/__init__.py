@@ -2,10 +2,25 @@
 Business Layer.
 """
 
+import json
+import base64
 import typing
+import binascii
+import datetime
 
 import logging
 
+from flask import current_app, has_app_context
+from sqlalchemy import and_, or_, func, text, select, union
+from sqlalchemy.orm import selectinload
+
+from ..cache import Cache
+from .pool import MonitoredPool
+from .models import db
+from .models.movie import Movie
+from .models.person import Person
+from .models.role import Actor, Director, Producer
+
 logger = logging.getLogger()
 
 
@@ -26,3 +41,349 @@ class Controller(object):
     """
     Application Controller.
     """
+
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+    COUNTS = (EXACT, ESTIMATE, NONE)
+
+    COUNT_TTL = 60
+    COUNT_SIZE = 1024
+
+    MAX_LIMIT = 200
+    MAX_STREAM_LIMIT = 100000
+    ESTIMATE_SQL = "SELECT reltuples::bigint FROM pg_class WHERE relname = :name"
+    EXPLAIN_SQL = "EXPLAIN (FORMAT JSON) {}"
+
+    # Estimated counts, by table name and validated filters.
+    __counts = Cache(size=COUNT_SIZE, ttl=COUNT_TTL)
+
+    # Callbacks notified after every write.
+    __listeners = []
+
+    @staticmethod
+    def listen(callback: typing.Callable, remote: bool=True) -> None:
+        """
+        Registers a callback, which is called after every write
+        with the changed entities, such as ("movie", 1).
+        If remote is False, it is only called after the writes
+        of this process, and not after those of other processes.
+        """
+        Controller.__listeners.append((callback, remote))
+
+    @staticmethod
+    def notify(*entities, remote: bool=False) -> None:
+        """
+        Notifies every listener that these entities changed,
+        in this process, or in another one if remote is True.
+        """
+        logger.debug("Entities changed: %s.", entities)
+        for callback, is_remote in Controller.__listeners:
+            if is_remote or not remote:
+                callback(*entities)
+
+    @staticmethod
+    def touch(session: object, people: list=(), movies: list=(), roles: list=()) -> None:
+        """
+        Increments the version of every person and movie whose
+        default document includes the changed people, movies,
+        or (person, movie) roles, in the session transaction.
+
+        A person is included in the documents of its movies.
+        A movie is included in the documents of its people,
+        and of the movies of its people. A role changes the
+        role counts of its person and its movie, so it is
+        included wherever both of them are.
+        Two UPDATE statements are run, whatever the changes.
+        """
+        logger.debug("Touching people: %s, movies: %s, roles: %s.", people, movies, roles)
+        tables = (Actor, Director, Producer)
+
+        def movies_of(ids: object) -> object:
+            return union(*[select([table.movie_id]).where(table.person_id.in_(ids))
+                           for table in tables])
+
+        def people_of(ids: object) -> object:
+            return union(*[select([table.person_id]).where(table.movie_id.in_(ids))
+                           for table in tables])
+
+        person_ids = list(people) + [person_id for person_id, _ in roles]
+        movie_ids = list(movies) + [movie_id for _, movie_id in roles]
+        person_conditions, movie_conditions = [], []
+        if person_ids:
+            person_conditions.append(Person.id.in_(person_ids))
+            movie_conditions.append(Movie.id.in_(movies_of(person_ids)))
+        if movie_ids:
+            movie_conditions.append(Movie.id.in_(movie_ids))
+            person_conditions.append(Person.id.in_(people_of(movie_ids)))
+            movie_conditions.append(Movie.id.in_(movies_of(people_of(movie_ids))))
+        for model, conditions in ((Person, person_conditions), (Movie, movie_conditions)):
+            if conditions:
+                session.execute(model.__table__.update()
+                                .where(or_(*conditions))
+                                .values(version=model.version + 1))
+
+    @classmethod
+    def get_load_options(cls, model: object, plan: dict=None, parent: object=None) -> list:
+        """
+        Translates a load plan into SQLAlchemy loader options.
+
+        A load plan is a tree of relationship names, such as:
+        {"actors": {"aliases": {}}, "directors": {}}
+        Every relationship in the plan is loaded with an extra
+        SELECT ... WHERE id IN (...) statement, so the number
+        of queries depends on the plan and not on the results.
+        """
+        options = []
+        for name, children in (plan or {}).items():
+            attribute = getattr(model, name)
+            if parent is None:
+                option = selectinload(attribute)
+            else:
+                option = parent.selectinload(attribute)
+            target = attribute.property.mapper.class_
+            options.extend(cls.get_load_options(target, children, option) or [option])
+        return options
+
+    @staticmethod
+    def encode_cursor(*values) -> str:
+        """
+        Encodes the values of the last row of a page
+        as an opaque pagination cursor.
+        """
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str=None) -> list:
+        """
+        Decodes an opaque pagination cursor.
+        An empty cursor is the cursor of the first page.
+        @raises: ValueError.
+        """
+        if not cursor:
+            return []
+        if not isinstance(cursor, str):
+            raise ValueError("Expecting str, got:", type(cursor))
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ValueError("Invalid cursor:", cursor)
+        if not isinstance(values, list):
+            raise ValueError("Invalid cursor:", cursor)
+        return values
+
+    @classmethod
+    def count_query(cls,
+                    query: object,
+                    model: object,
+                    count: str=None,
+                    filters: dict=None) -> int:
+        """
+        Counts the rows of a query, in one of these modes:
+        - exact: SELECT count(*) on the query.
+        - estimate: the planner estimate of PostgreSQL, from the
+          statistics of the table if the query is not filtered,
+          or else from EXPLAIN. Other databases count the rows
+          of the table exactly, and do not estimate filtered
+          queries, which returns None.
+        - none: no counting at all, which returns None.
+        The estimates are cached for COUNT_TTL seconds, by table
+        name and filters, which must have been validated.
+        @raises: ValueError.
+        """
+        if count is None or count == cls.NONE:
+            return None
+        if count not in cls.COUNTS:
+            raise ValueError("Invalid count:", count)
+        if count == cls.EXACT:
+            return cls.count_exact(query, model)
+        key = (model.__tablename__, ) + tuple(sorted((filters or {}).items()))
+        return cls.__counts.fetch(key, lambda: cls.count_estimate(query, model, filters))
+
+    @classmethod
+    def count_estimate(cls, query: object, model: object, filters: dict=None) -> int:
+        """
+        Estimates the rows of a query, without counting them,
+        or returns None if they can not be estimated.
+        """
+        if not cls.is_postgresql():
+            return None if filters else cls.count_exact(query, model)
+        if not filters:
+            name = model.__tablename__
+            total = db.session.execute(text(cls.ESTIMATE_SQL), {"name": name}).scalar()
+            return int(total) if total is not None and total >= 0 else None
+        statement = query.enable_eagerloads(False).order_by(None).with_entities(model.id)
+        compiled = statement.statement.compile(dialect=db.session.get_bind().dialect)
+        plan = db.session.connection().execute(cls.EXPLAIN_SQL.format(compiled),
+                                               compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def count_exact(query: object, model: object) -> int:
+        """
+        Counts the rows of a query, without loader options,
+        ordering or subqueries.
+        """
+        query = query.enable_eagerloads(False).order_by(None)
+        return query.with_entities(func.count(model.id)).scalar()
+
+    @staticmethod
+    def is_postgresql() -> bool:
+        """
+        Returns True if the session is bound to PostgreSQL.
+        """
+        return db.session.get_bind().dialect.name == "postgresql"
+
+    @staticmethod
+    def get_pool_stats() -> dict:
+        """
+        Returns the counters of the connection pools of this
+        worker, by bind, such as "primary" or "replica-0".
+        Pools that are not monitored are left out.
+        """
+        if not has_app_context():
+            return {}
+        stats = {}
+        for bind in [None] + sorted(current_app.config.get("SQLALCHEMY_BINDS") or {}):
+            pool = db.get_engine(bind=bind).pool
+            if isinstance(pool, MonitoredPool):
+                stats[bind or "primary"] = pool.get_stats()
+        return stats
+
+    @staticmethod
+    def dispose() -> None:
+        """
+        Closes the pooled connections of every bind, such as
+        before a fork, so that processes never share them.
+        """
+        for bind in [None] + sorted(current_app.config.get("SQLALCHEMY_BINDS") or {}):
+            db.get_engine(bind=bind).dispose()
+        logger.debug("Connection pools disposed.")
+
+    @staticmethod
+    def parse_bool(value: str=None) -> bool:
+        """
+        Parses a boolean query filter.
+        An empty value is not a filter, which returns None.
+        @raises: ValueError.
+        """
+        if value is None or value == "":
+            return None
+        if value in (True, "true", "1"):
+            return True
+        if value in (False, "false", "0"):
+            return False
+        raise ValueError("Expecting bool, got:", value)
+
+    @staticmethod
+    def parse_int(value: str=None) -> int:
+        """
+        Parses an integer query filter.
+        An empty value is not a filter, which returns None.
+        @raises: ValueError.
+        """
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError("Expecting int, got:", type(value))
+        return int(value)
+
+    @classmethod
+    def startswith(cls, column: object, value: str) -> object:
+        """
+        Filters the rows where the column starts with the value.
+        PostgreSQL scans the pattern index of the column with LIKE.
+        Other databases scan the index of the column with a range,
+        and LIKE keeps the match exact.
+        """
+        like = column.startswith(value, autoescape=True)
+        if cls.is_postgresql() or ord(value[-1]) == 0x10FFFF:
+            return like
+        upper = value[:-1] + chr(ord(value[-1]) + 1)
+        return and_(column >= value, column < upper, like)
+
+    @staticmethod
+    def get_order(sorts: dict, sort: str=None) -> tuple:
+        """
+        Parses a sort key, such as "title" or "-title", into the
+        columns to order by and whether the order is descending.
+        Sorts always end in a unique column, so the order is stable.
+        @raises: ValueError.
+        """
+        if not sort:
+            sort = next(iter(sorts))
+        if not isinstance(sort, str):
+            raise ValueError("Expecting str, got:", type(sort))
+        descending = sort.startswith("-")
+        name = sort[1:] if descending else sort
+        if name not in sorts:
+            raise ValueError("Invalid sort:", sort)
+        return sorts[name], descending
+
+    @staticmethod
+    def order(query: object, columns: tuple, descending: bool=False) -> object:
+        """
+        Orders a query by the sort columns.
+        """
+        return query.order_by(*[
+            column.desc() if descending else column.asc()
+            for column in columns
+        ])
+
+    @staticmethod
+    def get_keyset(columns: tuple, values: list) -> list:
+        """
+        Loads the values of a cursor, one per sort column.
+        Dates are stored in the cursors as ordinals.
+        An empty cursor has an empty keyset.
+        @raises: ValueError.
+        """
+        if not values:
+            return []
+        if len(values) != len(columns):
+            raise ValueError("Invalid keyset:", values)
+        keyset = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is datetime.date:
+                if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                    raise ValueError("Expecting ordinal, got:", value)
+                value = datetime.date.fromordinal(value)
+            elif isinstance(value, bool) or not isinstance(value, python_type):
+                raise ValueError("Expecting {}, got:".format(python_type), value)
+            keyset.append(value)
+        return keyset
+
+    @classmethod
+    def get_keyset_cursor(cls, columns: tuple, row: object) -> str:
+        """
+        Returns the cursor of the page after this row.
+        """
+        return cls.encode_cursor(*[
+            value.toordinal() if isinstance(value, datetime.date) else value
+            for value in (getattr(row, column.key) for column in columns)
+        ])
+
+    @staticmethod
+    def seek(query: object, columns: tuple, keyset: list, descending: bool=False) -> object:
+        """
+        Filters the rows after the keyset, in the order of the columns:
+        WHERE a >= x AND (a > x OR (a = x AND b > y))
+        The first condition bounds the scan of the index on the columns.
+        """
+        if not keyset:
+            return query
+
+        def after(column: object, value: object) -> object:
+            return column < value if descending else column > value
+
+        condition = after(columns[-1], keyset[-1])
+        for column, value in reversed(list(zip(columns, keyset))[:-1]):
+            condition = or_(after(column, value), and_(column == value, condition))
+        if len(columns) == 1:
+            return query.filter(condition)
+        first, value = columns[0], keyset[0]
+        bound = first <= value if descending else first >= value
+        return query.filter(bound, condition)
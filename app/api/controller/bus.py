@@ -0,0 +1,189 @@
+"""
+Invalidation Bus.
+
+Writes are sent to every other process, in every node, with
+PostgreSQL NOTIFY, so that they evict the cached entries of
+the changed entities. Notifications are sent by PostgreSQL
+when the transaction of the write commits, and never if it
+rolls back. Every process listens on its own connection.
+"""
+
+import os
+import re
+import json
+import select
+import socket
+import typing
+import logging
+import threading
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from . import Controller
+from ..preload import Daemon
+
+logger = logging.getLogger(__name__)
+
+
+class Bus(Daemon):
+    """
+    Invalidation bus, through PostgreSQL LISTEN/NOTIFY.
+
+    Payloads are JSON lists of the source process, and the
+    changed entities, such as ["host:42", [["movie", 1]]].
+    Processes ignore their own payloads, since writes are
+    notified in the writing process after they commit.
+    """
+
+    # Channel of the bus, or None if disabled.
+    CHANNEL = None
+
+    NOTIFY_SQL = "SELECT pg_notify(:channel, :payload)"
+
+    NAME = "bus"
+
+    def __init__(self,
+                 uri: str,
+                 channel: str="maria_invalidations",
+                 reset: typing.Callable=None,
+                 timeout: float=5,
+                 retry: float=1) -> None:
+        """
+        Bus initializer.
+        Reset is called after every LISTEN, including the first,
+        since any payload sent before it has been lost.
+        Timeout is the number of seconds between checks of the
+        connection, and retry the seconds before reconnecting.
+        """
+        super().__init__()
+        if not uri or not isinstance(uri, str):
+            raise ValueError("Invalid URI.")
+        if not isinstance(channel, str) or not re.match("^[a-z_][a-z0-9_]*$", channel):
+            raise ValueError("Invalid channel:", channel)
+        self.uri = uri
+        self.channel = channel
+        self.reset = reset
+        self.timeout = timeout
+        self.retry = retry
+        self.__connected = threading.Event()
+        self.__wakeup = None
+
+    @classmethod
+    def publish(cls, session: object, *entities) -> None:
+        """
+        Sends the changed entities, such as ("movie", 1),
+        when the transaction of the session commits.
+        """
+        if cls.CHANNEL is None:
+            return
+        session.execute(text(cls.NOTIFY_SQL), {
+            "channel": cls.CHANNEL,
+            "payload": cls.encode(*entities),
+        })
+
+    @staticmethod
+    def get_source() -> str:
+        """
+        Returns the name of this process, unique in the cluster.
+        """
+        return "{}:{}".format(socket.gethostname(), os.getpid())
+
+    @classmethod
+    def encode(cls, *entities) -> str:
+        """
+        Returns the payload of the changed entities.
+        """
+        return json.dumps([cls.get_source(), [list(entity) for entity in entities]])
+
+    @classmethod
+    def decode(cls, payload: str) -> list:
+        """
+        Returns the changed entities of a payload.
+        Payloads of this process, or invalid ones, are empty.
+        """
+        try:
+            source, entities = json.loads(payload)
+            entities = [(str(entity), int(entity_id)) for entity, entity_id in entities]
+        except (TypeError, ValueError):
+            logger.warning("Invalid payload: %s.", payload)
+            return []
+        if source == cls.get_source():
+            return []
+        return entities
+
+    def dispatch(self, payload: str) -> None:
+        """
+        Notifies the local listeners of the changed entities.
+        """
+        entities = self.decode(payload)
+        if entities:
+            Controller.notify(*entities, remote=True)
+
+    def before_start(self) -> None:
+        """
+        Opens the pipe that wakes the thread up when stopped.
+        """
+        self.__connected.clear()
+        self.__wakeup = os.pipe()
+
+    def wake(self) -> None:
+        """
+        Wakes the thread up, so that it closes its connection.
+        """
+        os.write(self.__wakeup[1], b"\0")
+
+    def wait(self, timeout: float=None) -> bool:
+        """
+        Waits until the bus is listening. Returns True if it is.
+        """
+        return self.__connected.wait(timeout)
+
+    def run(self, stopped: threading.Event) -> None:
+        """
+        Listens until stopped, reconnecting on failures.
+        """
+        engine = create_engine(self.uri, poolclass=NullPool)
+        try:
+            while not stopped.is_set():
+                try:
+                    self.listen(engine, stopped)
+                except Exception:
+                    logger.exception("Bus disconnected from channel: %s.", self.channel)
+                    self.__connected.clear()
+                    stopped.wait(self.retry)
+        finally:
+            self.__connected.clear()
+            engine.dispose()
+            for fd in self.__wakeup:
+                os.close(fd)
+
+    def listen(self, engine: object, stopped: threading.Event) -> None:
+        """
+        Listens on a new connection until stopped.
+        Payloads sent before the LISTEN, while the worker was
+        starting or disconnected, are lost, so the caches are
+        reset once listening.
+        """
+        connection = engine.raw_connection()
+        try:
+            dbapi = connection.connection
+            dbapi.autocommit = True
+            cursor = dbapi.cursor()
+            cursor.execute("LISTEN {}".format(self.channel))
+            if self.reset is not None:
+                self.reset()
+            self.__connected.set()
+            logger.debug("Bus listening on channel: %s.", self.channel)
+            while not stopped.is_set():
+                readable, _, _ = select.select([dbapi, self.__wakeup[0]], [], [], self.timeout)
+                if not readable:
+                    cursor.execute("SELECT 1")
+                    continue
+                if dbapi not in readable:
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    self.dispatch(dbapi.notifies.pop(0).payload)
+        finally:
+            connection.close()
@@ -0,0 +1,75 @@
+"""
+Documents Controller.
+"""
+
+import logging
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from .models.document import Document
+from .models import db
+
+from . import Controller
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentsController(Controller):
+    """
+    Documents Controller.
+    Documents are read and written by primary key.
+    """
+
+    @staticmethod
+    def get(entity: str, entity_id: int, version: int) -> tuple:
+        """
+        Load the body and the tags of the document of an entity,
+        by primary key. Returns (None, None) if it is missing,
+        or if it was rendered from another version.
+        """
+        document = db.session.query(Document).get((entity, entity_id))
+        if document is None or document.version != version:
+            logger.debug("Document not found: %s %s v%s.", entity, entity_id, version)
+            return None, None
+        return document.body, document.tags.split()
+
+    @staticmethod
+    def save(entity: str, entity_id: int, version: int, body: str, tags: list=()) -> None:
+        """
+        Store the document of an entity, replacing the
+        document of any older version.
+        Concurrent saves of the same document are ignored.
+        """
+        logger.debug("Saving document: %s %s v%s.", entity, entity_id, version)
+        document = db.session.query(Document).get((entity, entity_id))
+        if document is not None and document.version > version:
+            logger.debug("Newer document found: %s %s v%s.", entity, entity_id, document.version)
+            return
+        db.session.merge(Document(entity=entity,
+                                  entity_id=entity_id,
+                                  version=version,
+                                  body=body,
+                                  tags=" ".join(sorted(tags))))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            logger.debug("Document saved concurrently: %s %s.", entity, entity_id)
+            db.session.rollback()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def get_outdated(model: object, entity: str, after: int=0, limit: int=100) -> list:
+        """
+        Load the IDs of the active rows of a model, after an ID,
+        whose document is missing, or was rendered from another
+        version, such as those that include a changed entity.
+        """
+        query = db.session.query(model.id)
+        query = query.outerjoin(Document, and_(Document.entity == entity,
+                                               Document.entity_id == model.id))
+        query = query.filter(model.is_active.is_(True), model.id > after)
+        query = query.filter(or_(Document.version.is_(None), Document.version != model.version))
+        return [row.id for row in query.order_by(model.id).limit(limit)]
@@ -0,0 +1,135 @@
+"""
+Request-scoped Loader.
+
+Loads rows by ID in batches, and caches them until the end
+of the request, so that repeated lookups of the same rows
+in one request do not query the database again. A cached
+row is loaded again when a lookup asks for relationships
+that it was not loaded with.
+"""
+
+import logging
+import collections
+
+from flask import g, has_request_context
+
+from .models import db
+
+logger = logging.getLogger(__name__)
+
+
+class Loader(object):
+    """
+    Batching and caching loader of a model, by ID.
+
+    IDs queued with prime() are loaded together with the next
+    lookup, in one SELECT ... WHERE id IN (...) statement.
+    Only active rows are loaded. Rows that are not found are
+    not cached, so rows created later in the request are found.
+    Every cached row keeps the load plan it was loaded with.
+    """
+
+    def __init__(self, model: object) -> None:
+        """
+        Loader initializer.
+        """
+        self.__model = model
+        self.__cache = {}
+        self.__plans = {}
+        self.__pending = collections.OrderedDict()
+
+    @classmethod
+    def get(cls, model: object) -> object:
+        """
+        Returns the loader of a model for the current request.
+        Outside of requests, a new loader is returned every time,
+        which does not cache anything between lookups.
+        """
+        if not has_request_context():
+            return cls(model)
+        if "loaders" not in g:
+            g.loaders = {}
+        if model not in g.loaders:
+            g.loaders[model] = cls(model)
+        return g.loaders[model]
+
+    def prime(self, *ids) -> None:
+        """
+        Queues IDs to be loaded with the next lookup.
+        """
+        for row_id in ids:
+            if not self.is_cached(row_id):
+                self.__pending[row_id] = True
+
+    @classmethod
+    def covers(cls, loaded: dict, plan: dict) -> bool:
+        """
+        Returns True if every relationship in the plan
+        is also in the plan the row was loaded with.
+        """
+        return all(
+            name in loaded and cls.covers(loaded[name], children)
+            for name, children in plan.items()
+        )
+
+    def is_cached(self, row_id: int, plan: dict=None) -> bool:
+        """
+        Returns True if the row is cached and still usable.
+        Rows that were deactivated or removed from the
+        session since they were cached are loaded again,
+        and so are rows that were not loaded with the plan.
+        """
+        row = self.__cache.get(row_id)
+        return row is not None and row in db.session and row.is_active and \
+            self.covers(self.__plans[row_id], plan or {})
+
+    def load_many(self, ids: list, options: list=None, plan: dict=None) -> dict:
+        """
+        Loads rows by ID, in one query at most, together
+        with any queued IDs. Returns the rows found by ID.
+        Cached rows not loaded with the plan are refreshed
+        with its options, since the session would return
+        them as they are.
+        """
+        self.prime(*ids)
+        stale = [
+            row_id
+            for row_id in ids
+            if self.is_cached(row_id) and not self.is_cached(row_id, plan)
+        ]
+        found = {}
+        if self.__pending or stale:
+            pending = list(self.__pending) + stale
+            self.__pending.clear()
+            logger.debug("Loading %s IDs: %s.", self.__model, pending)
+            query = self.__model.query.options(*(options or []))
+            if stale:
+                query = query.populate_existing()
+            query = query.filter(self.__model.id.in_(pending)).filter_by(is_active=True)
+            found = {
+                row.id: row
+                for row in query.all()
+            }
+            self.__cache.update(found)
+            self.__plans.update(dict.fromkeys(found, plan or {}))
+        return {
+            row_id: found[row_id] if row_id in found else self.__cache[row_id]
+            for row_id in ids
+            if row_id in found or self.is_cached(row_id)
+        }
+
+    def load(self, row_id: int, options: list=None, plan: dict=None) -> object:
+        """
+        Loads a row by ID. Returns None if not found.
+        Without queued IDs, the row is loaded by primary key.
+        """
+        if self.is_cached(row_id, plan):
+            return self.__cache[row_id]
+        if self.__pending or self.is_cached(row_id):
+            return self.load_many([row_id], options=options, plan=plan).get(row_id)
+        query = self.__model.query.options(*(options or []))
+        row = query.filter_by(id=row_id, is_active=True).first()
+        if row is not None:
+            self.__cache[row_id] = row
+            self.__plans[row_id] = plan or {}
+        return row
@@ -0,0 +1,225 @@
+"""
+Schema Migrations.
+
+The schema is created and upgraded by an explicit command,
+run once per deploy, instead of by every worker at startup.
+Migrations are applied in order, in one transaction, and
+are recorded in the schema_migration table. They inspect
+the schema before changing it, so that they also upgrade
+databases created before migrations were recorded. Every
+migration is frozen once released: its DDL is written out
+explicitly, never built from the models, so that changes to
+the models never change what released migrations do.
+"""
+
+import logging
+
+from sqlalchemy import MetaData, Table, Column, ForeignKey
+from sqlalchemy import Integer, String, Text, Boolean, Date, DateTime
+from sqlalchemy import inspect, select, text, func
+from sqlalchemy.schema import CreateColumn
+
+from .models import db
+from .models.migration import Migration
+
+logger = logging.getLogger(__name__)
+
+
+def add_column(connection: object, table: str, column: Column) -> bool:
+    """
+    Adds a column to a table, unless it exists.
+    Returns True if it was added.
+    """
+    names = {info["name"] for info in inspect(connection).get_columns(table)}
+    if column.name in names:
+        return False
+    Table(table, MetaData(), column)
+    definition = CreateColumn(column).compile(dialect=connection.dialect)
+    connection.execute(text("ALTER TABLE {} ADD COLUMN {}".format(table, definition)))
+    logger.info("Added column: %s.%s.", table, column.name)
+    return True
+
+
+# Tables of the first migration, as they were when it was
+# released. Columns and tables added to the models since then
+# are added by their own migrations, never here.
+BASELINE = MetaData()
+
+Table("entity_movie", BASELINE,
+      Column("id", Integer, primary_key=True),
+      Column("is_active", Boolean),
+      Column("title", String(255), nullable=False),
+      Column("released_at", Date, nullable=False),
+      Column("created_at", DateTime, server_default=func.now()))
+
+Table("entity_person", BASELINE,
+      Column("id", Integer, primary_key=True),
+      Column("is_active", Boolean),
+      Column("first_name", String(255), nullable=False),
+      Column("last_name", String(255), nullable=False),
+      Column("created_at", DateTime, server_default=func.now()))
+
+Table("entity_person_alias", BASELINE,
+      Column("id", Integer, primary_key=True),
+      Column("person_id", Integer, ForeignKey("entity_person.id"), nullable=False),
+      Column("value", String(255), nullable=False, unique=True, index=True),
+      Column("created_at", DateTime, server_default=func.now()))
+
+Table("movie_actor", BASELINE,
+      Column("created_at", DateTime, server_default=func.now()),
+      Column("person_id", Integer, ForeignKey("entity_person.id"), primary_key=True),
+      Column("movie_id", Integer, ForeignKey("entity_movie.id"), primary_key=True))
+
+Table("movie_director", BASELINE,
+      Column("created_at", DateTime, server_default=func.now()),
+      Column("person_id", Integer, ForeignKey("entity_person.id"), primary_key=True),
+      Column("movie_id", Integer, ForeignKey("entity_movie.id"), primary_key=True))
+
+Table("movie_producer", BASELINE,
+      Column("created_at", DateTime, server_default=func.now()),
+      Column("person_id", Integer, ForeignKey("entity_person.id"), primary_key=True),
+      Column("movie_id", Integer, ForeignKey("entity_movie.id"), primary_key=True))
+
+Table("entity_user", BASELINE,
+      Column("id", Integer, primary_key=True),
+      Column("is_active", Boolean, index=True),
+      Column("username", String(255), nullable=False, index=True),
+      Column("password", String(255), nullable=False),
+      Column("created_at", DateTime, server_default=func.now()))
+
+
+def create_tables(connection: object) -> None:
+    """
+    Creates the baseline tables that do not exist.
+    """
+    BASELINE.create_all(bind=connection)
+
+
+# Indexes of the second migration: table, name and columns.
+INDEXES = (
+    ("entity_movie", "ix_entity_movie_is_active", ("is_active", "id")),
+    ("entity_movie", "ix_entity_movie_title", ("title", "id")),
+    ("entity_movie", "ix_entity_movie_released_at", ("released_at", "id")),
+    ("entity_person", "ix_entity_person_is_active", ("is_active", "id")),
+    ("entity_person", "ix_entity_person_last_name", ("last_name", "id")),
+    ("entity_person", "ix_entity_person_first_name", ("first_name", "id")),
+    ("movie_actor", "ix_movie_actor_movie_id", ("movie_id",)),
+    ("movie_director", "ix_movie_director_movie_id", ("movie_id",)),
+    ("movie_producer", "ix_movie_producer_movie_id", ("movie_id",)),
+)
+
+# Indexes of prefix searches, in the C collation, of PostgreSQL only.
+PATTERN_INDEXES = (
+    ("entity_movie", "ix_entity_movie_title_pattern", "title"),
+    ("entity_person", "ix_entity_person_last_name_pattern", "last_name"),
+)
+
+
+def add_indexes(connection: object) -> None:
+    """
+    Adds the indexes of the searches and of the roles.
+    """
+    for table, name, columns in INDEXES:
+        names = {info["name"] for info in inspect(connection).get_indexes(table)}
+        if name not in names:
+            connection.execute(text("CREATE INDEX {} ON {} ({})"
+                                    .format(name, table, ", ".join(columns))))
+            logger.info("Added index: %s.", name)
+    if connection.dialect.name == "postgresql":
+        for table, name, column in PATTERN_INDEXES:
+            connection.execute(text("CREATE INDEX IF NOT EXISTS {} ON {} ({} varchar_pattern_ops)"
+                                    .format(name, table, column)))
+
+
+def add_versions(connection: object) -> None:
+    """
+    Adds the versions of People and Movies.
+    """
+    for table in ("entity_movie", "entity_person"):
+        column = Column("version", Integer, nullable=False, server_default="1")
+        add_column(connection, table, column)
+
+
+# Role counts of the fourth migration: role table, and the
+# count columns of its movies and of its people.
+ROLE_COUNTS = (
+    ("movie_actor", "actors_count", "movies_as_actor_count"),
+    ("movie_director", "directors_count", "movies_as_director_count"),
+    ("movie_producer", "producers_count", "movies_as_producer_count"),
+)
+
+
+def add_role_counts(connection: object) -> None:
+    """
+    Adds the role counts of People and Movies,
+    and counts the roles of the rows that exist.
+    """
+    for role, movie_count, person_count in ROLE_COUNTS:
+        for table, name, key in (("entity_movie", movie_count, "movie_id"),
+                                 ("entity_person", person_count, "person_id")):
+            column = Column(name, Integer, nullable=False, server_default="0")
+            if add_column(connection, table, column):
+                connection.execute(text(
+                    "UPDATE {table} SET {name} = "
+                    "(SELECT count(*) FROM {role} WHERE {role}.{key} = {table}.id)"
+                    .format(table=table, name=name, role=role, key=key)))
+
+
+# Table of the fifth migration, as it was when it was released.
+DOCUMENTS = MetaData()
+
+Table("document", DOCUMENTS,
+      Column("entity", String(16), primary_key=True),
+      Column("entity_id", Integer, primary_key=True, autoincrement=False),
+      Column("version", Integer, nullable=False),
+      Column("body", Text, nullable=False),
+      Column("tags", Text, nullable=False))
+
+
+def create_documents(connection: object) -> None:
+    """
+    Creates the document table, unless it exists.
+    """
+    DOCUMENTS.create_all(bind=connection)
+
+
+class Migrator(object):
+    """
+    Applies the schema migrations that are pending.
+    """
+
+    # Versions, names and functions of the migrations, in order.
+    # New migrations are added at the end, and never changed.
+    MIGRATIONS = (
+        (1, "Create tables", create_tables),
+        (2, "Add search and role indexes", add_indexes),
+        (3, "Add versions", add_versions),
+        (4, "Add role counts", add_role_counts),
+        (5, "Create document table", create_documents),
+    )
+
+    # Key of the PostgreSQL advisory lock held while migrating,
+    # so that concurrent deploys apply every migration once.
+    LOCK = 7310
+
+    @classmethod
+    def migrate(cls) -> list:
+        """
+        Applies the pending migrations, in one transaction.
+        Returns the names of the migrations applied.
+        """
+        applied = []
+        with db.engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), key=cls.LOCK)
+            Migration.__table__.create(bind=connection, checkfirst=True)
+            done = {version for version, in connection.execute(select([Migration.version]))}
+            for version, name, migration in cls.MIGRATIONS:
+                if version in done:
+                    continue
+                logger.info("Applying migration %s: %s.", version, name)
+                migration(connection)
+                connection.execute(Migration.__table__.insert().values(version=version, name=name))
+                applied.append(name)
+        logger.info("Applied %s migrations.", len(applied))
+        return applied
@@ -6,9 +6,44 @@ The DB connector is initialized here.
 
 import logging
 
-from flask_sqlalchemy import SQLAlchemy
+from flask import g, has_app_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import orm
+from sqlalchemy.sql import Select
 
 logger = logging.getLogger(__name__)
 
+
+class RoutingSession(SignallingSession):
+    """
+    Session that sends the SELECT statements of a request
+    to the replica bind chosen for it, in g.replica, if any.
+    Everything else, such as flushes, bulk writes, and raw SQL,
+    is sent to the primary.
+    """
+
+    def get_bind(self, mapper: object=None, clause: object=None) -> object:
+        """
+        Returns the engine of a statement.
+        """
+        if isinstance(clause, Select) and not self._flushing and has_app_context():
+            replica = g.get("replica")
+            if replica is not None:
+                return get_state(self.app).db.get_engine(self.app, bind=replica)
+        return super().get_bind(mapper=mapper, clause=clause)
+
+
+class Database(SQLAlchemy):
+    """
+    DB connector with read replica routing.
+    """
+
+    def create_session(self, options: dict) -> orm.sessionmaker:
+        """
+        Returns the factory of routing sessions.
+        """
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
 logger.debug("Creating DB connector.")
-db = SQLAlchemy(session_options=dict(autoflush=False))
+db = Database(session_options=dict(autoflush=False))
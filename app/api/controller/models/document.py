@@ -0,0 +1,32 @@
+"""
+Document Model.
+
+Documents are the pre-rendered JSON of People and Movies,
+in their default expansion, so that detail reads do not
+load and serialize the graph of every related row.
+"""
+
+from . import db
+
+
+class Document(db.Model):
+    """
+    Materialized document of a Person or a Movie.
+
+    Documents are stored with the version of their entity,
+    and are only used while that version is current.
+    """
+
+    __tablename__ = 'document'
+
+    entity = db.Column(db.String(16), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.Integer, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    tags = db.Column(db.Text, nullable=False, default="")
+
+    def __str__(self) -> str:
+        """
+        String serializer.
+        """
+        return "<Document: {} {} v{}>".format(self.entity, self.entity_id, self.version)
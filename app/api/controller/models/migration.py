@@ -0,0 +1,26 @@
+"""
+Migration Model.
+
+Every migration applied to the schema is recorded, so that
+it is never applied twice.
+"""
+
+from . import db
+
+
+class Migration(db.Model):
+    """
+    Applied schema migration.
+    """
+
+    __tablename__ = 'schema_migration'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __str__(self) -> str:
+        """
+        String serializer.
+        """
+        return "<Migration: {} '{}'>".format(self.version, self.name)
@@ -5,8 +5,9 @@ Movie Model.
 from . import db
 from .utils import Roman
 
+from sqlalchemy import event
 from sqlalchemy.orm import relationship, validates
-from sqlalchemy.schema import ForeignKey
+from sqlalchemy.schema import DDL, ForeignKey
 
 
 class Movie(db.Model):
@@ -15,12 +16,21 @@ class Movie(db.Model):
     """
 
     __tablename__ = 'entity_movie'
+    __table_args__ = (
+        db.Index('ix_entity_movie_is_active', 'is_active', 'id'),
+        db.Index('ix_entity_movie_title', 'title', 'id'),
+        db.Index('ix_entity_movie_released_at', 'released_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     is_active = db.Column(db.Boolean, default=True)
     title = db.Column(db.String(255), nullable=False)
     released_at = db.Column(db.Date, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    actors_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    directors_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    producers_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     actors = relationship('Person', secondary='movie_actor')
     directors = relationship('Person', secondary='movie_director')
     producers = relationship('Person', secondary='movie_producer')
@@ -60,3 +70,11 @@ class Movie(db.Model):
         if len(value) < 5:
             raise ValueError("Too short:", value)
         return value
+
+
+# Prefix searches on titles use LIKE, which PostgreSQL
+# can only resolve with an index in the C collation.
+event.listen(Movie.__table__, 'after_create', DDL(
+    "CREATE INDEX ix_entity_movie_title_pattern "
+    "ON entity_movie (title varchar_pattern_ops)"
+).execute_if(dialect='postgresql'))
@@ -4,8 +4,9 @@ Person Model.
 
 from . import db
 
+from sqlalchemy import event
 from sqlalchemy.orm import relationship, validates
-from sqlalchemy.schema import ForeignKey
+from sqlalchemy.schema import DDL, ForeignKey
 
 
 class Person(db.Model):
@@ -14,12 +15,21 @@ class Person(db.Model):
     """
 
     __tablename__ = 'entity_person'
+    __table_args__ = (
+        db.Index('ix_entity_person_is_active', 'is_active', 'id'),
+        db.Index('ix_entity_person_last_name', 'last_name', 'id'),
+        db.Index('ix_entity_person_first_name', 'first_name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     is_active = db.Column(db.Boolean, default=True)
     first_name = db.Column(db.String(255), nullable=False)
     last_name = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    movies_as_actor_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    movies_as_director_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    movies_as_producer_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     movies_as_actor = relationship('Movie', secondary='movie_actor')
     movies_as_producer = relationship('Movie', secondary='movie_producer')
     movies_as_director = relationship('Movie', secondary='movie_director')
@@ -64,6 +74,14 @@ class Person(db.Model):
         return value
 
 
+# Prefix searches on last names use LIKE, which PostgreSQL
+# can only resolve with an index in the C collation.
+event.listen(Person.__table__, 'after_create', DDL(
+    "CREATE INDEX ix_entity_person_last_name_pattern "
+    "ON entity_person (last_name varchar_pattern_ops)"
+).execute_if(dialect='postgresql'))
+
+
 class Alias(db.Model):
     """
     Person Alias Model.
@@ -21,6 +21,9 @@ class Actor(Role):
     """
 
     __tablename__ = 'movie_actor'
+    __table_args__ = (
+        db.Index('ix_movie_actor_movie_id', 'movie_id'),
+    )
 
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     person_id = db.Column(db.Integer,
@@ -44,6 +47,9 @@ class Director(Role):
     """
 
     __tablename__ = 'movie_director'
+    __table_args__ = (
+        db.Index('ix_movie_director_movie_id', 'movie_id'),
+    )
 
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     person_id = db.Column(db.Integer,
@@ -67,6 +73,9 @@ class Producer(Role):
     """
 
     __tablename__ = 'movie_producer'
+    __table_args__ = (
+        db.Index('ix_movie_producer_movie_id', 'movie_id'),
+    )
 
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     person_id = db.Column(db.Integer,
@@ -4,11 +4,18 @@ Movies Controller.
 
 import logging
 import typing
+import collections
+import datetime
+
+from sqlalchemy import exists
 
 from .models.movie import Movie
+from .models.role import Actor, Director, Producer
 from .models import db
 
 from . import Controller, ControllerException
+from .loader import Loader
+from .bus import Bus
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +44,30 @@ class LimitException(MovieException):
     """
 
 
+class CursorException(MovieException):
+    """
+    Raised if page cursor is invalid.
+    """
+
+
+class CountException(MovieException):
+    """
+    Raised if count mode is invalid.
+    """
+
+
+class SortException(MovieException):
+    """
+    Raised if sort key is invalid.
+    """
+
+
+class FilterException(MovieException):
+    """
+    Raised if search filters are invalid.
+    """
+
+
 class ReleaseDateException(MovieException):
     """
     Raised if release date is invalid.
@@ -60,23 +91,91 @@ class MoviesController(Controller):
     Movies controller business layer.
     """
 
-    @staticmethod
-    def get_by_id(movie_id: str=None) -> Movie:
+    ENTITY = "movie"
+
+    SORTS = {
+        "id": (Movie.id, ),
+        "title": (Movie.title, Movie.id),
+        "released_at": (Movie.released_at, Movie.id),
+    }
+
+    MAX_IDS = 200
+
+    ROLES = {
+        "actor": Actor,
+        "director": Director,
+        "producer": Producer,
+    }
+
+    @classmethod
+    def get_by_id(cls, movie_id: str=None, plan: dict=None) -> Movie:
         """
         Load movie by movie id.
+        Relationships in the load plan are loaded eagerly.
+        Lookups are cached until the end of the request.
         @raises: MovieIDException, MovieNotFoundException.
         """
         logger.debug("Loading movie by ID '%s'.", movie_id)
         if not movie_id or not isinstance(movie_id, (int, str)):
             raise MovieIDException()
-        movie = Movie.query.filter_by(id=movie_id, is_active=True).first()
+        if isinstance(movie_id, str) and movie_id.isdigit():
+            movie_id = int(movie_id)
+        options = cls.get_load_options(Movie, plan)
+        movie = Loader.get(Movie).load(movie_id, options=options, plan=plan)
         if not movie:
             raise MovieNotFoundException()
         logger.debug("Movie found: '%s'.", movie)
         return movie
 
     @staticmethod
-    def create(released_at: str=None,
+    def get_version(movie_id: int=None) -> int:
+        """
+        Load the version of an active movie, by primary key,
+        without loading the movie. Returns None if not found.
+        @raises: MovieIDException.
+        """
+        if isinstance(movie_id, bool) or not isinstance(movie_id, int):
+            raise MovieIDException()
+        query = db.session.query(Movie.version)
+        return query.filter(Movie.id == movie_id, Movie.is_active.is_(True)).scalar()
+
+    @staticmethod
+    def prime(*movie_ids) -> None:
+        """
+        Queues movies ids, to be loaded together with
+        the next lookup in the request.
+        """
+        Loader.get(Movie).prime(*movie_ids)
+
+    @classmethod
+    def get_many(cls, movie_ids: list=None, plan: dict=None) -> tuple:
+        """
+        Load many movies by movie ids, in the requested order.
+        Relationships in the load plan are loaded eagerly, so the
+        number of queries does not depend on the number of ids.
+        Lookups are cached until the end of the request.
+        Returns the movies found and the ids not found.
+        @raises: MovieIDException.
+        """
+        logger.debug("Loading movies by IDs '%s'.", movie_ids)
+        if not movie_ids or not isinstance(movie_ids, (list, tuple)):
+            raise MovieIDException()
+        if len(movie_ids) > cls.MAX_IDS:
+            raise MovieIDException(movie_ids)
+        for movie_id in movie_ids:
+            if isinstance(movie_id, bool) or not isinstance(movie_id, int):
+                raise MovieIDException(movie_id)
+        movie_ids = list(collections.OrderedDict.fromkeys(movie_ids))
+        options = cls.get_load_options(Movie, plan)
+        found = Loader.get(Movie).load_many(movie_ids, options=options, plan=plan)
+        movies = [found[movie_id] for movie_id in movie_ids if movie_id in found]
+        missing = [movie_id for movie_id in movie_ids if movie_id not in found]
+        logger.debug("Movies found: %s, missing: %s.", len(movies), missing)
+        return movies, missing
+
+    @classmethod
+    def create(cls,
+               released_at: str=None,
                is_active: bool=True,
                title: str=None) -> Movie:
         """
@@ -91,7 +190,10 @@ class MoviesController(Controller):
         movie = Movie(title=title, released_at=released_at)
         movie.is_active = is_active
         db.session.add(movie)
+        db.session.flush()
+        Bus.publish(db.session, (cls.ENTITY, movie.id))
         db.session.commit()
+        cls.notify((cls.ENTITY, movie.id))
         logger.debug("Movie created: '%s'.", movie)
         return movie
 
@@ -118,7 +220,10 @@ class MoviesController(Controller):
         movie.released_at = released_at or movie.released_at
         movie.is_active = is_active if is_active is not None else movie.is_active
         db.session.add(movie)
+        cls.touch(db.session, movies=[movie.id])
+        Bus.publish(db.session, (cls.ENTITY, movie.id))
         db.session.commit()
+        cls.notify((cls.ENTITY, movie.id))
         logger.debug("Movie updated: '%s'.", movie)
         return movie
 
@@ -132,21 +237,145 @@ class MoviesController(Controller):
         logger.debug("Movie deactivated: '%s'.", movie_id)
         return movie
 
-    @staticmethod
-    def search(page: int=0, limit: int=50) -> typing.Generator:
+    @classmethod
+    def get_filters(cls,
+                    active: bool=None,
+                    title: str=None,
+                    year_from: int=None,
+                    year_to: int=None,
+                    role: str=None) -> dict:
+        """
+        Validates the search filters:
+        - active: only active movies, or only inactive movies.
+        - title: movies with titles starting with this prefix.
+        - year_from, year_to: movies released in this range of years.
+        - role: movies with at least one person in this role.
+        Returns the filters in use.
+        @raises: FilterException.
+        """
+        try:
+            filters = {
+                "active": cls.parse_bool(active),
+                "title": title or None,
+                "year_from": cls.parse_int(year_from),
+                "year_to": cls.parse_int(year_to),
+                "role": role or None,
+            }
+        except ValueError:
+            raise FilterException(active, year_from, year_to)
+        if filters["title"] is not None and not isinstance(title, str):
+            raise FilterException(title)
+        for year in (filters["year_from"], filters["year_to"]):
+            if year is not None and not datetime.MINYEAR <= year < datetime.MAXYEAR:
+                raise FilterException(year)
+        if filters["role"] is not None and role not in cls.ROLES:
+            raise FilterException(role)
+        return {
+            name: value
+            for name, value in filters.items()
+            if value is not None
+        }
+
+    @classmethod
+    def filter(cls,
+               active: bool=None,
+               title: str=None,
+               year_from: int=None,
+               year_to: int=None,
+               role: str=None) -> object:
+        """
+        Builds the query of the movies matching the validated filters.
+        Every filter can be resolved with an index.
+        """
+        query = Movie.query
+        if active is not None:
+            query = query.filter(Movie.is_active == active)
+        if title is not None:
+            query = query.filter(cls.startswith(Movie.title, title))
+        if year_from is not None:
+            query = query.filter(Movie.released_at >= datetime.date(year_from, 1, 1))
+        if year_to is not None:
+            query = query.filter(Movie.released_at < datetime.date(year_to + 1, 1, 1))
+        if role is not None:
+            table = cls.ROLES[role]
+            query = query.filter(exists().where(table.movie_id == Movie.id))
+        return query
+
+    @classmethod
+    def search(cls,
+               page: int=0,
+               limit: int=50,
+               plan: dict=None,
+               cursor: str=None,
+               sort: str=None,
+               yield_per: int=None,
+               **filters) -> typing.Generator:
         """
         Listing & paginatin movies.
-        @raises: PageException, LimitException.
+        Relationships in the load plan are loaded eagerly.
+        Movies are sorted by any of the SORTS, such as "-title",
+        and then by ID, so the order is stable.
+        If a cursor is provided, the page is loaded with a seek
+        query on the sort columns, instead of OFFSET.
+        Rows are never counted here, see count().
+        If yield_per is provided, rows are streamed from a server-side
+        cursor in batches of that size, and pages can be much larger.
+        @raises: PageException, LimitException, CursorException,
+                 SortException, FilterException.
         """
         logger.debug("Listing Movies page %s limit %s.", page, limit)
         if not isinstance(page, int) or page < 0:
             raise PageException()
-        if not isinstance(limit, int) or limit < 1 or limit > 200:
+        max_limit = cls.MAX_STREAM_LIMIT if yield_per else cls.MAX_LIMIT
+        if not isinstance(limit, int) or limit < 1 or limit > max_limit:
             raise LimitException()
-        query = Movie.query.paginate(page=page, max_per_page=limit)
+        try:
+            columns, descending = cls.get_order(cls.SORTS, sort)
+        except ValueError:
+            raise SortException(sort)
+        try:
+            keyset = cls.get_keyset(columns, cls.decode_cursor(cursor))
+        except ValueError:
+            raise CursorException(cursor)
+        query = cls.filter(**cls.get_filters(**filters))
+        query = query.options(*cls.get_load_options(Movie, plan))
+        query = cls.order(query, columns, descending)
+        if cursor is None:
+            query = query.offset(max(page - 1, 0) * limit)
+        else:
+            query = cls.seek(query, columns, keyset, descending)
+        query = query.limit(limit)
+        items = query.yield_per(yield_per) if yield_per else query.all()
         yield from (
             movie
-            for movie in query.items
+            for movie in items
         )
-        logger.debug("Listed Movies page %s limit %s. Total %s.",
-                     page, limit, query.total)
+        logger.debug("Listed Movies page %s limit %s.", page, limit)
+
+    @classmethod
+    def get_cursor(cls, movie: Movie=None, sort: str=None) -> str:
+        """
+        Returns the cursor of the page after this Movie.
+        @raises: SortException.
+        """
+        try:
+            columns, _ = cls.get_order(cls.SORTS, sort)
+        except ValueError:
+            raise SortException(sort)
+        return cls.get_keyset_cursor(columns, movie)
+
+    @classmethod
+    def count(cls, count: str=None, **filters) -> int:
+        """
+        Counting movies, exactly, approximately or not at all.
+        @raises: CountException, FilterException.
+        """
+        logger.debug("Counting Movies: %s.", count)
+        if count is not None and count not in cls.COUNTS:
+            raise CountException(count)
+        filters = cls.get_filters(**filters)
+        if count is None or count == cls.NONE:
+            return None
+        total = cls.count_query(cls.filter(**filters), Movie, count, filters)
+        logger.debug("Counted Movies: %s.", total)
+        return total
@@ -4,11 +4,17 @@ People Controller.
 
 import logging
 import typing
+import collections
+
+from sqlalchemy import exists
 
 from .models.person import Person, Alias
+from .models.role import Actor, Director, Producer
 from .models import db
 
 from . import Controller, ControllerException
+from .loader import Loader
+from .bus import Bus
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +43,30 @@ class LimitException(PersonException):
     """
 
 
+class CursorException(PersonException):
+    """
+    Raised if page cursor is invalid.
+    """
+
+
+class CountException(PersonException):
+    """
+    Raised if count mode is invalid.
+    """
+
+
+class SortException(PersonException):
+    """
+    Raised if sort key is invalid.
+    """
+
+
+class FilterException(PersonException):
+    """
+    Raised if search filters are invalid.
+    """
+
+
 class LastNameException(PersonException):
     """
     Raised if last name is invalid.
@@ -72,21 +102,88 @@ class PeopleController(Controller):
     People controller business layer.
     """
 
-    @staticmethod
-    def get_by_id(person_id: str=None) -> Person:
+    ENTITY = "person"
+
+    SORTS = {
+        "id": (Person.id, ),
+        "last_name": (Person.last_name, Person.id),
+        "first_name": (Person.first_name, Person.id),
+    }
+
+    MAX_IDS = 200
+
+    ROLES = {
+        "actor": Actor,
+        "director": Director,
+        "producer": Producer,
+    }
+
+    @classmethod
+    def get_by_id(cls, person_id: str=None, plan: dict=None) -> Person:
         """
         Load person by person id.
+        Relationships in the load plan are loaded eagerly.
+        Lookups are cached until the end of the request.
         @raises: PersonIDException, PersonNotFoundException.
         """
         logger.debug("Loading person by ID '%s'.", person_id)
         if not person_id or not isinstance(person_id, (int, str)):
             raise PersonIDException()
-        person = Person.query.filter_by(id=person_id, is_active=True).first()
+        if isinstance(person_id, str) and person_id.isdigit():
+            person_id = int(person_id)
+        options = cls.get_load_options(Person, plan)
+        person = Loader.get(Person).load(person_id, options=options, plan=plan)
         if not person:
             raise PersonNotFoundException()
         logger.debug("Person found: '%s'.", person)
         return person
 
+    @staticmethod
+    def get_version(person_id: int=None) -> int:
+        """
+        Load the version of an active person, by primary key,
+        without loading the person. Returns None if not found.
+        @raises: PersonIDException.
+        """
+        if isinstance(person_id, bool) or not isinstance(person_id, int):
+            raise PersonIDException()
+        query = db.session.query(Person.version)
+        return query.filter(Person.id == person_id, Person.is_active.is_(True)).scalar()
+
+    @staticmethod
+    def prime(*person_ids) -> None:
+        """
+        Queues people ids, to be loaded together with
+        the next lookup in the request.
+        """
+        Loader.get(Person).prime(*person_ids)
+
+    @classmethod
+    def get_many(cls, person_ids: list=None, plan: dict=None) -> tuple:
+        """
+        Load many people by person ids, in the requested order.
+        Relationships in the load plan are loaded eagerly, so the
+        number of queries does not depend on the number of ids.
+        Lookups are cached until the end of the request.
+        Returns the people found and the ids not found.
+        @raises: PersonIDException.
+        """
+        logger.debug("Loading people by IDs '%s'.", person_ids)
+        if not person_ids or not isinstance(person_ids, (list, tuple)):
+            raise PersonIDException()
+        if len(person_ids) > cls.MAX_IDS:
+            raise PersonIDException(person_ids)
+        for person_id in person_ids:
+            if isinstance(person_id, bool) or not isinstance(person_id, int):
+                raise PersonIDException(person_id)
+        person_ids = list(collections.OrderedDict.fromkeys(person_ids))
+        options = cls.get_load_options(Person, plan)
+        found = Loader.get(Person).load_many(person_ids, options=options, plan=plan)
+        people = [found[person_id] for person_id in person_ids if person_id in found]
+        missing = [person_id for person_id in person_ids if person_id not in found]
+        logger.debug("People found: %s, missing: %s.", len(people), missing)
+        return people, missing
+
     @staticmethod
     def get_aliases_by_person_id(person_id: int=None) -> typing.Generator:
         """
@@ -160,7 +257,9 @@ class PeopleController(Controller):
         for alias in aliases:
             new_alias = cls.add_alias_to_person_by_id(person_id=person.id,
                                                       alias=alias)
+        Bus.publish(db.session, (cls.ENTITY, person.id))
         db.session.commit()
+        cls.notify((cls.ENTITY, person.id))
         logger.debug("Person created: '%s'.", person)
         return person
 
@@ -227,7 +326,10 @@ class PeopleController(Controller):
             for alias in aliases:
                 new_alias = cls.add_alias_to_person_by_id(person_id=person.id,
                                                           alias=alias)
+        cls.touch(db.session, people=[person.id])
+        Bus.publish(db.session, (cls.ENTITY, person.id))
         db.session.commit()
+        cls.notify((cls.ENTITY, person.id))
         logger.debug("Person updated: '%s'.", person)
         return person
 
@@ -241,21 +343,131 @@ class PeopleController(Controller):
         logger.debug("Person deactivated: '%s'.", person_id)
         return person
 
-    @staticmethod
-    def search(page: int=0, limit: int=50) -> typing.Generator:
+    @classmethod
+    def get_filters(cls,
+                    active: bool=None,
+                    last_name: str=None,
+                    role: str=None) -> dict:
+        """
+        Validates the search filters:
+        - active: only active people, or only inactive people.
+        - last_name: people with last names starting with this prefix.
+        - role: people with at least one movie in this role.
+        Returns the filters in use.
+        @raises: FilterException.
+        """
+        try:
+            filters = {
+                "active": cls.parse_bool(active),
+                "last_name": last_name or None,
+                "role": role or None,
+            }
+        except ValueError:
+            raise FilterException(active)
+        if filters["last_name"] is not None and not isinstance(last_name, str):
+            raise FilterException(last_name)
+        if filters["role"] is not None and role not in cls.ROLES:
+            raise FilterException(role)
+        return {
+            name: value
+            for name, value in filters.items()
+            if value is not None
+        }
+
+    @classmethod
+    def filter(cls,
+               active: bool=None,
+               last_name: str=None,
+               role: str=None) -> object:
+        """
+        Builds the query of the people matching the validated filters.
+        Every filter can be resolved with an index.
+        """
+        query = Person.query
+        if active is not None:
+            query = query.filter(Person.is_active == active)
+        if last_name is not None:
+            query = query.filter(cls.startswith(Person.last_name, last_name))
+        if role is not None:
+            table = cls.ROLES[role]
+            query = query.filter(exists().where(table.person_id == Person.id))
+        return query
+
+    @classmethod
+    def search(cls,
+               page: int=0,
+               limit: int=50,
+               plan: dict=None,
+               cursor: str=None,
+               sort: str=None,
+               yield_per: int=None,
+               **filters) -> typing.Generator:
         """
         Listing & paginatin people.
-        @raises: PageException, LimitException.
+        Relationships in the load plan are loaded eagerly.
+        People are sorted by any of the SORTS, such as "-last_name",
+        and then by ID, so the order is stable.
+        If a cursor is provided, the page is loaded with a seek
+        query on the sort columns, instead of OFFSET.
+        Rows are never counted here, see count().
+        If yield_per is provided, rows are streamed from a server-side
+        cursor in batches of that size, and pages can be much larger.
+        @raises: PageException, LimitException, CursorException,
+                 SortException, FilterException.
         """
         logger.debug("Listing People page %s limit %s.", page, limit)
         if not isinstance(page, int) or page < 0:
             raise PageException()
-        if not isinstance(limit, int) or limit < 1 or limit > 200:
+        max_limit = cls.MAX_STREAM_LIMIT if yield_per else cls.MAX_LIMIT
+        if not isinstance(limit, int) or limit < 1 or limit > max_limit:
             raise LimitException()
-        query = Person.query.paginate(page=page, max_per_page=limit)
+        try:
+            columns, descending = cls.get_order(cls.SORTS, sort)
+        except ValueError:
+            raise SortException(sort)
+        try:
+            keyset = cls.get_keyset(columns, cls.decode_cursor(cursor))
+        except ValueError:
+            raise CursorException(cursor)
+        query = cls.filter(**cls.get_filters(**filters))
+        query = query.options(*cls.get_load_options(Person, plan))
+        query = cls.order(query, columns, descending)
+        if cursor is None:
+            query = query.offset(max(page - 1, 0) * limit)
+        else:
+            query = cls.seek(query, columns, keyset, descending)
+        query = query.limit(limit)
+        items = query.yield_per(yield_per) if yield_per else query.all()
         yield from (
             person
-            for person in query.items
+            for person in items
         )
-        logger.debug("Listed People page %s limit %s. Total %s.",
-                     page, limit, query.total)
+        logger.debug("Listed People page %s limit %s.", page, limit)
+
+    @classmethod
+    def get_cursor(cls, person: Person=None, sort: str=None) -> str:
+        """
+        Returns the cursor of the page after this Person.
+        @raises: SortException.
+        """
+        try:
+            columns, _ = cls.get_order(cls.SORTS, sort)
+        except ValueError:
+            raise SortException(sort)
+        return cls.get_keyset_cursor(columns, person)
+
+    @classmethod
+    def count(cls, count: str=None, **filters) -> int:
+        """
+        Counting people, exactly, approximately or not at all.
+        @raises: CountException, FilterException.
+        """
+        logger.debug("Counting People: %s.", count)
+        if count is not None and count not in cls.COUNTS:
+            raise CountException(count)
+        filters = cls.get_filters(**filters)
+        if count is None or count == cls.NONE:
+            return None
+        total = cls.count_query(cls.filter(**filters), Person, count, filters)
+        logger.debug("Counted People: %s.", total)
+        return total
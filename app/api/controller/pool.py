@@ -0,0 +1,125 @@
+"""
+Instrumented Connection Pool.
+
+Pools are sized per worker, since every uWSGI worker has its
+own pool. The pool counts its checkouts, how long they wait
+for a connection, how far it overflows its size, how many
+connections it invalidates, and how old they are, so that
+the size of the pools can be chosen from the metrics.
+"""
+
+import time
+import typing
+import logging
+import threading
+import collections
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class MonitoredPool(QueuePool):
+    """
+    Queue pool with counters.
+    Safe to use from many threads.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Monitored pool initializer.
+        Takes the arguments of QueuePool.
+        """
+        super().__init__(*args, **kwargs)
+        self.__lock = threading.Lock()
+        self.__counters = collections.Counter()
+        self.__wait = 0.0
+        self.__max_wait = 0.0
+        self.__age = 0.0
+        self.__max_age = 0.0
+        self.__peak_overflow = 0
+        event.listen(self, "connect", self.__connect)
+        event.listen(self, "checkout", self.__checkout)
+        event.listen(self, "invalidate", self.__invalidate)
+        event.listen(self, "soft_invalidate", self.__invalidate)
+
+    def connect(self) -> object:
+        """
+        Checks out a connection.
+        """
+        return self.__measure(super().connect)
+
+    def unique_connection(self) -> object:
+        """
+        Checks out a connection that is not shared by the thread.
+        """
+        return self.__measure(super().unique_connection)
+
+    def __measure(self, checkout: typing.Callable) -> object:
+        """
+        Checks out a connection, measuring how long it takes,
+        including waiting for a connection to be returned,
+        opening a new one, and pinging it.
+        """
+        start = time.monotonic()
+        try:
+            return checkout()
+        except exc.TimeoutError:
+            with self.__lock:
+                self.__counters["timeouts"] += 1
+            raise
+        finally:
+            wait = time.monotonic() - start
+            with self.__lock:
+                self.__wait += wait
+                self.__max_wait = max(self.__max_wait, wait)
+
+    def __connect(self, connection: object, record: object) -> None:
+        """
+        Records when a connection was opened.
+        """
+        record.info["connected_at"] = time.monotonic()
+        with self.__lock:
+            self.__counters["connects"] += 1
+
+    def __checkout(self, connection: object, record: object, proxy: object) -> None:
+        """
+        Counts a checkout, and the age of its connection.
+        """
+        age = time.monotonic() - record.info.get("connected_at", time.monotonic())
+        with self.__lock:
+            self.__counters["checkouts"] += 1
+            self.__age += age
+            self.__max_age = max(self.__max_age, age)
+            self.__peak_overflow = max(self.__peak_overflow, self.overflow())
+
+    def __invalidate(self, connection: object, record: object, exception: object) -> None:
+        """
+        Counts an invalidated connection, such as one that
+        failed a ping, or was disconnected by the server.
+        """
+        with self.__lock:
+            self.__counters["invalidations"] += 1
+
+    def get_stats(self) -> dict:
+        """
+        Returns the pool counters. Times are in seconds.
+        """
+        with self.__lock:
+            checkouts = self.__counters["checkouts"]
+            return {
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "overflow": max(self.overflow(), 0),
+                "peak_overflow": self.__peak_overflow,
+                "checkouts": checkouts,
+                "connects": self.__counters["connects"],
+                "invalidations": self.__counters["invalidations"],
+                "timeouts": self.__counters["timeouts"],
+                "wait": round(self.__wait, 6),
+                "max_wait": round(self.__max_wait, 6),
+                "mean_age": round(self.__age / checkouts, 6) if checkouts else 0.0,
+                "max_age": round(self.__max_age, 6),
+            }
@@ -4,12 +4,16 @@ Actors Controller.
 
 import logging
 
+from sqlalchemy import or_, func, select
 from sqlalchemy.exc import IntegrityError
 
 from .models.role import Actor, Director, Producer
+from .models.movie import Movie
+from .models.person import Person
 from .models import db
 
 from . import Controller
+from .bus import Bus
 
 from . import people, movies
 
@@ -21,6 +25,76 @@ class RolesController(Controller):
     Roles controller business layer.
     """
 
+    # Role count columns of the movie and the person of every role.
+    COUNTERS = {
+        Actor: (Movie.actors_count, Person.movies_as_actor_count),
+        Director: (Movie.directors_count, Person.movies_as_director_count),
+        Producer: (Movie.producers_count, Person.movies_as_producer_count),
+    }
+
+    # Number of people and movies repaired per transaction.
+    REPAIR_BATCH = 500
+
+    @classmethod
+    def count(cls, session: object, role: type, person_id: int, movie_id: int, delta: int) -> None:
+        """
+        Adds a delta to the role counts of a movie and a person,
+        in the session transaction. Counts are incremented in
+        the database, so concurrent changes are never lost.
+        """
+        movie_count, person_count = cls.COUNTERS[role]
+        session.execute(Movie.__table__.update()
+                        .where(Movie.id == movie_id)
+                        .values({movie_count.key: movie_count + delta}))
+        session.execute(Person.__table__.update()
+                        .where(Person.id == person_id)
+                        .values({person_count.key: person_count + delta}))
+
+    @classmethod
+    def repair_counts(cls) -> tuple:
+        """
+        Counts the roles of every person and movie again, and
+        fixes the counts that differ, in batches. Documents
+        including them are updated as after any other write.
+        Returns the number of people and movies repaired.
+        """
+        logger.debug("Repairing role counts.")
+        person_counts, movie_counts = {}, {}
+        for role, (movie_count, person_count) in cls.COUNTERS.items():
+            person_counts[person_count.key] = select([func.count()]) \
+                .where(role.person_id == Person.id).as_scalar()
+            movie_counts[movie_count.key] = select([func.count()]) \
+                .where(role.movie_id == Movie.id).as_scalar()
+        repaired = (
+            cls.__repair(Person, person_counts, people.PeopleController.ENTITY, "people"),
+            cls.__repair(Movie, movie_counts, movies.MoviesController.ENTITY, "movies"),
+        )
+        logger.debug("Role counts repaired: %s.", repaired)
+        return repaired
+
+    @classmethod
+    def __repair(cls, model: object, counts: dict, entity: str, name: str) -> int:
+        """
+        Sets the counts of the rows of a model whose counts
+        differ. Returns the number of rows repaired.
+        """
+        query = db.session.query(model.id).filter(or_(*[
+            getattr(model, key) != count
+            for key, count in counts.items()
+        ]))
+        ids = [row_id for row_id, in query.order_by(model.id)]
+        for start in range(0, len(ids), cls.REPAIR_BATCH):
+            batch = ids[start:start + cls.REPAIR_BATCH]
+            entities = [(entity, row_id) for row_id in batch]
+            db.session.execute(model.__table__.update()
+                               .where(model.id.in_(batch))
+                               .values(counts))
+            cls.touch(db.session, **{name: batch})
+            Bus.publish(db.session, *entities)
+            db.session.commit()
+            cls.notify(*entities)
+        return len(ids)
+
     @staticmethod
     def add_actor(person_id: int, movie_id: int) -> tuple:
         """
@@ -34,9 +108,16 @@ class RolesController(Controller):
         role = Actor(movie_id=movie.id, person_id=person.id)
         try:
             db.session.add(role)
+            RolesController.count(db.session, Actor, person.id, movie.id, 1)
+            RolesController.touch(db.session, roles=[(person.id, movie.id)])
+            Bus.publish(db.session,
+                        (people.PeopleController.ENTITY, person.id),
+                        (movies.MoviesController.ENTITY, movie.id))
             db.session.commit()
         except IntegrityError:
-            pass
+            db.session.rollback()
+        RolesController.notify((people.PeopleController.ENTITY, person.id),
+                               (movies.MoviesController.ENTITY, movie.id))
         logger.debug("Added '%s' to '%s' as Actor!", person_id, movie_id)
         return person, movie
 
@@ -53,9 +134,16 @@ class RolesController(Controller):
         role = Director(movie_id=movie.id, person_id=person.id)
         try:
             db.session.add(role)
+            RolesController.count(db.session, Director, person.id, movie.id, 1)
+            RolesController.touch(db.session, roles=[(person.id, movie.id)])
+            Bus.publish(db.session,
+                        (people.PeopleController.ENTITY, person.id),
+                        (movies.MoviesController.ENTITY, movie.id))
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
+        RolesController.notify((people.PeopleController.ENTITY, person.id),
+                               (movies.MoviesController.ENTITY, movie.id))
         logger.debug("Added '%s' to '%s' as Director!", person_id, movie_id)
         return person, movie
 
@@ -72,9 +160,16 @@ class RolesController(Controller):
         role = Producer(movie_id=movie.id, person_id=person.id)
         try:
             db.session.add(role)
+            RolesController.count(db.session, Producer, person.id, movie.id, 1)
+            RolesController.touch(db.session, roles=[(person.id, movie.id)])
+            Bus.publish(db.session,
+                        (people.PeopleController.ENTITY, person.id),
+                        (movies.MoviesController.ENTITY, movie.id))
             db.session.commit()
         except IntegrityError:
             db.session.rollback()
+        RolesController.notify((people.PeopleController.ENTITY, person.id),
+                               (movies.MoviesController.ENTITY, movie.id))
         logger.debug("Added '%s' to '%s' as Producer!", person_id, movie_id)
         return person, movie
 
@@ -88,10 +183,15 @@ class RolesController(Controller):
         logger.debug("Deleting '%s' from '%s' as Producer.", person_id, movie_id)
         movie = movies.MoviesController.get_by_id(movie_id=movie_id)
         person = people.PeopleController.get_by_id(person_id=person_id)
-        role = Producer.query.filter_by(movie_id=movie.id, person_id=person.id).first()
-        if role:
-            db.session.delete(role)
+        if Producer.query.filter_by(movie_id=movie.id, person_id=person.id).delete():
+            RolesController.count(db.session, Producer, person.id, movie.id, -1)
+            RolesController.touch(db.session, roles=[(person.id, movie.id)])
+            Bus.publish(db.session,
+                        (people.PeopleController.ENTITY, person.id),
+                        (movies.MoviesController.ENTITY, movie.id))
             db.session.commit()
+        RolesController.notify((people.PeopleController.ENTITY, person.id),
+                               (movies.MoviesController.ENTITY, movie.id))
         logger.debug("Deleted '%s' from '%s' as Producer!", person_id, movie_id)
         return person, movie
 
@@ -105,10 +205,15 @@ class RolesController(Controller):
         logger.debug("Deleting '%s' from '%s' as Director.", person_id, movie_id)
         movie = movies.MoviesController.get_by_id(movie_id=movie_id)
         person = people.PeopleController.get_by_id(person_id=person_id)
-        role = Director.query.filter_by(movie_id=movie.id, person_id=person.id).first()
-        if role:
-            db.session.delete(role)
+        if Director.query.filter_by(movie_id=movie.id, person_id=person.id).delete():
+            RolesController.count(db.session, Director, person.id, movie.id, -1)
+            RolesController.touch(db.session, roles=[(person.id, movie.id)])
+            Bus.publish(db.session,
+                        (people.PeopleController.ENTITY, person.id),
+                        (movies.MoviesController.ENTITY, movie.id))
             db.session.commit()
+        RolesController.notify((people.PeopleController.ENTITY, person.id),
+                               (movies.MoviesController.ENTITY, movie.id))
         logger.debug("Deleted '%s' from '%s' as Director!", person_id, movie_id)
         return person, movie
 
@@ -122,9 +227,14 @@ class RolesController(Controller):
         logger.debug("Deleting '%s' from '%s' as Actor.", person_id, movie_id)
         movie = movies.MoviesController.get_by_id(movie_id=movie_id)
         person = people.PeopleController.get_by_id(person_id=person_id)
-        role = Actor.query.filter_by(movie_id=movie.id, person_id=person.id).first()
-        if role:
-            db.session.delete(role)
+        if Actor.query.filter_by(movie_id=movie.id, person_id=person.id).delete():
+            RolesController.count(db.session, Actor, person.id, movie.id, -1)
+            RolesController.touch(db.session, roles=[(person.id, movie.id)])
+            Bus.publish(db.session,
+                        (people.PeopleController.ENTITY, person.id),
+                        (movies.MoviesController.ENTITY, movie.id))
             db.session.commit()
+        RolesController.notify((people.PeopleController.ENTITY, person.id),
+                               (movies.MoviesController.ENTITY, movie.id))
         logger.debug("Deleted '%s' from '%s' as Actor!", person_id, movie_id)
         return person, movie
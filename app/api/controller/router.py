@@ -0,0 +1,104 @@
+"""
+Read Replica Router.
+
+GET requests read from a replica of the database, chosen
+once per request, while writes, and every statement of the
+other requests, go to the primary.
+
+Replicas lag behind the primary, so clients that just wrote
+read from the primary until the replicas have caught up, for
+a window of seconds, through a cookie. Responses read from a
+replica within the window after a write are not cached, since
+they may not include the write.
+"""
+
+import math
+import time
+import random
+import logging
+
+from flask import Response, g, request, has_request_context, has_app_context
+
+logger = logging.getLogger(__name__)
+
+
+class Router(object):
+    """
+    Routes the reads of GET requests to the replicas.
+    """
+
+    # Binds of the replicas, as in SQLALCHEMY_BINDS, or
+    # empty if every statement is sent to the primary.
+    REPLICAS = ()
+
+    # Number of seconds clients read from the primary after
+    # they write, longer than the lag of the replicas.
+    WINDOW = 5
+    COOKIE = "maria_primary_until"
+
+    # Time of the last write seen by this process, in any process.
+    __written = float("-inf")
+
+    @classmethod
+    def read(cls) -> None:
+        """
+        Routes the reads of the current request to a replica,
+        unless the client wrote within the window.
+        """
+        if not has_request_context():
+            return
+        if not cls.REPLICAS or cls.is_sticky():
+            g.replica = None
+            return
+        g.replica = random.choice(cls.REPLICAS)
+        logger.debug("Reading from replica: %s.", g.replica)
+
+    @staticmethod
+    def get_replica() -> str:
+        """
+        Returns the replica of the current request,
+        or None if it reads from the primary.
+        """
+        return g.get("replica") if has_app_context() else None
+
+    @classmethod
+    def is_sticky(cls) -> bool:
+        """
+        Returns True if the client of the current request
+        wrote within the window.
+        """
+        try:
+            until = float(request.cookies.get(cls.COOKIE, 0))
+        except ValueError:
+            return False
+        return until > time.time()
+
+    @classmethod
+    def stick(cls, response: object) -> None:
+        """
+        Sends the reads of the client of a successful write
+        to the primary for the window.
+        """
+        if not cls.REPLICAS or not isinstance(response, Response) \
+                or response.status_code >= 400:
+            return
+        response.set_cookie(cls.COOKIE,
+                            str(time.time() + cls.WINDOW),
+                            max_age=math.ceil(cls.WINDOW),
+                            httponly=True)
+
+    @classmethod
+    def written(cls, *entities) -> None:
+        """
+        Records the time of a write.
+        Listener of the controllers, called after every write.
+        """
+        cls.__written = time.time()
+
+    @classmethod
+    def is_lagging(cls) -> bool:
+        """
+        Returns True if the current request reads from a replica
+        that may not have the writes of the last window yet.
+        """
+        return cls.get_replica() is not None and time.time() - cls.__written < cls.WINDOW
@@ -204,6 +204,62 @@ class MovieNotFoundException(FormException):
     MESSAGE = "Movie does not exist."
 
 
+class FieldsFormException(FormException):
+    """
+    Raised when requested fields are not valid.
+    """
+    SUBCODE = 4012
+    MESSAGE = "Invalid fields."
+
+
+class ExpandFormException(FormException):
+    """
+    Raised when requested expansions are not valid.
+    """
+    SUBCODE = 4013
+    MESSAGE = "Invalid expansion."
+
+
+class CursorFormException(FormException):
+    """
+    Raised when page cursor is not valid.
+    """
+    SUBCODE = 4014
+    MESSAGE = "Invalid cursor."
+
+
+class CountFormException(FormException):
+    """
+    Raised when count mode is not valid.
+    """
+    SUBCODE = 4015
+    MESSAGE = "Invalid count."
+
+
+class SortFormException(FormException):
+    """
+    Raised when sort key is not valid.
+    """
+    SUBCODE = 4016
+    MESSAGE = "Invalid sort."
+
+
+class FilterFormException(FormException):
+    """
+    Raised when search filters are not valid.
+    """
+    SUBCODE = 4017
+    MESSAGE = "Invalid filters."
+
+
+class IdsFormException(FormException):
+    """
+    Raised when the list of IDs is not valid.
+    """
+    SUBCODE = 4018
+    MESSAGE = "Invalid IDs."
+
+
 class AliasTakenException(FormException):
     """
     Raised if person alias is already taken.
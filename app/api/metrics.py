@@ -0,0 +1,33 @@
+"""
+Metrics Views.
+"""
+
+import logging
+
+from . import constants, API
+from .serializers import Serializer
+from .controller import Controller
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsAPI(API):
+    """
+    Metrics views.
+    """
+
+    def _get(self) -> dict:
+        """
+        Get metrics view.
+        Error handling is performed by the parent class method.
+        """
+        logger.debug("Metrics")
+        return {
+            constants.Metrics.CACHE: {
+                constants.Metrics.DOCUMENTS: Serializer.CACHE.get_stats(),
+                constants.Metrics.RESPONSES: API.RESPONSES.get_stats(),
+                constants.Metrics.FLIGHTS: API.FLIGHTS.get_stats(),
+            },
+            constants.Metrics.POOLS: Controller.get_pool_stats(),
+            constants.Metrics.ACCESS: API.ACCESS_LOG.get_stats() if API.ACCESS_LOG else None,
+        }
@@ -8,7 +8,8 @@ from flask_login import login_required
 from flask import request
 
 from . import constants, errors, API
-from .controller import movies
+from .stream import Stream
+from .controller import movies, people
 from .serializers import MovieSerializer
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,9 @@ class MoviesAPI(API):
     Movies API.
     """
 
+    DEPENDENCIES = (movies.MoviesController.ENTITY, people.PeopleController.ENTITY)
+    SURROGATE_KEY = constants.Surrogate.MOVIES
+
     @login_required
     def _post(self) -> dict:
         """
@@ -45,32 +49,182 @@ class MoviesAPI(API):
     def _get(self) -> dict:
         """
         Searching for Movies.
+        If ?ids= is provided, getting Movies by ID instead.
         Error handling is performed by the parent class method.
-        @raises: LimitFormException, PageFormException.
+        @raises: LimitFormException, PageFormException,
+                 FieldsFormException, ExpandFormException,
+                 CursorFormException, CountFormException,
+                 SortFormException, FilterFormException.
         """
+        if constants.Batch.IDS in request.args:
+            return self._get_many()
         logger.debug("Searching for Movies.")
         page = int(request.args.get(constants.Pagination.PAGE, 1))
         limit = int(request.args.get(constants.Pagination.LIMIT, 30))
+        fields = MovieSerializer.get_fields(request.args)
+        expand = MovieSerializer.get_expand(request.args)
+        plan = MovieSerializer.get_plan(expand, fields)
+        cursor = request.args.get(constants.Pagination.CURSOR)
+        count = request.args.get(constants.Pagination.COUNT)
+        sort = request.args.get(constants.Filter.SORT)
+        filters = {
+            "active": request.args.get(constants.Filter.ACTIVE),
+            "title": request.args.get(constants.Filter.TITLE),
+            "year_from": request.args.get(constants.Filter.YEAR_FROM),
+            "year_to": request.args.get(constants.Filter.YEAR_TO),
+            "role": request.args.get(constants.Filter.ROLE),
+        }
         try:
-            results = movies.MoviesController.search(page=page, limit=limit)
+            if request.args.get(constants.Format.FORMAT) in constants.Format.STREAMS:
+                return self._stream(page=page,
+                                    limit=limit,
+                                    plan=plan,
+                                    cursor=cursor,
+                                    sort=sort,
+                                    count=count,
+                                    expand=expand,
+                                    fields=fields,
+                                    filters=filters)
+            results = list(movies.MoviesController.search(page=page,
+                                                          limit=limit,
+                                                          plan=plan,
+                                                          cursor=cursor,
+                                                          sort=sort,
+                                                          **filters))
             logger.debug("Movies listed!")
-            return {
-                constants.Movie.PLURAL: [
-                    MovieSerializer.serialize(movie)
-                    for movie in results
-                ]
-            }
+            total = movies.MoviesController.count(count=count, **filters)
+            if request.args.get(constants.Format.FORMAT) == constants.Format.NORMALIZED:
+                documents, included = MovieSerializer.normalize_many(*results,
+                                                                     expand=expand,
+                                                                     fields=fields)
+                response = {
+                    constants.Movie.PLURAL: documents,
+                    constants.Format.INCLUDED: included,
+                }
+            else:
+                response = {
+                    constants.Movie.PLURAL: [
+                        MovieSerializer.serialize(movie, expand=expand, fields=fields)
+                        for movie in results
+                    ]
+                }
+            if total is not None:
+                response[constants.Pagination.TOTAL] = total
+            if cursor is not None:
+                is_last = len(results) < limit
+                response[constants.Pagination.NEXT_CURSOR] = None if is_last \
+                    else movies.MoviesController.get_cursor(results[-1], sort=sort)
+            return response
+        except movies.CursorException:
+            raise errors.CursorFormException()
+        except movies.CountException:
+            raise errors.CountFormException()
+        except movies.SortException:
+            raise errors.SortFormException()
+        except movies.FilterException:
+            raise errors.FilterFormException()
         except movies.PageException:
             raise errors.PageFormException()
         except movies.LimitException:
             raise errors.LimitFormException()
 
+    def _stream(self,
+                page: int,
+                limit: int,
+                plan: dict,
+                cursor: str,
+                sort: str,
+                count: str,
+                expand: dict,
+                fields: dict,
+                filters: dict) -> Stream:
+        """
+        Streaming Movies, as JSON or NDJSON.
+        Movies are read from a server-side cursor and
+        serialized one by one, in constant memory.
+        Exceptions are handled by _get().
+        """
+        logger.debug("Streaming Movies.")
+        results = movies.MoviesController.search(page=page,
+                                                 limit=limit,
+                                                 plan=plan,
+                                                 cursor=cursor,
+                                                 sort=sort,
+                                                 yield_per=self.YIELD_PER,
+                                                 **filters)
+        total = movies.MoviesController.count(count=count, **filters)
+
+        def serialize(movie: object) -> dict:
+            return MovieSerializer.serialize(movie, expand=expand, fields=fields)
+
+        def trailer(last: object, size: int) -> dict:
+            response = {}
+            if total is not None:
+                response[constants.Pagination.TOTAL] = total
+            if cursor is not None:
+                response[constants.Pagination.NEXT_CURSOR] = None if size < limit \
+                    else movies.MoviesController.get_cursor(last, sort=sort)
+            return response
+
+        return Stream(constants.Movie.PLURAL,
+                      results,
+                      serialize,
+                      ndjson=request.args.get(constants.Format.FORMAT) == constants.Format.NDJSON,
+                      trailer=trailer)
+
+    def _get_many(self) -> dict:
+        """
+        Getting many Movies by ID, such as ?ids=1,2,3
+        Movies are returned in the requested order,
+        and the IDs not found are returned as missing.
+        Error handling is performed by the parent class method.
+        @raises: IdsFormException, FieldsFormException,
+                 ExpandFormException.
+        """
+        logger.debug("Getting many Movies.")
+        fields = MovieSerializer.get_fields(request.args)
+        expand = MovieSerializer.get_expand(request.args)
+        plan = MovieSerializer.get_plan(expand, fields)
+        try:
+            movie_ids = [
+                int(movie_id)
+                for movie_id in request.args.get(constants.Batch.IDS).split(",")
+            ]
+        except ValueError:
+            raise errors.IdsFormException()
+        try:
+            results, missing = movies.MoviesController.get_many(movie_ids=movie_ids,
+                                                                plan=plan)
+            logger.debug("Movies loaded!")
+            if request.args.get(constants.Format.FORMAT) == constants.Format.NORMALIZED:
+                documents, included = MovieSerializer.normalize_many(*results,
+                                                                     expand=expand,
+                                                                     fields=fields)
+                response = {
+                    constants.Movie.PLURAL: documents,
+                    constants.Format.INCLUDED: included,
+                }
+            else:
+                response = {
+                    constants.Movie.PLURAL: [
+                        MovieSerializer.serialize(movie, expand=expand, fields=fields)
+                        for movie in results
+                    ]
+                }
+            response[constants.Batch.MISSING] = missing
+            return response
+        except movies.MovieIDException:
+            raise errors.IdsFormException()
+
 
 class MovieAPI(API):
     """
     Movie API.
     """
 
+    DEPENDENCIES = (movies.MoviesController.ENTITY, people.PeopleController.ENTITY)
+    ENTITY = movies.MoviesController.ENTITY
+
     @login_required
     def _put(self, movie_id: int) -> dict:
         """
@@ -105,14 +259,57 @@ class MovieAPI(API):
         """
         Getting Movie.
         Error handling is performed by the parent class method.
-        @raises: MovieNotFoundException.
+        @raises: MovieNotFoundException, FieldsFormException,
+                 ExpandFormException.
         """
         logger.debug("Getting Movie.")
+        fields = MovieSerializer.get_fields(request.args)
+        expand = MovieSerializer.get_expand(request.args)
+        plan = MovieSerializer.get_plan(expand, fields)
+        normalized = request.args.get(constants.Format.FORMAT) == constants.Format.NORMALIZED
         try:
-            movie = movies.MoviesController.get_by_id(movie_id=movie_id)
+            version = movies.MoviesController.get_version(movie_id)
+            if version is not None and MovieSerializer.is_versioned(expand):
+                etag = MovieSerializer.get_etag(movie_id,
+                                                version,
+                                                expand=expand,
+                                                fields=fields,
+                                                normalized=normalized)
+                if self.is_not_modified(etag):
+                    logger.debug("Movie not modified!")
+                    return None
+            if version is not None and not normalized:
+                document = MovieSerializer.get_cached(movie_id,
+                                                      version,
+                                                      expand=expand,
+                                                      fields=fields)
+                if document is not None:
+                    logger.debug("Movie cached!")
+                    return {
+                        constants.Movie.SINGULAR: document,
+                    }
+                if expand is None and not fields:
+                    document = MovieSerializer.get_materialized(movie_id, version)
+                    if document is not None:
+                        logger.debug("Movie materialized!")
+                        return {
+                            constants.Movie.SINGULAR: document,
+                        }
+            movie = movies.MoviesController.get_by_id(movie_id=movie_id,
+                                                      plan=plan)
             logger.debug("Movie loaded!")
+            if normalized:
+                documents, included = MovieSerializer.normalize_many(movie,
+                                                                     expand=expand,
+                                                                     fields=fields)
+                return {
+                    constants.Movie.SINGULAR: documents[0],
+                    constants.Format.INCLUDED: included,
+                }
             return {
-                constants.Movie.SINGULAR: MovieSerializer.serialize(movie),
+                constants.Movie.SINGULAR: MovieSerializer.serialize(movie,
+                                                                    expand=expand,
+                                                                    fields=fields),
             }
         except movies.MovieIDException:
             raise errors.MovieNotFoundException()
@@ -8,7 +8,8 @@ from flask_login import login_required
 from flask import request
 
 from . import constants, errors, API
-from .controller import people
+from .stream import Stream
+from .controller import movies, people
 from .serializers import PersonSerializer
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,9 @@ class PeopleAPI(API):
     People API.
     """
 
+    DEPENDENCIES = (movies.MoviesController.ENTITY, people.PeopleController.ENTITY)
+    SURROGATE_KEY = constants.Surrogate.PEOPLE
+
     @login_required
     def _post(self) -> dict:
         """
@@ -52,32 +56,180 @@ class PeopleAPI(API):
     def _get(self) -> dict:
         """
         Searching for People.
+        If ?ids= is provided, getting People by ID instead.
         Error handling is performed by the parent class method.
-        @raises: LimitFormException, PageFormException.
+        @raises: LimitFormException, PageFormException,
+                 FieldsFormException, ExpandFormException,
+                 CursorFormException, CountFormException,
+                 SortFormException, FilterFormException.
         """
+        if constants.Batch.IDS in request.args:
+            return self._get_many()
         logger.debug("Searching for People.")
         page = int(request.args.get(constants.Pagination.PAGE, 1))
         limit = int(request.args.get(constants.Pagination.LIMIT, 30))
+        fields = PersonSerializer.get_fields(request.args)
+        expand = PersonSerializer.get_expand(request.args)
+        plan = PersonSerializer.get_plan(expand, fields)
+        cursor = request.args.get(constants.Pagination.CURSOR)
+        count = request.args.get(constants.Pagination.COUNT)
+        sort = request.args.get(constants.Filter.SORT)
+        filters = {
+            "active": request.args.get(constants.Filter.ACTIVE),
+            "last_name": request.args.get(constants.Filter.LAST_NAME),
+            "role": request.args.get(constants.Filter.ROLE),
+        }
         try:
-            results = people.PeopleController.search(page=page, limit=limit)
+            if request.args.get(constants.Format.FORMAT) in constants.Format.STREAMS:
+                return self._stream(page=page,
+                                    limit=limit,
+                                    plan=plan,
+                                    cursor=cursor,
+                                    sort=sort,
+                                    count=count,
+                                    expand=expand,
+                                    fields=fields,
+                                    filters=filters)
+            results = list(people.PeopleController.search(page=page,
+                                                          limit=limit,
+                                                          plan=plan,
+                                                          cursor=cursor,
+                                                          sort=sort,
+                                                          **filters))
             logger.debug("People listed!")
-            return {
-                constants.Person.PLURAL: [
-                    PersonSerializer.serialize(person)
-                    for person in results
-                ]
-            }
+            total = people.PeopleController.count(count=count, **filters)
+            if request.args.get(constants.Format.FORMAT) == constants.Format.NORMALIZED:
+                documents, included = PersonSerializer.normalize_many(*results,
+                                                                      expand=expand,
+                                                                      fields=fields)
+                response = {
+                    constants.Person.PLURAL: documents,
+                    constants.Format.INCLUDED: included,
+                }
+            else:
+                response = {
+                    constants.Person.PLURAL: [
+                        PersonSerializer.serialize(person, expand=expand, fields=fields)
+                        for person in results
+                    ]
+                }
+            if total is not None:
+                response[constants.Pagination.TOTAL] = total
+            if cursor is not None:
+                is_last = len(results) < limit
+                response[constants.Pagination.NEXT_CURSOR] = None if is_last \
+                    else people.PeopleController.get_cursor(results[-1], sort=sort)
+            return response
+        except people.CursorException:
+            raise errors.CursorFormException()
+        except people.CountException:
+            raise errors.CountFormException()
+        except people.SortException:
+            raise errors.SortFormException()
+        except people.FilterException:
+            raise errors.FilterFormException()
         except people.PageException:
             raise errors.PageFormException()
         except people.LimitException:
             raise errors.LimitFormException()
 
+    def _stream(self,
+                page: int,
+                limit: int,
+                plan: dict,
+                cursor: str,
+                sort: str,
+                count: str,
+                expand: dict,
+                fields: dict,
+                filters: dict) -> Stream:
+        """
+        Streaming People, as JSON or NDJSON.
+        People are read from a server-side cursor and
+        serialized one by one, in constant memory.
+        Exceptions are handled by _get().
+        """
+        logger.debug("Streaming People.")
+        results = people.PeopleController.search(page=page,
+                                                 limit=limit,
+                                                 plan=plan,
+                                                 cursor=cursor,
+                                                 sort=sort,
+                                                 yield_per=self.YIELD_PER,
+                                                 **filters)
+        total = people.PeopleController.count(count=count, **filters)
+
+        def serialize(person: object) -> dict:
+            return PersonSerializer.serialize(person, expand=expand, fields=fields)
+
+        def trailer(last: object, size: int) -> dict:
+            response = {}
+            if total is not None:
+                response[constants.Pagination.TOTAL] = total
+            if cursor is not None:
+                response[constants.Pagination.NEXT_CURSOR] = None if size < limit \
+                    else people.PeopleController.get_cursor(last, sort=sort)
+            return response
+
+        return Stream(constants.Person.PLURAL,
+                      results,
+                      serialize,
+                      ndjson=request.args.get(constants.Format.FORMAT) == constants.Format.NDJSON,
+                      trailer=trailer)
+
+    def _get_many(self) -> dict:
+        """
+        Getting many People by ID, such as ?ids=1,2,3
+        People are returned in the requested order,
+        and the IDs not found are returned as missing.
+        Error handling is performed by the parent class method.
+        @raises: IdsFormException, FieldsFormException,
+                 ExpandFormException.
+        """
+        logger.debug("Getting many People.")
+        fields = PersonSerializer.get_fields(request.args)
+        expand = PersonSerializer.get_expand(request.args)
+        plan = PersonSerializer.get_plan(expand, fields)
+        try:
+            person_ids = [
+                int(person_id)
+                for person_id in request.args.get(constants.Batch.IDS).split(",")
+            ]
+        except ValueError:
+            raise errors.IdsFormException()
+        try:
+            results, missing = people.PeopleController.get_many(person_ids=person_ids,
+                                                                plan=plan)
+            logger.debug("People loaded!")
+            if request.args.get(constants.Format.FORMAT) == constants.Format.NORMALIZED:
+                documents, included = PersonSerializer.normalize_many(*results,
+                                                                      expand=expand,
+                                                                      fields=fields)
+                response = {
+                    constants.Person.PLURAL: documents,
+                    constants.Format.INCLUDED: included,
+                }
+            else:
+                response = {
+                    constants.Person.PLURAL: [
+                        PersonSerializer.serialize(person, expand=expand, fields=fields)
+                        for person in results
+                    ]
+                }
+            response[constants.Batch.MISSING] = missing
+            return response
+        except people.PersonIDException:
+            raise errors.IdsFormException()
+
 
 class PersonAPI(API):
     """
     Person API.
     """
 
+    DEPENDENCIES = (movies.MoviesController.ENTITY, people.PeopleController.ENTITY)
+    ENTITY = people.PeopleController.ENTITY
+
     @login_required
     def _put(self, person_id: int) -> dict:
         """
@@ -119,14 +271,57 @@ class PersonAPI(API):
         """
         Getting Person.
         Error handling is performed by the parent class method.
-        @raises: PersonNotFoundException.
+        @raises: PersonNotFoundException, FieldsFormException,
+                 ExpandFormException.
         """
         logger.debug("Getting Person.")
+        fields = PersonSerializer.get_fields(request.args)
+        expand = PersonSerializer.get_expand(request.args)
+        plan = PersonSerializer.get_plan(expand, fields)
+        normalized = request.args.get(constants.Format.FORMAT) == constants.Format.NORMALIZED
         try:
-            person = people.PeopleController.get_by_id(person_id=person_id)
+            version = people.PeopleController.get_version(person_id)
+            if version is not None and PersonSerializer.is_versioned(expand):
+                etag = PersonSerializer.get_etag(person_id,
+                                                 version,
+                                                 expand=expand,
+                                                 fields=fields,
+                                                 normalized=normalized)
+                if self.is_not_modified(etag):
+                    logger.debug("Person not modified!")
+                    return None
+            if version is not None and not normalized:
+                document = PersonSerializer.get_cached(person_id,
+                                                       version,
+                                                       expand=expand,
+                                                       fields=fields)
+                if document is not None:
+                    logger.debug("Person cached!")
+                    return {
+                        constants.Person.SINGULAR: document,
+                    }
+                if expand is None and not fields:
+                    document = PersonSerializer.get_materialized(person_id, version)
+                    if document is not None:
+                        logger.debug("Person materialized!")
+                        return {
+                            constants.Person.SINGULAR: document,
+                        }
+            person = people.PeopleController.get_by_id(person_id=person_id,
+                                                       plan=plan)
             logger.debug("Person loaded!")
+            if normalized:
+                documents, included = PersonSerializer.normalize_many(person,
+                                                                      expand=expand,
+                                                                      fields=fields)
+                return {
+                    constants.Person.SINGULAR: documents[0],
+                    constants.Format.INCLUDED: included,
+                }
             return {
-                constants.Person.SINGULAR: PersonSerializer.serialize(person),
+                constants.Person.SINGULAR: PersonSerializer.serialize(person,
+                                                                      expand=expand,
+                                                                      fields=fields),
             }
         except people.PersonIDException:
             raise errors.PersonNotFoundException()
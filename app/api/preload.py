@@ -0,0 +1,191 @@
+"""
+Preload Mode.
+
+Under a preforking server, such as uWSGI without lazy-apps,
+the app is created once in the master process, and every
+worker is a fork of it, which shares the memory of the master
+until it writes to it. Two things break that:
+
+- Pooled DB connections of the master would be shared by every
+  worker, so they are closed before the fork, and every worker
+  opens its own.
+- The garbage collector of every worker writes to the header of
+  every object it tracks, copying nearly every page of the heap.
+  Objects of the master are frozen before the fork, so workers
+  never collect them (Python 3.7+).
+
+Per-worker resources, such as threads, are started after the fork.
+Threads of a process do not survive a fork, so every background
+thread is a Daemon, which every process starts on its own.
+"""
+
+import gc
+import os
+import typing
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Preload(object):
+    """
+    Callbacks around the fork of the workers.
+    """
+
+    __before = []
+    __after = []
+    __disabled = False
+
+    @classmethod
+    def before_fork(cls, callback: typing.Callable) -> None:
+        """
+        Registers a callback, called in the master before the fork.
+        """
+        cls.__before.append(callback)
+
+    @classmethod
+    def after_fork(cls, callback: typing.Callable) -> None:
+        """
+        Registers a callback, called in every worker after the fork.
+        """
+        cls.__after.append(callback)
+
+    @classmethod
+    def install(cls) -> bool:
+        """
+        Calls forked() in every worker after the fork, with the
+        hooks of uWSGI, or of Python 3.7+. Returns False if
+        neither is available, in which case preloading is unsafe.
+        """
+        try:
+            from uwsgidecorators import postfork
+        except ImportError:
+            register_at_fork = getattr(os, "register_at_fork", None)
+            if register_at_fork is None:
+                logger.warning("No post-fork hook available, not preloading.")
+                return False
+            register_at_fork(after_in_child=cls.forked)
+        else:
+            postfork(cls.forked)
+        return True
+
+    @classmethod
+    def begin(cls) -> None:
+        """
+        Stops collecting garbage in the master, before the app is
+        created, so that the objects that survive are packed in
+        pages that are not written to again. Only if they can be
+        frozen, since they would be collected in the workers else.
+        """
+        if hasattr(gc, "freeze") and gc.isenabled():
+            gc.disable()
+            cls.__disabled = True
+
+    @classmethod
+    def prepare(cls) -> None:
+        """
+        Prepares the master for the fork, after the app is created:
+        runs the before-fork callbacks, which stop every thread,
+        and freezes every object.
+        """
+        for callback in cls.__before:
+            callback()
+        threads = [thread.name for thread in threading.enumerate()
+                   if thread is not threading.main_thread()]
+        if threads:
+            logger.warning("Forking with running threads: %s.", threads)
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+            logger.debug("Frozen %s objects.", gc.get_freeze_count())
+        else:
+            logger.warning("Objects can not be frozen before Python 3.7.")
+
+    @classmethod
+    def forked(cls) -> None:
+        """
+        Starts a worker: collects garbage again, if it was
+        stopped, and runs the after-fork callbacks.
+        """
+        if cls.__disabled:
+            gc.enable()
+        for callback in cls.__after:
+            callback()
+        logger.debug("Worker %s started.", os.getpid())
+
+
+class Daemon(object):
+    """
+    Background thread, one per process.
+
+    Threads of a process do not survive a fork, such as the fork
+    of uWSGI workers, so start() is called on first use, and
+    starts a new thread in every process that has none. Threads
+    must be stopped before a fork, since they may hold locks, or
+    connections, that the forked process would inherit.
+    """
+
+    # Name of the thread.
+    NAME = "daemon"
+
+    def __init__(self) -> None:
+        """
+        Daemon initializer.
+        """
+        self.__lock = threading.Lock()
+        self.__pid = None
+        self.__stopped = None
+        self.__thread = None
+
+    def is_started(self) -> bool:
+        """
+        Returns True if the thread was started in this process.
+        """
+        return self.__pid == os.getpid()
+
+    def start(self) -> None:
+        """
+        Starts the thread in this process, unless it is already.
+        """
+        if self.__pid == os.getpid():
+            return
+        with self.__lock:
+            if self.__pid == os.getpid():
+                return
+            self.__stopped = threading.Event()
+            self.before_start()
+            self.__thread = threading.Thread(target=self.run,
+                                             args=(self.__stopped,),
+                                             name=self.NAME,
+                                             daemon=True)
+            self.__thread.start()
+            self.__pid = os.getpid()
+        logger.debug("Daemon %s started.", self.NAME)
+
+    def stop(self) -> None:
+        """
+        Stops the thread of this process, and waits for it.
+        """
+        with self.__lock:
+            if self.__pid == os.getpid():
+                self.__stopped.set()
+                self.wake()
+                self.__thread.join()
+                logger.debug("Daemon %s stopped.", self.NAME)
+            self.__pid = None
+
+    def before_start(self) -> None:
+        """
+        Prepares the state of the thread, before it starts.
+        """
+
+    def wake(self) -> None:
+        """
+        Wakes the thread up, after it is stopped, if it is blocked.
+        """
+
+    def run(self, stopped: threading.Event) -> None:
+        """
+        Runs in the thread, until stopped.
+        """
+        raise NotImplementedError()
@@ -0,0 +1,132 @@
+"""
+Front Cache Purger.
+
+Public GET responses are sent with surrogate keys, such as
+"movie-12 person-7 movies-list", so that a reverse proxy in
+front of the API can cache them. Writes are sent to a purge
+endpoint of the proxy, with the keys of the changed entities
+and of every list, so that it evicts exactly the responses
+that include them.
+"""
+
+import queue
+import typing
+import logging
+import threading
+import urllib.request
+
+from . import constants
+from .preload import Daemon
+
+logger = logging.getLogger(__name__)
+
+
+class Purger(Daemon):
+    """
+    Sends purge requests to a reverse proxy.
+
+    Purges are sent by a background thread, so that writes
+    never wait for the proxy. Keys queued while a purge is
+    being sent are merged into the next one.
+    """
+
+    METHOD = "PURGE"
+
+    NAME = "purge"
+
+    def __init__(self, url: str, timeout: float=5, batch: int=100) -> None:
+        """
+        Purger initializer.
+        Timeout is the number of seconds to wait for the proxy,
+        and batch the maximum number of keys per request.
+        """
+        super().__init__()
+        if not url or not isinstance(url, str):
+            raise ValueError("Invalid URL.")
+        if not isinstance(batch, int) or batch < 1:
+            raise ValueError("Invalid batch:", batch)
+        self.url = url
+        self.timeout = timeout
+        self.batch = batch
+        self.__queue = None
+
+    @staticmethod
+    def get_key(entity: str, entity_id: int) -> str:
+        """
+        Returns the surrogate key of an entity, such as "movie-12".
+        """
+        return "{}-{}".format(entity, entity_id)
+
+    @classmethod
+    def get_keys(cls, *entities) -> set:
+        """
+        Returns the surrogate keys to purge when the entities,
+        such as ("movie", 12), change.
+        """
+        keys = set(constants.Surrogate.LISTS)
+        keys.update(cls.get_key(entity, entity_id) for entity, entity_id in entities)
+        return keys
+
+    def purge(self, *entities) -> None:
+        """
+        Queues a purge of the changed entities.
+        Listener of the controllers, called after writes commit.
+        """
+        self.start()
+        self.__queue.put(self.get_keys(*entities))
+
+    def before_start(self) -> None:
+        """
+        Creates the queue of purges of this process.
+        """
+        self.__queue = queue.Queue()
+
+    def wake(self) -> None:
+        """
+        Wakes the thread up, with an empty purge.
+        """
+        self.__queue.put(set())
+
+    def wait(self) -> None:
+        """
+        Waits until every queued purge has been sent.
+        """
+        if self.is_started():
+            self.__queue.join()
+
+    def run(self, stopped: threading.Event) -> None:
+        """
+        Sends the queued purges, until stopped.
+        Purges queued before it is stopped are sent.
+        """
+        pending = self.__queue
+        while True:
+            keys = set(pending.get())
+            count = 1
+            while True:
+                try:
+                    keys.update(pending.get_nowait())
+                    count += 1
+                except queue.Empty:
+                    break
+            try:
+                keys = sorted(keys)
+                for start in range(0, len(keys), self.batch):
+                    self.send(keys[start:start + self.batch])
+            except Exception:
+                logger.exception("Failed to purge: %s.", keys)
+            finally:
+                for _ in range(count):
+                    pending.task_done()
+            if stopped.is_set():
+                return
+
+    def send(self, keys: typing.Iterable) -> None:
+        """
+        Sends a purge request with the surrogate keys.
+        """
+        request = urllib.request.Request(self.url, method=self.METHOD, headers={
+            constants.Surrogate.HEADER: " ".join(keys),
+        })
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            logger.debug("Purged %s: %s.", keys, response.status)
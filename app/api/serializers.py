@@ -3,10 +3,13 @@ API serializers.
 Views.
 """
 
+import json
+import hashlib
 import logging
 
-from . import constants
-from .controller import people, movies
+from . import constants, errors
+from .cache import Cache
+from .controller import Controller, people, movies, documents
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,35 @@ class Serializer(object):
     Parent Serializer.
     """
 
+    # Load plan covering every relationship the
+    # deep serializer touches. Controllers use it
+    # to load them eagerly in a fixed number of queries.
+    PLAN = {}
+
+    # Relationships inlined by default, and how deep.
+    EXPAND = {}
+
+    # Fields that can be requested with ?fields[...]=
+    FIELDS = ()
+
+    # Maximum depth of ?expand= paths.
+    MAX_DEPTH = 3
+
+    # Keys of the fields and included maps for this serializer.
+    SINGULAR = None
+    PLURAL = None
+
+    # Model serialized by this serializer.
+    MODEL = None
+
+    # Deep serialized documents, by ID, expansion and fields.
+    # Documents are tagged with every entity they include.
+    CACHE = Cache()
+
+    # Default documents are also materialized in the document
+    # table, where detail reads find them by primary key.
+    MATERIALIZED = False
+
     @classmethod
     def to_json(cls, *args, **kwargs) -> dict:
         """
@@ -24,20 +56,373 @@ class Serializer(object):
         raise NotImplementedError()
 
     @classmethod
-    def serialize(cls, *args, **kwargs) -> dict:
+    def dump(cls, *args, **kwargs) -> dict:
         """
         Override (deep) serializer.
         """
         return cls.to_json()
 
+    @classmethod
+    def serialize(cls, obj: object=None, expand: dict=None, fields: dict=None) -> dict:
+        """
+        Deep serializer, cached by ID, expansion and fields.
+        Only active objects are cached, since inactive objects
+        are not found. Cached documents are shared, so they
+        must not be modified.
+        @raises: TypeError, ValueError.
+        """
+        logger.debug("Serializing %s: %s.", cls.SINGULAR, obj)
+        if not obj:
+            raise ValueError("Invalid {}.".format(cls.MODEL.__name__))
+        if not isinstance(obj, cls.MODEL):
+            raise ValueError("Expecting {}, got:".format(cls.MODEL.__name__), type(obj))
+        expand = cls.EXPAND if expand is None else expand
+        if not obj.is_active:
+            return cls.dump(obj, expand, fields)
+        key = cls.get_key(obj.id, obj.version, expand, fields)
+        return cls.CACHE.fetch(key, lambda: cls.dump(obj, expand, fields))
+
+    @classmethod
+    def get_cached(cls,
+                   obj_id: int,
+                   version: int,
+                   expand: dict=None,
+                   fields: dict=None) -> dict:
+        """
+        Returns the cached document of an active object,
+        without loading it, or None if it is not cached.
+        Its tags are added to the entries being built.
+        Misses are counted by serialize(), which follows.
+        """
+        expand = cls.EXPAND if expand is None else expand
+        key = cls.get_key(obj_id, version, expand, fields)
+        document, tags = cls.CACHE.get(key, count_miss=False)
+        if tags is not None:
+            cls.CACHE.tag(*tags)
+        return document
+
+    @classmethod
+    def get_materialized(cls, obj_id: int, version: int) -> dict:
+        """
+        Returns the materialized default document of an active
+        object, without loading it, or None if it is missing or
+        outdated. Its tags are added to the entries being built.
+        """
+        if not cls.MATERIALIZED:
+            return None
+        body, tags = documents.DocumentsController.get(cls.SINGULAR, obj_id, version)
+        if body is None:
+            return None
+        cls.CACHE.tag(*tags)
+        return json.loads(body)
+
+    @classmethod
+    def materialize(cls, obj: object=None) -> dict:
+        """
+        Serializes the default document of an active object,
+        and stores it in the document table, with the tags of
+        every entity it includes. Returns the document.
+        @raises: TypeError, ValueError.
+        """
+        with cls.CACHE.collect() as tags:
+            document = cls.serialize(obj)
+        if cls.MATERIALIZED and obj.is_active:
+            documents.DocumentsController.save(cls.SINGULAR,
+                                               obj.id,
+                                               obj.version,
+                                               json.dumps(document),
+                                               tags)
+        return document
+
+    @staticmethod
+    def refresh(*entities) -> None:
+        """
+        Materializes the documents of the changed entities,
+        such as ("movie", 1), after their writes commit.
+        Documents of the entities that include them are
+        materialized again by materialize_outdated().
+        Failures are logged, since the writes have committed.
+        """
+        for entity, entity_id in entities:
+            try:
+                if entity == PersonSerializer.SINGULAR:
+                    person = people.PeopleController.get_by_id(
+                        person_id=entity_id, plan=PersonSerializer.get_plan())
+                    PersonSerializer.materialize(person)
+                elif entity == MovieSerializer.SINGULAR:
+                    movie = movies.MoviesController.get_by_id(
+                        movie_id=entity_id, plan=MovieSerializer.get_plan())
+                    MovieSerializer.materialize(movie)
+            except (people.PersonNotFoundException, movies.MovieNotFoundException):
+                logger.debug("Not materializing inactive %s: %s.", entity, entity_id)
+            except Exception:
+                logger.exception("Failed to materialize %s: %s.", entity, entity_id)
+
+    @staticmethod
+    def materialize_outdated(batch: int=100) -> int:
+        """
+        Materializes every missing or outdated document, in
+        batches. Run in the background, since detail reads
+        never write. Returns the number of outdated documents.
+        """
+        materialized = 0
+        for entity, model in ((PersonSerializer.SINGULAR, PersonSerializer.MODEL),
+                              (MovieSerializer.SINGULAR, MovieSerializer.MODEL)):
+            ids = documents.DocumentsController.get_outdated(model, entity, limit=batch)
+            while ids:
+                Serializer.refresh(*[(entity, entity_id) for entity_id in ids])
+                materialized += len(ids)
+                ids = documents.DocumentsController.get_outdated(model,
+                                                                 entity,
+                                                                 after=ids[-1],
+                                                                 limit=batch)
+        return materialized
+
+    @classmethod
+    def get_key(cls, obj_id: int, version: int, expand: dict, fields: dict=None) -> str:
+        """
+        Returns the cache key of a document.
+        Documents of older versions are never looked up again.
+        """
+        return "{}:{}:{}:{}".format(cls.get_tag(cls.SINGULAR, obj_id),
+                                    version,
+                                    json.dumps(expand, sort_keys=True),
+                                    json.dumps(fields, sort_keys=True, default=sorted))
+
+    @classmethod
+    def is_versioned(cls, expand: dict=None, default: dict=None) -> bool:
+        """
+        Returns True if the version of an object changes whenever
+        its document does. Versions follow the default expansion,
+        so this is True if the expansion is included in it.
+        """
+        expand = cls.EXPAND if expand is None else expand
+        default = cls.EXPAND if default is None else default
+        return all(
+            name in default and cls.is_versioned(children, default[name])
+            for name, children in expand.items()
+        )
+
+    @classmethod
+    def get_etag(cls,
+                 obj_id: int,
+                 version: int,
+                 expand: dict=None,
+                 fields: dict=None,
+                 normalized: bool=False) -> str:
+        """
+        Returns the entity tag of a document, which changes
+        with its version, expansion, fields, and format.
+        """
+        expand = cls.EXPAND if expand is None else expand
+        key = "{}:{}".format(cls.get_key(obj_id, version, expand, fields), normalized)
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    @staticmethod
+    def get_tag(entity: str, entity_id: int) -> str:
+        """
+        Returns the cache tag of an entity, such as "movie:1".
+        """
+        return "{}:{}".format(entity, entity_id)
+
+    @classmethod
+    def invalidate(cls, *entities) -> None:
+        """
+        Removes the cached documents including any of the
+        changed entities, such as ("movie", 1).
+        """
+        cls.CACHE.invalidate(*[
+            Serializer.get_tag(entity, entity_id)
+            for entity, entity_id in entities
+        ])
+
+    @classmethod
+    def normalize(cls, *args, **kwargs) -> dict:
+        """
+        Override (normalized) serializer.
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def include(cls, *args, **kwargs) -> None:
+        """
+        Override (included) serializer.
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def get_plan(cls, *args, **kwargs) -> dict:
+        """
+        Override load plan getter.
+        """
+        return cls.PLAN
+
+    @classmethod
+    def get_relationship(cls, name: str) -> type:
+        """
+        Override relationship getter.
+        Returns the serializer of an expandable relationship.
+        """
+        return None
+
+    @classmethod
+    def normalize_many(cls, *objects, expand: dict=None, fields: dict=None) -> tuple:
+        """
+        Normalized serializer for a list of objects.
+
+        Relationships are serialized as ID references and every
+        referenced object is serialized only once, into the
+        included map. Returns the documents and the included map.
+        """
+        included = {
+            constants.Person.PLURAL: {},
+            constants.Movie.PLURAL: {},
+        }
+        documents = [
+            cls.normalize(obj, included, expand=expand, fields=fields)
+            for obj in objects
+        ]
+        for obj in objects:
+            included[cls.PLURAL].pop(obj.id, None)
+        return documents, included
+
+    @classmethod
+    def get_expand(cls, args: dict) -> dict:
+        """
+        Parses ?expand=actors,actors.movies into an expansion tree.
+        Returns None if the client did not send any expansion.
+        @raises: ExpandFormException.
+        """
+        if constants.Fields.EXPAND not in args:
+            return None
+        expand = {}
+        for path in args.get(constants.Fields.EXPAND).split(","):
+            names = [name.strip() for name in path.split(".") if name.strip()]
+            if len(names) > cls.MAX_DEPTH:
+                raise errors.ExpandFormException(path)
+            node, serializer = expand, cls
+            for name in names:
+                serializer = serializer.get_relationship(name)
+                if not serializer:
+                    raise errors.ExpandFormException(path)
+                node = node.setdefault(name, {})
+        logger.debug("Expanding: %s.", expand)
+        return expand
+
+    @staticmethod
+    def get_fields(args: dict) -> dict:
+        """
+        Parses ?fields[movie]=id,title into sparse fieldsets.
+        Types without a fieldset are serialized with all fields.
+        @raises: FieldsFormException.
+        """
+        fields = {}
+        for serializer in (PersonSerializer, MovieSerializer):
+            key = "{}[{}]".format(constants.Fields.FIELDS, serializer.SINGULAR)
+            if key not in args:
+                continue
+            names = set(
+                name.strip()
+                for name in args.get(key).split(",")
+                if name.strip()
+            )
+            if names - set(serializer.FIELDS):
+                raise errors.FieldsFormException(names - set(serializer.FIELDS))
+            fields[serializer.SINGULAR] = names
+        logger.debug("Fields: %s.", fields)
+        return fields
+
+    @classmethod
+    def is_selected(cls, name: str, fields: dict=None) -> bool:
+        """
+        Returns True if a field has been requested.
+        """
+        if not fields or cls.SINGULAR not in fields:
+            return True
+        return any(
+            field == name or field.startswith(name + ".")
+            for field in fields[cls.SINGULAR]
+        )
+
+    @classmethod
+    def select(cls, s: dict, fields: dict=None) -> dict:
+        """
+        Removes the fields that have not been requested.
+        Nested fields, such as 'released_at.year', are supported.
+        """
+        if not fields or cls.SINGULAR not in fields:
+            return s
+        selected = {}
+        for field in fields[cls.SINGULAR]:
+            name, _, child = field.partition(".")
+            if child:
+                selected.setdefault(name, {})[child] = s[name][child]
+            else:
+                selected[name] = s[name]
+        return selected
+
 
 class PersonSerializer(Serializer):
     """
     Person serializer.
     """
 
+    SINGULAR = constants.Person.SINGULAR
+    PLURAL = constants.Person.PLURAL
+    MODEL = people.Person
+
+    PLAN = {
+        "aliases": {},
+        "movies_as_actor": {},
+        "movies_as_director": {},
+        "movies_as_producer": {},
+    }
+
+    EXPAND = {
+        constants.Movie.PLURAL: {},
+    }
+
+    FIELDS = (
+        constants.Person.ID,
+        constants.Person.FIRST_NAME,
+        constants.Person.LAST_NAME,
+        constants.Person.ACTIVE,
+        constants.Person.CREATED_AT,
+        constants.Person.ALIASES,
+        constants.Person.COUNTS,
+        ".".join([constants.Person.COUNTS, constants.Actor.SINGULAR]),
+        ".".join([constants.Person.COUNTS, constants.Director.SINGULAR]),
+        ".".join([constants.Person.COUNTS, constants.Producer.SINGULAR]),
+    )
+
+    @classmethod
+    def get_relationship(cls, name: str) -> type:
+        """
+        Person relationship getter.
+        """
+        if name == constants.Movie.PLURAL:
+            return MovieSerializer
+        return None
+
     @classmethod
-    def to_json(cls, person: people.Person=None) -> dict:
+    def get_plan(cls, expand: dict=None, fields: dict=None) -> dict:
+        """
+        Person load plan getter.
+        Only the relationships that will be serialized are loaded.
+        """
+        expand = cls.EXPAND if expand is None else expand
+        plan = {}
+        if cls.is_selected(constants.Person.ALIASES, fields):
+            plan["aliases"] = {}
+        if constants.Movie.PLURAL in expand:
+            movies_plan = MovieSerializer.get_plan(expand[constants.Movie.PLURAL], fields)
+            plan["movies_as_actor"] = movies_plan
+            plan["movies_as_director"] = movies_plan
+            plan["movies_as_producer"] = movies_plan
+        return plan
+
+    @classmethod
+    def to_json(cls, person: people.Person=None, fields: dict=None) -> dict:
         """
         Person (plain) serializer.
         @raises: TypeError, ValueError.
@@ -47,57 +432,177 @@ class PersonSerializer(Serializer):
             raise ValueError("Invalid Person.")
         if not isinstance(person, people.Person):
             raise ValueError("Expecting Person, got:", type(person))
+        cls.CACHE.tag(cls.get_tag(cls.SINGULAR, person.id))
         s = {
             constants.Person.ID: person.id,
             constants.Person.FIRST_NAME: person.first_name,
             constants.Person.LAST_NAME: person.last_name,
             constants.Person.ACTIVE: person.is_active,
             constants.Person.CREATED_AT: str(person.created_at),
-            constants.Person.ALIASES: [
+            constants.Person.COUNTS: {
+                constants.Actor.SINGULAR: person.movies_as_actor_count,
+                constants.Director.SINGULAR: person.movies_as_director_count,
+                constants.Producer.SINGULAR: person.movies_as_producer_count,
+            },
+        }
+        if cls.is_selected(constants.Person.ALIASES, fields):
+            s[constants.Person.ALIASES] = [
                 alias.value
                 for alias in person.aliases
             ]
-        }
+        s = cls.select(s, fields)
         logger.debug("Person serialized: %s.", s)
         return s
 
     @classmethod
-    def serialize(cls, person: people.Person=None) -> dict:
+    def dump(cls,
+             person: people.Person=None,
+             expand: dict=None,
+             fields: dict=None) -> dict:
         """
         Person (deep) serializer.
+        Use serialize(), which validates and caches.
+        """
+        s = cls.to_json(person, fields=fields)
+        if constants.Movie.PLURAL in expand:
+            movies_expand = expand[constants.Movie.PLURAL]
+            s[constants.Movie.PLURAL] = {
+                constants.Actor.SINGULAR: [
+                    MovieSerializer.serialize(movie, movies_expand, fields)
+                    for movie in person.movies_as_actor
+                ],
+                constants.Director.SINGULAR: [
+                    MovieSerializer.serialize(movie, movies_expand, fields)
+                    for movie in person.movies_as_director
+                ],
+                constants.Producer.SINGULAR: [
+                    MovieSerializer.serialize(movie, movies_expand, fields)
+                    for movie in person.movies_as_producer
+                ],
+            }
+        logger.debug("Person serialized: %s.", s)
+        return s
+
+    @classmethod
+    def normalize(cls,
+                  person: people.Person=None,
+                  included: dict=None,
+                  expand: dict=None,
+                  fields: dict=None) -> dict:
+        """
+        Person (normalized) serializer.
+        Movies are added to the included map.
         @raises: TypeError, ValueError.
         """
-        logger.debug("Serializing person: %s.", person)
+        logger.debug("Normalizing person: %s.", person)
         if not person:
             raise ValueError("Invalid Person.")
         if not isinstance(person, people.Person):
             raise ValueError("Expecting Person, got:", type(person))
-        s = cls.to_json(person)
-        s[constants.Movie.PLURAL] = {
-            constants.Actor.SINGULAR: [
-                MovieSerializer.to_json(movie)
-                for movie in person.movies_as_actor
-            ],
-            constants.Director.SINGULAR: [
-                MovieSerializer.to_json(movie)
-                for movie in person.movies_as_director
-            ],
-            constants.Producer.SINGULAR: [
-                MovieSerializer.to_json(movie)
-                for movie in person.movies_as_producer
-            ],
-        }
-        logger.debug("Person serialized: %s.", s)
+        if not isinstance(included, dict):
+            raise TypeError("Expecting dict, got:", type(included))
+        expand = cls.EXPAND if expand is None else expand
+        s = cls.to_json(person, fields=fields)
+        if constants.Movie.PLURAL in expand:
+            movies_expand = expand[constants.Movie.PLURAL]
+            s[constants.Movie.PLURAL] = {
+                constants.Actor.SINGULAR: [
+                    MovieSerializer.include(movie, included, movies_expand, fields)
+                    for movie in person.movies_as_actor
+                ],
+                constants.Director.SINGULAR: [
+                    MovieSerializer.include(movie, included, movies_expand, fields)
+                    for movie in person.movies_as_director
+                ],
+                constants.Producer.SINGULAR: [
+                    MovieSerializer.include(movie, included, movies_expand, fields)
+                    for movie in person.movies_as_producer
+                ],
+            }
+        logger.debug("Person normalized: %s.", s)
         return s
 
+    @classmethod
+    def include(cls,
+                person: people.Person=None,
+                included: dict=None,
+                expand: dict=None,
+                fields: dict=None) -> int:
+        """
+        Adds a Person to the included map, unless it is already there.
+        Returns the Person ID reference.
+        """
+        people_included = included[cls.PLURAL]
+        if person.id not in people_included:
+            people_included[person.id] = None
+            people_included[person.id] = cls.normalize(person, included, expand, fields)
+        return person.id
+
 
 class MovieSerializer(Serializer):
     """
     Movie serializer.
     """
 
+    SINGULAR = constants.Movie.SINGULAR
+    PLURAL = constants.Movie.PLURAL
+    MODEL = movies.Movie
+
+    PLAN = {
+        "actors": PersonSerializer.PLAN,
+        "directors": PersonSerializer.PLAN,
+        "producers": PersonSerializer.PLAN,
+    }
+
+    EXPAND = {
+        constants.Actor.PLURAL: PersonSerializer.EXPAND,
+        constants.Director.PLURAL: PersonSerializer.EXPAND,
+        constants.Producer.PLURAL: PersonSerializer.EXPAND,
+    }
+
+    FIELDS = (
+        constants.Movie.ID,
+        constants.Movie.TITLE,
+        constants.Movie.RELEASED_AT,
+        ".".join([constants.Movie.RELEASED_AT, constants.Movie.Release.DATE]),
+        ".".join([constants.Movie.RELEASED_AT, constants.Movie.Release.YEAR]),
+        ".".join([constants.Movie.RELEASED_AT, constants.Movie.Release.ROMAN]),
+        constants.Movie.ACTIVE,
+        constants.Movie.CREATED_AT,
+        constants.Movie.COUNTS,
+        ".".join([constants.Movie.COUNTS, constants.Actor.PLURAL]),
+        ".".join([constants.Movie.COUNTS, constants.Director.PLURAL]),
+        ".".join([constants.Movie.COUNTS, constants.Producer.PLURAL]),
+    )
+
+    @classmethod
+    def get_relationship(cls, name: str) -> type:
+        """
+        Movie relationship getter.
+        """
+        if name in (constants.Actor.PLURAL,
+                    constants.Director.PLURAL,
+                    constants.Producer.PLURAL):
+            return PersonSerializer
+        return None
+
+    @classmethod
+    def get_plan(cls, expand: dict=None, fields: dict=None) -> dict:
+        """
+        Movie load plan getter.
+        Only the relationships that will be serialized are loaded.
+        """
+        expand = cls.EXPAND if expand is None else expand
+        return {
+            name: PersonSerializer.get_plan(expand[name], fields)
+            for name in (constants.Actor.PLURAL,
+                         constants.Director.PLURAL,
+                         constants.Producer.PLURAL)
+            if name in expand
+        }
+
     @classmethod
-    def to_json(cls, movie: movies.Movie=None) -> dict:
+    def to_json(cls, movie: movies.Movie=None, fields: dict=None) -> dict:
         """
         Movie serializer.
         @raises: TypeError, ValueError.
@@ -107,6 +612,7 @@ class MovieSerializer(Serializer):
             raise ValueError("Invalid Movie.")
         if not isinstance(movie, movies.Movie):
             raise ValueError("Expecting Movie, got:", type(movie))
+        cls.CACHE.tag(cls.get_tag(cls.SINGULAR, movie.id))
         s = {
             constants.Movie.ID: movie.id,
             constants.Movie.TITLE: movie.title,
@@ -117,33 +623,97 @@ class MovieSerializer(Serializer):
             },
             constants.Movie.ACTIVE: movie.is_active,
             constants.Movie.CREATED_AT: str(movie.created_at),
+            constants.Movie.COUNTS: {
+                constants.Actor.PLURAL: movie.actors_count,
+                constants.Director.PLURAL: movie.directors_count,
+                constants.Producer.PLURAL: movie.producers_count,
+            },
         }
+        s = cls.select(s, fields)
         logger.debug("Movie serialized: %s.", s)
         return s
 
     @classmethod
-    def serialize(cls, movie: movies.Movie=None) -> dict:
+    def dump(cls,
+             movie: movies.Movie=None,
+             expand: dict=None,
+             fields: dict=None) -> dict:
         """
-        Movie serializer.
+        Movie (deep) serializer.
+        Use serialize(), which validates and caches.
+        """
+        s = cls.to_json(movie=movie, fields=fields)
+        if constants.Actor.PLURAL in expand:
+            s[constants.Actor.PLURAL] = [
+                PersonSerializer.serialize(person, expand[constants.Actor.PLURAL], fields)
+                for person in movie.actors
+            ]
+        if constants.Director.PLURAL in expand:
+            s[constants.Director.PLURAL] = [
+                PersonSerializer.serialize(person, expand[constants.Director.PLURAL], fields)
+                for person in movie.directors
+            ]
+        if constants.Producer.PLURAL in expand:
+            s[constants.Producer.PLURAL] = [
+                PersonSerializer.serialize(person, expand[constants.Producer.PLURAL], fields)
+                for person in movie.producers
+            ]
+        logger.debug("Movie serialized: %s.", s)
+        return s
+
+    @classmethod
+    def normalize(cls,
+                  movie: movies.Movie=None,
+                  included: dict=None,
+                  expand: dict=None,
+                  fields: dict=None) -> dict:
+        """
+        Movie (normalized) serializer.
+        People are added to the included map.
         @raises: TypeError, ValueError.
         """
-        logger.debug("Serializing movie: %s.", movie)
+        logger.debug("Normalizing movie: %s.", movie)
         if not movie:
             raise ValueError("Invalid Movie.")
         if not isinstance(movie, movies.Movie):
             raise ValueError("Expecting Movie, got:", type(movie))
-        s = cls.to_json(movie=movie)
-        s[constants.Actor.PLURAL] = [
-            PersonSerializer.serialize(person)
-            for person in movie.actors
-        ]
-        s[constants.Director.PLURAL] = [
-            PersonSerializer.serialize(person)
-            for person in movie.directors
-        ]
-        s[constants.Producer.PLURAL] = [
-            PersonSerializer.serialize(person)
-            for person in movie.producers
-        ]
-        logger.debug("Movie serialized: %s.", s)
+        if not isinstance(included, dict):
+            raise TypeError("Expecting dict, got:", type(included))
+        expand = cls.EXPAND if expand is None else expand
+        s = cls.to_json(movie=movie, fields=fields)
+        if constants.Actor.PLURAL in expand:
+            s[constants.Actor.PLURAL] = [
+                PersonSerializer.include(person, included, expand[constants.Actor.PLURAL], fields)
+                for person in movie.actors
+            ]
+        if constants.Director.PLURAL in expand:
+            s[constants.Director.PLURAL] = [
+                PersonSerializer.include(person, included, expand[constants.Director.PLURAL], fields)
+                for person in movie.directors
+            ]
+        if constants.Producer.PLURAL in expand:
+            s[constants.Producer.PLURAL] = [
+                PersonSerializer.include(person, included, expand[constants.Producer.PLURAL], fields)
+                for person in movie.producers
+            ]
+        logger.debug("Movie normalized: %s.", s)
         return s
+
+    @classmethod
+    def include(cls,
+                movie: movies.Movie=None,
+                included: dict=None,
+                expand: dict=None,
+                fields: dict=None) -> int:
+        """
+        Adds a Movie to the included map, unless it is already there.
+        Returns the Movie ID reference.
+        """
+        movies_included = included[cls.PLURAL]
+        if movie.id not in movies_included:
+            movies_included[movie.id] = None
+            movies_included[movie.id] = cls.normalize(movie, included, expand, fields)
+        return movie.id
+
+
+Controller.listen(Serializer.invalidate)
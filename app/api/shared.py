@@ -0,0 +1,477 @@
+"""
+Shared Caches.
+
+Caches shared by every process of a node, such as the uWSGI
+workers, through memory-mapped files, so that an entry built
+by a worker serves the requests of every other worker.
+Files are best placed in /dev/shm, which is kept in memory.
+"""
+
+import os
+import mmap
+import time
+import fcntl
+import struct
+import pickle
+import typing
+import hashlib
+import logging
+import threading
+import contextlib
+
+from .cache import Cache, Generations
+
+logger = logging.getLogger(__name__)
+
+
+class SharedMemory(object):
+    """
+    Memory-mapped file, locked by ranges for threads and processes.
+
+    New files are filled with zeros. Files are mapped again
+    after a fork, so that every process locks the file with
+    its own file description. Ranges locked by a process must
+    be the same or not overlap, since locks of a process on
+    overlapping ranges do not exclude each other.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        """
+        Shared memory initializer.
+        The file is opened by the first lock.
+        """
+        if not path or not isinstance(path, str):
+            raise ValueError("Invalid path:", path)
+        if not isinstance(size, int) or size < 1:
+            raise ValueError("Invalid size:", size)
+        self.path = path
+        self.size = size
+        self.__lock = threading.Lock()
+        self.__locks = {}
+        self.__depths = {}
+        self.__pid = None
+        self.__fd = None
+        self.__map = None
+
+    @contextlib.contextmanager
+    def lock(self, start: int=0, length: int=0) -> typing.Generator:
+        """
+        Locks a range of the file, the whole file by default,
+        and yields its memory map. Record locks are held by the
+        process, so threads also take a lock of the range.
+        """
+        with self.__lock:
+            if self.__pid != os.getpid():
+                self.__open()
+            lock = self.__locks.setdefault((start, length), threading.RLock())
+        with lock:
+            depth = self.__depths.get((start, length), 0)
+            if not depth:
+                fcntl.lockf(self.__fd, fcntl.LOCK_EX, length, start)
+            self.__depths[(start, length)] = depth + 1
+            try:
+                yield self.__map
+            finally:
+                self.__depths[(start, length)] = depth
+                if not depth:
+                    fcntl.lockf(self.__fd, fcntl.LOCK_UN, length, start)
+
+    def __open(self) -> None:
+        """
+        Opens and maps the file, creating it if missing.
+        The file inherited from the parent process is closed.
+        """
+        if self.__map is not None:
+            self.__map.close()
+            os.close(self.__fd)
+        logger.debug("Mapping shared memory: %s.", self.path)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < self.size:
+                os.ftruncate(fd, self.size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self.__map = mmap.mmap(fd, self.size)
+        self.__fd = fd
+        self.__pid = os.getpid()
+        self.__locks = {}
+        self.__depths = {}
+
+    @staticmethod
+    def get_hash(value: typing.Hashable) -> int:
+        """
+        Returns a non-zero 64 bits hash of a value, which is
+        the same in every process, unlike the builtin hash().
+        """
+        digest = hashlib.blake2b(pickle.dumps(value, protocol=4), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+
+
+class SharedCache(Cache):
+    """
+    LRU cache with a TTL and tags, shared by processes.
+
+    Entries are stored in slots of a fixed size, grouped in
+    buckets of WAYS slots. A key can only be stored in the
+    slots of its bucket, and the least recently used entry
+    of the bucket is evicted when all of them are in use.
+    Entries larger than a slot are not cached, and counted
+    as rejected.
+
+    Every bucket is locked on its own, and has its own
+    counters, so that processes only wait for each other
+    when they use the same bucket. Entries are pickled and
+    unpickled outside of the locks.
+    """
+
+    WAYS = 8
+
+    # Version of the layout of the file, in its name.
+    LAYOUT = 2
+
+    # Generation of the cache, at the start of the file.
+    HEADER = struct.Struct("<q")
+    HEADER_SIZE = 128
+
+    # Counters at the start of every bucket.
+    COUNTERS = (
+        "hits",
+        "misses",
+        "evictions",
+        "expirations",
+        "invalidations",
+        "tick",
+        "size",
+        "cost",
+        "stale",
+        "rejected",
+    )
+    BUCKET_HEADER = struct.Struct("<{}q".format(len(COUNTERS)))
+    BUCKET_HEADER_SIZE = 128
+
+    # Key hash (0 if empty), expiration time, last use,
+    # number of tags, and length of the entry.
+    # The slot is followed by the hashes of the tags,
+    # and the pickled key, value and tags.
+    SLOT = struct.Struct("<QdQII")
+    TAG = struct.Struct("<Q")
+
+    def __init__(self,
+                 path: str,
+                 size: int=1024,
+                 ttl: float=300,
+                 slot_size: int=65536,
+                 stale: float=0) -> None:
+        """
+        Shared cache initializer.
+        Size is the minimum number of entries.
+        Slot size is the maximum size of an entry, in bytes.
+        The number of slots, their size, and the layout are
+        appended to the path, so caches with different layouts
+        never share a file.
+        """
+        if not path or not isinstance(path, str):
+            raise ValueError("Invalid path:", path)
+        if not isinstance(size, int) or size < 1:
+            raise ValueError("Invalid size:", size)
+        if not isinstance(slot_size, int) or slot_size <= self.SLOT.size:
+            raise ValueError("Invalid slot size:", slot_size)
+        self.buckets = -(-size // self.WAYS)
+        self.slot_size = slot_size
+        self.bucket_size = self.BUCKET_HEADER_SIZE + self.WAYS * slot_size
+        slots = self.buckets * self.WAYS
+        super().__init__(size=slots, ttl=ttl, budget=slots * slot_size, stale=stale)
+        self.memory = SharedMemory("{}.{}x{}.v{}".format(path, slots, slot_size, self.LAYOUT),
+                                   self.HEADER_SIZE + self.buckets * self.bucket_size)
+
+    def __lock_bucket(self, index: int) -> typing.ContextManager:
+        """
+        Locks a bucket, and yields the memory map.
+        """
+        return self.memory.lock(self.HEADER_SIZE + index * self.bucket_size, self.bucket_size)
+
+    def __lock_header(self) -> typing.ContextManager:
+        """
+        Locks the header, and yields the memory map.
+        """
+        return self.memory.lock(0, self.HEADER_SIZE)
+
+    def __get_bucket(self, key_hash: int) -> int:
+        """
+        Returns the index of the bucket of a key.
+        """
+        return key_hash % self.buckets
+
+    def __get_counter(self, m: mmap.mmap, bucket: int, name: str) -> int:
+        """
+        Returns a counter of a bucket.
+        """
+        offset = self.HEADER_SIZE + bucket * self.bucket_size + 8 * self.COUNTERS.index(name)
+        return struct.unpack_from("<q", m, offset)[0]
+
+    def __add(self, m: mmap.mmap, bucket: int, name: str, value: int=1) -> int:
+        """
+        Adds to a counter of a bucket. Returns its new value.
+        """
+        offset = self.HEADER_SIZE + bucket * self.bucket_size + 8 * self.COUNTERS.index(name)
+        value += struct.unpack_from("<q", m, offset)[0]
+        struct.pack_into("<q", m, offset, value)
+        return value
+
+    def __get_slots(self, bucket: int) -> range:
+        """
+        Returns the offsets of the slots of a bucket.
+        """
+        first = self.HEADER_SIZE + bucket * self.bucket_size + self.BUCKET_HEADER_SIZE
+        return range(first, first + self.WAYS * self.slot_size, self.slot_size)
+
+    def __remove(self, m: mmap.mmap, bucket: int, offset: int) -> None:
+        """
+        Empties a slot.
+        """
+        _, _, _, _, length = self.SLOT.unpack_from(m, offset)
+        self.SLOT.pack_into(m, offset, 0, 0, 0, 0, 0)
+        self.__add(m, bucket, "size", -1)
+        self.__add(m, bucket, "cost", -length)
+
+    def get(self, key: typing.Hashable, count_miss: bool=True) -> tuple:
+        """
+        Returns the value and the tags of an entry,
+        or (None, None) if it is missing or expired.
+        """
+        key_hash = SharedMemory.get_hash(key)
+        bucket = self.__get_bucket(key_hash)
+        with self.__lock_bucket(bucket) as m:
+            offset, data = self.__get_entry(m, bucket, key_hash)
+            if offset is None or self.SLOT.unpack_from(m, offset)[1] < time.time():
+                self.__add(m, bucket, "misses", int(count_miss))
+                return None, None
+            struct.pack_into("<Q", m, offset + 16, self.__add(m, bucket, "tick"))
+            self.__add(m, bucket, "hits")
+        stored_key, value, tags = pickle.loads(data)
+        if stored_key != key:
+            self.__count_collision(bucket, count_miss)
+            return None, None
+        return value, tags
+
+    def get_stale(self, key: typing.Hashable) -> tuple:
+        """
+        Returns the value and the tags of an entry that
+        expired less than the stale time ago, or (None, None).
+        """
+        key_hash = SharedMemory.get_hash(key)
+        bucket = self.__get_bucket(key_hash)
+        with self.__lock_bucket(bucket) as m:
+            offset, data = self.__get_entry(m, bucket, key_hash)
+            if offset is None or self.SLOT.unpack_from(m, offset)[1] >= time.time():
+                return None, None
+            self.__add(m, bucket, "stale")
+        stored_key, value, tags = pickle.loads(data)
+        if stored_key != key:
+            return None, None
+        return value, tags
+
+    def __count_collision(self, bucket: int, count_miss: bool) -> None:
+        """
+        Counts a hit as a miss, after the stored key turned
+        out to be another key with the same hash.
+        """
+        with self.__lock_bucket(bucket) as m:
+            self.__add(m, bucket, "hits", -1)
+            self.__add(m, bucket, "misses", int(count_miss))
+
+    def __get_entry(self, m: mmap.mmap, bucket: int, key_hash: int) -> tuple:
+        """
+        Returns the offset and a copy of the pickled entry of
+        a key hash, removing it if it expired more than the
+        stale time ago.
+        """
+        for offset in self.__get_slots(bucket):
+            stored, expires, _, count, length = self.SLOT.unpack_from(m, offset)
+            if stored != key_hash:
+                continue
+            if expires + self.stale < time.time():
+                self.__remove(m, bucket, offset)
+                self.__add(m, bucket, "expirations")
+                break
+            start = offset + self.SLOT.size + count * self.TAG.size
+            return offset, m[start:start + length]
+        return None, None
+
+    def set(self,
+            key: typing.Hashable,
+            value: object,
+            tags: frozenset=frozenset(),
+            cost: int=0,
+            generation: int=None) -> None:
+        """
+        Adds an entry, evicting the least recently used
+        entry of its bucket if the bucket is full.
+        The cost of an entry is its size once pickled.
+        If a generation is passed, the entry is only added if
+        no entries were invalidated since that generation.
+        """
+        key_hash = SharedMemory.get_hash(key)
+        bucket = self.__get_bucket(key_hash)
+        tags = frozenset(tags)
+        data = pickle.dumps((key, value, tags), protocol=pickle.HIGHEST_PROTOCOL)
+        hashes = [SharedMemory.get_hash(tag) for tag in tags]
+        if self.SLOT.size + len(hashes) * self.TAG.size + len(data) > self.slot_size:
+            logger.debug("Not caching %s, larger than a slot.", key)
+            with self.__lock_bucket(bucket) as m:
+                self.__add(m, bucket, "rejected")
+            return
+        with self.__lock_bucket(bucket) as m:
+            # Invalidations increment the generation before they
+            # lock the buckets, so an entry stored after this check
+            # is still found by any invalidation that follows it.
+            if generation is not None and generation != self.get_generation():
+                logger.debug("Not caching %s, built before an invalidation.", key)
+                return
+            now = time.time()
+            slots = [
+                (offset,) + self.SLOT.unpack_from(m, offset)[:3]
+                for offset in self.__get_slots(bucket)
+            ]
+            target = next((offset for offset, stored, _, _ in slots if stored == key_hash),
+                          None)
+            if target is None:
+                target = next((offset for offset, stored, expires, _ in slots
+                               if not stored or expires + self.stale < now), None)
+            if target is None:
+                target = min(slots, key=lambda slot: slot[3])[0]
+                self.__add(m, bucket, "evictions")
+            if self.SLOT.unpack_from(m, target)[0]:
+                self.__remove(m, bucket, target)
+            start = target + self.SLOT.size
+            for index, tag_hash in enumerate(hashes):
+                self.TAG.pack_into(m, start + index * self.TAG.size, tag_hash)
+            start += len(hashes) * self.TAG.size
+            m[start:start + len(data)] = data
+            self.SLOT.pack_into(m, target, key_hash, now + self.ttl,
+                                self.__add(m, bucket, "tick"), len(hashes), len(data))
+            self.__add(m, bucket, "size")
+            self.__add(m, bucket, "cost", len(data))
+
+    def invalidate(self, *tags) -> int:
+        """
+        Removes every entry tagged with any of the tags.
+        Returns the number of entries removed.
+        Every slot is checked, one bucket at a time, so this
+        is slower than get().
+        """
+        hashes = set(SharedMemory.get_hash(tag) for tag in tags)
+        self.__bump_generation()
+        removed = 0
+        for bucket in range(self.buckets):
+            with self.__lock_bucket(bucket) as m:
+                count = 0
+                for offset in self.__get_slots(bucket):
+                    stored, _, _, tag_count, _ = self.SLOT.unpack_from(m, offset)
+                    if not stored or not tag_count:
+                        continue
+                    start = offset + self.SLOT.size
+                    if hashes.intersection(struct.unpack_from("<{}Q".format(tag_count), m, start)):
+                        self.__remove(m, bucket, offset)
+                        count += 1
+                self.__add(m, bucket, "invalidations", count)
+            removed += count
+        logger.debug("Invalidated %s entries tagged: %s.", removed, tags)
+        return removed
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        self.__bump_generation()
+        for bucket in range(self.buckets):
+            with self.__lock_bucket(bucket) as m:
+                for offset in self.__get_slots(bucket):
+                    self.SLOT.pack_into(m, offset, 0, 0, 0, 0, 0)
+                self.__add(m, bucket, "size", -self.__get_counter(m, bucket, "size"))
+                self.__add(m, bucket, "cost", -self.__get_counter(m, bucket, "cost"))
+
+    def __bump_generation(self) -> None:
+        """
+        Increments the number of invalidations.
+        """
+        with self.__lock_header() as m:
+            self.HEADER.pack_into(m, 0, self.HEADER.unpack_from(m, 0)[0] + 1)
+
+    def get_generation(self) -> int:
+        """
+        Returns the number of invalidations so far.
+        """
+        with self.__lock_header() as m:
+            return self.HEADER.unpack_from(m, 0)[0]
+
+    def get_stats(self) -> dict:
+        """
+        Returns the cache counters, of every process.
+        """
+        counters = dict.fromkeys(self.COUNTERS, 0)
+        for bucket in range(self.buckets):
+            with self.__lock_bucket(bucket) as m:
+                offset = self.HEADER_SIZE + bucket * self.bucket_size
+                values = self.BUCKET_HEADER.unpack_from(m, offset)
+            for name, value in zip(self.COUNTERS, values):
+                counters[name] += value
+        return {
+            "size": counters["size"],
+            "max_size": self.size,
+            "cost": counters["cost"],
+            "budget": self.budget,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "evictions": counters["evictions"],
+            "expirations": counters["expirations"],
+            "invalidations": counters["invalidations"],
+            "stale": counters["stale"],
+            "rejected": counters["rejected"],
+        }
+
+
+class SharedGenerations(Generations):
+    """
+    Generation counters, by entity type, shared by processes.
+
+    Types are mapped to one of COUNTERS counters by hash,
+    so different types may share a counter, which only
+    makes their entries outdated more often.
+    """
+
+    COUNTERS = 64
+
+    def __init__(self, path: str) -> None:
+        """
+        Shared generations initializer.
+        """
+        super().__init__()
+        self.memory = SharedMemory(path, 8 * self.COUNTERS)
+
+    def __get_offset(self, name: str) -> int:
+        """
+        Returns the offset of the counter of a type.
+        """
+        return 8 * (SharedMemory.get_hash(name) % self.COUNTERS)
+
+    def get(self, *types) -> tuple:
+        """
+        Returns the current generations of the types.
+        """
+        with self.memory.lock() as m:
+            return tuple(
+                struct.unpack_from("<q", m, self.__get_offset(name))[0]
+                for name in types
+            )
+
+    def bump(self, *types) -> None:
+        """
+        Increments the generations of the types.
+        """
+        with self.memory.lock() as m:
+            for offset in set(self.__get_offset(name) for name in types):
+                value = struct.unpack_from("<q", m, offset)[0]
+                struct.pack_into("<q", m, offset, value + 1)
+        logger.debug("Generations bumped: %s.", types)
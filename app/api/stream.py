@@ -0,0 +1,75 @@
+"""
+Streamed responses.
+
+Views return a Stream instead of a dict to send a list
+of documents as it is serialized, so the whole list is
+never held in memory.
+"""
+
+import typing
+import logging
+import itertools
+
+from flask import json
+
+logger = logging.getLogger(__name__)
+
+
+class Stream(object):
+    """
+    Streamed list of documents.
+
+    As JSON, documents are sent as an array under a name:
+    {"movies": [{...}, {...}], "next_cursor": "..."}
+    As NDJSON, documents are sent one per line.
+    """
+
+    JSON = "application/json"
+    NDJSON = "application/x-ndjson"
+
+    def __init__(self,
+                 name: str,
+                 items: typing.Iterator,
+                 serialize: typing.Callable,
+                 ndjson: bool=False,
+                 trailer: typing.Callable=None) -> None:
+        """
+        Stream initializer.
+        The first item is loaded here, so that any error is
+        raised by the view, before the response is started.
+        The trailer is called with the last item and the number
+        of items, and returns the keys to add after the array.
+        """
+        items = iter(items)
+        first = next(items, None)
+        self.__items = items if first is None else itertools.chain([first], items)
+        self.__name = name
+        self.__serialize = serialize
+        self.__ndjson = ndjson
+        self.__trailer = trailer
+
+    @property
+    def mimetype(self) -> str:
+        """
+        Stream mimetype.
+        """
+        return self.NDJSON if self.__ndjson else self.JSON
+
+    def __iter__(self) -> typing.Generator:
+        """
+        Yields the response body in chunks, one per document.
+        """
+        if self.__ndjson:
+            for item in self.__items:
+                yield json.dumps(self.__serialize(item)) + "\n"
+            return
+        yield "{" + json.dumps(self.__name) + ": ["
+        last, count = None, 0
+        for last in self.__items:
+            yield ("," if count else "") + json.dumps(self.__serialize(last))
+            count += 1
+        yield "]"
+        for key, value in (self.__trailer(last, count) if self.__trailer else {}).items():
+            yield ", " + json.dumps(key) + ": " + json.dumps(value)
+        yield "}"
+        logger.debug("Streamed %s %s.", count, self.__name)
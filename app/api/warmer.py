@@ -0,0 +1,212 @@
+"""
+Cache Warmer.
+
+Workers start with empty caches, so the first requests after
+a deploy are all misses. The warmer sends GET requests for the
+most requested People and Movies, and for the first pages of
+the lists, through the app, so that both the document and the
+response caches are filled before real requests arrive.
+
+The most requested entities are recorded at runtime in a
+file that survives deploys, and that every worker adds to,
+from a background thread, never while serving a request.
+"""
+
+import os
+import json
+import fcntl
+import typing
+import logging
+import threading
+import collections
+
+from flask import Flask, url_for, request
+
+from .preload import Daemon
+from .controller.movies import MoviesController
+from .controller.people import PeopleController
+
+logger = logging.getLogger(__name__)
+
+
+class Popularity(Daemon):
+    """
+    Access-frequency record of entities, such as ("movie", 1).
+
+    Requests are counted in memory, and added to the counts of
+    the file every interval by the thread of the record, so
+    the file is written at most once per interval per worker.
+    Only the most requested entities of every type are kept in
+    the file. Safe to use from many threads and processes.
+    """
+
+    NAME = "popularity"
+
+    def __init__(self, path: str, interval: float=60, size: int=10000) -> None:
+        """
+        Popularity initializer.
+        Size is the number of entities of every type kept.
+        """
+        super().__init__()
+        if not path or not isinstance(path, str):
+            raise ValueError("Invalid path:", path)
+        if not isinstance(interval, (int, float)) or interval <= 0:
+            raise ValueError("Invalid interval:", interval)
+        if isinstance(size, bool) or not isinstance(size, int) or size <= 0:
+            raise ValueError("Invalid size:", size)
+        self.path = path
+        self.interval = interval
+        self.size = size
+        self.__lock = threading.Lock()
+        self.__pending = collections.Counter()
+
+    def record(self, entity: str, entity_id: int) -> None:
+        """
+        Counts a request of an entity.
+        """
+        with self.__lock:
+            self.__pending[(entity, entity_id)] += 1
+        self.start()
+
+    def run(self, stopped: threading.Event) -> None:
+        """
+        Flushes the counts every interval, until stopped.
+        """
+        while not stopped.wait(self.interval):
+            self.flush()
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Adds the counts of this process to the file, and
+        drops the least requested entities of every type.
+        """
+        with self.__lock:
+            pending, self.__pending = self.__pending, collections.Counter()
+        if not pending:
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            counts = self.load()
+            for (entity, entity_id), count in pending.items():
+                entity_counts = counts.setdefault(entity, {})
+                entity_counts[str(entity_id)] = entity_counts.get(str(entity_id), 0) + count
+            for entity, entity_counts in counts.items():
+                if len(entity_counts) > self.size:
+                    counts[entity] = dict(self.sort(entity_counts)[:self.size])
+            temporary = "{}.{}".format(self.path, os.getpid())
+            with open(temporary, "w") as f:
+                json.dump(counts, f)
+            os.replace(temporary, self.path)
+        logger.debug("Flushed %s counts to: %s.", len(pending), self.path)
+
+    def load(self) -> dict:
+        """
+        Returns the counts of the file, by entity and ID,
+        or an empty dict if the file is missing or invalid.
+        """
+        try:
+            with open(self.path) as f:
+                counts = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning("Invalid popularity file: %s.", self.path)
+            return {}
+        return counts if isinstance(counts, dict) else {}
+
+    @staticmethod
+    def sort(counts: dict) -> list:
+        """
+        Returns the counts of a type, by ID, most requested first.
+        """
+        return sorted(counts.items(), key=lambda item: (-item[1], int(item[0])))
+
+    def get_top(self, entity: str, limit: int) -> list:
+        """
+        Returns the IDs of the most requested entities of a type.
+        """
+        top = self.sort(self.load().get(entity, {}))
+        return [int(entity_id) for entity_id, _ in top[:limit]]
+
+
+class Warmer(object):
+    """
+    Fills the caches by sending GET requests through the app.
+    """
+
+    # Endpoints of the details of every entity, with the name
+    # of their ID argument, and endpoints of the lists.
+    DETAILS = {
+        MoviesController.ENTITY: ("movie", "movie_id"),
+        PeopleController.ENTITY: ("person", "person_id"),
+    }
+    LISTS = ("movies", "people")
+
+    # WSGI environ key of the requests of the warmer, which
+    # clients can not send, unlike headers.
+    ENVIRON = "maria.warmer"
+
+    def __init__(self, app: Flask, popularity: Popularity=None) -> None:
+        """
+        Warmer initializer.
+        """
+        self.app = app
+        self.popularity = popularity
+
+    @classmethod
+    def is_warming(cls) -> bool:
+        """
+        Returns True if the current request was sent by a warmer.
+        """
+        return bool(request.environ.get(cls.ENVIRON))
+
+    def get_paths(self,
+                  top: int=0,
+                  movie_ids: typing.Iterable=(),
+                  person_ids: typing.Iterable=(),
+                  pages: int=0) -> list:
+        """
+        Returns the paths to request: the explicit IDs, the top
+        IDs of the popularity record, and the first pages of
+        every list, without duplicates.
+        """
+        ids = {
+            MoviesController.ENTITY: list(movie_ids),
+            PeopleController.ENTITY: list(person_ids),
+        }
+        if top and self.popularity is not None:
+            for entity in ids:
+                ids[entity].extend(self.popularity.get_top(entity, top))
+        paths = []
+        with self.app.test_request_context():
+            for entity, entity_ids in ids.items():
+                endpoint, argument = self.DETAILS[entity]
+                paths.extend(url_for(endpoint, **{argument: int(entity_id)})
+                             for entity_id in entity_ids)
+            for endpoint in self.LISTS:
+                if pages:
+                    paths.append(url_for(endpoint))
+                paths.extend(url_for(endpoint, page=page) for page in range(2, pages + 1))
+        return list(collections.OrderedDict.fromkeys(paths))
+
+    def warm(self, *args, **kwargs) -> int:
+        """
+        Requests every path of get_paths(), which takes the
+        same arguments. Returns the number of paths warmed.
+        Failures are logged, and do not stop the warming.
+        """
+        warmed = 0
+        client = self.app.test_client()
+        for path in self.get_paths(*args, **kwargs):
+            try:
+                response = client.get(path, environ_base={self.ENVIRON: True})
+            except Exception:
+                logger.exception("Failed to warm: %s.", path)
+                continue
+            if response.status_code == 200:
+                warmed += 1
+            else:
+                logger.warning("Failed to warm %s: %s.", path, response.status_code)
+        logger.info("Warmed %s paths.", warmed)
+        return warmed
@@ -25,14 +25,45 @@ class Config(object):
 
     LOGIN_DISABLED = "LOGIN_DISABLED"
 
+    PRELOAD = "PRELOAD"
+
+    ACCESS_LOG_SAMPLE = "ACCESS_LOG_SAMPLE"
+    ACCESS_LOG_QUEUE = "ACCESS_LOG_QUEUE"
+
     DB_USER = "DB_USER"
     DB_PASS = "DB_PASS"
     DB_HOST = "DB_HOST"
     DB_PORT = "DB_PORT"
     DB_NAME = "DB_NAME"
+    DB_REPLICA_HOSTS = "DB_REPLICA_HOSTS"
+    DB_REPLICA_WINDOW = "DB_REPLICA_WINDOW"
+    DB_POOL_SIZE = "DB_POOL_SIZE"
+    DB_POOL_OVERFLOW = "DB_POOL_OVERFLOW"
+    DB_POOL_RECYCLE = "DB_POOL_RECYCLE"
+    DB_POOL_PRE_PING = "DB_POOL_PRE_PING"
+    DB_POOL_TIMEOUT = "DB_POOL_TIMEOUT"
+
+    CACHE_SIZE = "CACHE_SIZE"
+    CACHE_BYTES = "CACHE_BYTES"
+    CACHE_TTL = "CACHE_TTL"
+    CACHE_STALE = "CACHE_STALE"
+    RESPONSE_CACHE_SIZE = "RESPONSE_CACHE_SIZE"
+    RESPONSE_CACHE_BYTES = "RESPONSE_CACHE_BYTES"
+    CACHE_BACKEND = "CACHE_BACKEND"
+    CACHE_DIRECTORY = "CACHE_DIRECTORY"
+    SINGLE_FLIGHT_TIMEOUT = "SINGLE_FLIGHT_TIMEOUT"
+    BUS_CHANNEL = "BUS_CHANNEL"
+    PROXY_MAX_AGE = "PROXY_MAX_AGE"
+    PURGE_URL = "PURGE_URL"
+    POPULARITY_FILE = "POPULARITY_FILE"
+    MATERIALIZED_DOCUMENTS = "MATERIALIZED_DOCUMENTS"
+    WARM_TOP = "WARM_TOP"
+    WARM_PAGES = "WARM_PAGES"
 
     DB_URI = "SQLALCHEMY_DATABASE_URI"
     DB_TRACK = "SQLALCHEMY_TRACK_MODIFICATIONS"
+    DB_BINDS = "SQLALCHEMY_BINDS"
+    DB_ENGINE_OPTIONS = "SQLALCHEMY_ENGINE_OPTIONS"
 
     @staticmethod
     def get(name: str, default: str=None) -> str:
@@ -50,3 +81,13 @@ class Config(object):
         value = os.environ.get(name, default)
         logger.debug("Config variable '%s' is: %s", name, value)
         return value
+
+    @classmethod
+    def get_flag(cls, name: str, default: str="no") -> bool:
+        """
+        Retrieve a boolean config value from OS env.
+        Only "yes", "true" or "1" enable it, in any case.
+
+        @raises: TypeError, ValueError.
+        """
+        return cls.get(name, default).lower() in ("yes", "true", "1")
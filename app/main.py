@@ -5,14 +5,20 @@ This file is required by the Docker image:
 https://github.com/tiangolo/uwsgi-nginx-flask-docker
 """
 
+import os
+import random
 import logging
 
+import click
+
 from config import Config
 from urls import URL
 
 from flask import Flask, url_for, redirect
 
+import api
 import api.health
+import api.metrics
 import api.auth
 import api.people
 import api.movies
@@ -20,6 +26,21 @@ import api.roles
 
 from api.controller.users import login_manager, AuthController
 from api.controller.models import db
+from api.controller import Controller
+from api.controller.bus import Bus
+from api.controller.movies import MoviesController
+from api.controller.people import PeopleController
+from api.controller.roles import RolesController
+from api.controller.router import Router
+from api.controller.pool import MonitoredPool
+from api.controller.migrations import Migrator
+from api.serializers import Serializer
+from api.cache import Cache, SingleFlight
+from api.shared import SharedCache, SharedGenerations
+from api.purge import Purger
+from api.warmer import Popularity, Warmer
+from api.preload import Preload
+from api.access import AccessLog
 
 logger = logging.getLogger(__name__)
 
@@ -68,26 +89,115 @@ def create_app() -> Flask:
     uri = 'postgresql+psycopg2://{}:{}@{}:{}/{}'.format(*DB_CFG)
     app.config[Config.DB_URI] = uri
     app.config[Config.DB_TRACK] = False
-    del DB_CFG, uri
+
+    # Replicas are comma-separated "host:port" pairs, with the
+    # user, password and name of the primary. GET requests read
+    # from them, unless the client wrote within the window.
+    hosts = [host.strip() for host in Config.get(Config.DB_REPLICA_HOSTS, "").split(",")]
+    app.config[Config.DB_BINDS] = {
+        "replica-{}".format(index): 'postgresql+psycopg2://{}:{}@{}/{}'.format(
+            DB_CFG[0], DB_CFG[1], host, DB_CFG[4])
+        for index, host in enumerate(host for host in hosts if host)
+    }
+    Router.REPLICAS = tuple(sorted(app.config[Config.DB_BINDS]))
+    Router.WINDOW = float(Config.get(Config.DB_REPLICA_WINDOW, "5"))
+    if Router.REPLICAS:
+        Controller.listen(Router.written)
+    del DB_CFG, uri, hosts
+
+    # Every worker has its own pools, of the primary and of
+    # every replica, with the same options. The defaults are
+    # those of SQLAlchemy. Recycle is -1 for no recycling.
+    # Pre-ping is enabled by "yes", "true" or "1" only.
+    app.config[Config.DB_ENGINE_OPTIONS] = {
+        "poolclass": MonitoredPool,
+        "pool_size": int(Config.get(Config.DB_POOL_SIZE, "5")),
+        "max_overflow": int(Config.get(Config.DB_POOL_OVERFLOW, "10")),
+        "pool_recycle": int(Config.get(Config.DB_POOL_RECYCLE, "-1")),
+        "pool_pre_ping": Config.get_flag(Config.DB_POOL_PRE_PING),
+        "pool_timeout": float(Config.get(Config.DB_POOL_TIMEOUT, "30")),
+    }
+    # Connections are opened on the first query. The schema
+    # is managed with "flask migrate", run once per deploy.
     db.init_app(app)
-    with app.app_context():
-        db.create_all()
-        db.session.commit()
     logger.debug("Connection with DB initialized!")
 
-    # Creating an admin.
-    # WARNING: This piece of code has been created for the demo.
-    #          This user will be used for testing purposes.
-    if Config.get(Config.ADMIN_PASSWORD):
-        with app.app_context():
-            logger.warning("Setting admin password.")
-            AuthController.create_admin(password=Config.get(Config.ADMIN_PASSWORD),
-                                        username=Config.get(Config.ADMIN_USERNAME))
-            logger.warning("Admin password updated!")
+    # Caching serialized documents and public GET responses.
+    # Shared caches are shared by every worker of the node.
+    logger.debug("Initializing caches.")
+    ttl = float(Config.get(Config.CACHE_TTL, "300"))
+    documents = int(Config.get(Config.CACHE_SIZE, "1024"))
+    document_budget = int(Config.get(Config.CACHE_BYTES, "67108864"))
+    responses = int(Config.get(Config.RESPONSE_CACHE_SIZE, "1024"))
+    budget = int(Config.get(Config.RESPONSE_CACHE_BYTES, "67108864"))
+    stale = float(Config.get(Config.CACHE_STALE, "0"))
+    if Config.get(Config.CACHE_BACKEND, "memory") == "shared":
+        directory = Config.get(Config.CACHE_DIRECTORY, "/dev/shm")
+        Serializer.CACHE = SharedCache(os.path.join(directory, "maria-documents"),
+                                       size=documents,
+                                       ttl=ttl,
+                                       slot_size=max(document_budget // documents, 1024))
+        api.API.RESPONSES = SharedCache(os.path.join(directory, "maria-responses"),
+                                        size=responses,
+                                        ttl=ttl,
+                                        slot_size=max(budget // responses, 1024),
+                                        stale=stale)
+        api.API.GENERATIONS = SharedGenerations(os.path.join(directory, "maria-generations"))
+    else:
+        Serializer.CACHE = Cache(size=documents, ttl=ttl)
+        api.API.RESPONSES = Cache(size=responses, ttl=ttl, budget=budget, stale=stale)
+    api.API.FLIGHTS = SingleFlight(timeout=float(Config.get(Config.SINGLE_FLIGHT_TIMEOUT, "5")))
+    del ttl, documents, document_budget, responses, budget, stale
+    logger.debug("Caches initialized!")
+
+    # Listening to the writes of every other process, which
+    # evict the cached entries of this process. Every worker
+    # starts listening on its first request.
+    channel = Config.get(Config.BUS_CHANNEL, "maria_invalidations")
+    if channel:
+        logger.debug("Initializing invalidation bus.")
+
+        def reset() -> None:
+            Serializer.CACHE.clear()
+            api.API.GENERATIONS.bump(MoviesController.ENTITY, PeopleController.ENTITY)
+
+        def listen() -> None:
+            if not Warmer.is_warming():
+                bus.start()
+
+        # The bus of the master is stopped before the fork, and
+        # never started by the warmer, so its thread and its
+        # connection are never inherited by the workers.
+        Bus.CHANNEL = channel
+        bus = Bus(app.config[Config.DB_URI], channel=channel, reset=reset)
+        app.before_request(listen)
+        Preload.before_fork(bus.stop)
+        Preload.after_fork(bus.start)
+        logger.debug("Invalidation bus initialized!")
+    del channel
+
+    # Materializing the documents of the changed entities in
+    # the document table, after every write of this worker.
+    if Config.get_flag(Config.MATERIALIZED_DOCUMENTS):
+        Serializer.MATERIALIZED = True
+        Controller.listen(Serializer.refresh, remote=False)
+
+    # Purging the responses of the changed entities from the
+    # reverse proxy in front of the API, after every write.
+    api.API.PROXY_MAX_AGE = int(Config.get(Config.PROXY_MAX_AGE, "0"))
+    url = Config.get(Config.PURGE_URL)
+    if url:
+        logger.debug("Initializing purger.")
+        purger = Purger(url)
+        Controller.listen(purger.purge, remote=False)
+        Preload.before_fork(purger.stop)
+        logger.debug("Purger initialized!")
+    del url
 
     # Registering app views.
     logger.debug("Registering views.")
     app.add_url_rule(URL.HEALTH, view_func=api.health.HealthAPI.as_view('health'))
+    app.add_url_rule(URL.METRICS, view_func=api.metrics.MetricsAPI.as_view('metrics'))
     app.add_url_rule(URL.AUTH, view_func=api.auth.AuthAPI.as_view('auth'))
     app.add_url_rule(URL.PEOPLE, view_func=api.people.PeopleAPI.as_view('people'))
     app.add_url_rule(URL.PERSON, view_func=api.people.PersonAPI.as_view('person'))
@@ -107,6 +217,80 @@ def create_app() -> Flask:
                      view_func=api.roles.DirectorAPI.as_view('director_movie'))
     logger.debug("All views registered.")
 
+    # Logging every request once, in the background. Successful
+    # requests are sampled, and server errors always logged.
+    sample = float(Config.get(Config.ACCESS_LOG_SAMPLE, "1"))
+    if sample:
+        api.API.ACCESS_LOG = AccessLog(sample=sample,
+                                       size=int(Config.get(Config.ACCESS_LOG_QUEUE, "10000")))
+        api.API.ACCESS_LOG.init_app(app)
+    del sample
+
+    # Counting the requests of every Person and Movie, so that
+    # the most requested ones are preloaded after a deploy.
+    path = Config.get(Config.POPULARITY_FILE)
+    api.API.POPULARITY = Popularity(path) if path else None
+    warmer = Warmer(app, popularity=api.API.POPULARITY)
+    del path
+
+    @app.cli.command("warm")
+    @click.option("--top", default=0, help="Number of most requested People and Movies.")
+    @click.option("--movies", default="", help="Comma-separated Movie IDs.")
+    @click.option("--people", default="", help="Comma-separated Person IDs.")
+    @click.option("--pages", default=1, help="Number of pages of every list.")
+    def warm(top: int, movies: str, people: str, pages: int) -> None:
+        """
+        Preloading the caches.
+        """
+        warmed = warmer.warm(top=top,
+                             movie_ids=[int(i) for i in movies.split(",") if i.strip()],
+                             person_ids=[int(i) for i in people.split(",") if i.strip()],
+                             pages=pages)
+        click.echo("Warmed {} paths.".format(warmed))
+
+    @app.cli.command("repair-counts")
+    def repair_counts() -> None:
+        """
+        Counting the roles of every Person and Movie again.
+        """
+        people, movies = RolesController.repair_counts()
+        click.echo("Repaired {} People and {} Movies.".format(people, movies))
+
+    @app.cli.command("materialize")
+    @click.option("--batch", default=100, help="Number of documents per query.")
+    def materialize(batch: int) -> None:
+        """
+        Materializing every missing or outdated document.
+        """
+        count = Serializer.materialize_outdated(batch=batch)
+        click.echo("Materialized {} documents.".format(count))
+
+    @app.cli.command("migrate")
+    def migrate() -> None:
+        """
+        Creating and upgrading the DB schema.
+        """
+        for name in Migrator.migrate():
+            click.echo("Applied: {}.".format(name))
+        click.echo("Schema up to date.")
+
+    # Creating an admin.
+    # WARNING: This piece of code has been created for the demo.
+    #          This user will be used for testing purposes.
+    @app.cli.command("create-admin")
+    @click.option("--username", default=Config.get(Config.ADMIN_USERNAME, "admin"),
+                  help="Username of the admin. ADMIN_USERNAME by default.")
+    @click.option("--password", default=Config.get(Config.ADMIN_PASSWORD),
+                  help="Password of the admin. ADMIN_PASSWORD by default.")
+    def create_admin(username: str, password: str) -> None:
+        """
+        Creating an admin, or updating its password.
+        """
+        if not password:
+            raise click.UsageError("Missing password.")
+        AuthController.create_admin(password=password, username=username)
+        click.echo("Admin '{}' updated.".format(username))
+
     # Adding index vies.
     @app.route(URL.INDEX)
     def index():
@@ -116,11 +300,68 @@ def create_app() -> Flask:
         logger.debug("Redirecting all traffic to the index.")
         return redirect(url_for("health"))
 
+    # In preload mode, closing the connections of the master
+    # before the workers are forked from it, so that every
+    # worker opens its own, and reads from its own replicas.
+    def dispose() -> None:
+        with app.app_context():
+            Controller.dispose()
+
+    Preload.before_fork(dispose)
+    Preload.after_fork(dispose)
+    Preload.after_fork(random.seed)
+    if api.API.POPULARITY is not None:
+        Preload.before_fork(api.API.POPULARITY.stop)
+    if api.API.ACCESS_LOG is not None:
+        Preload.before_fork(api.API.ACCESS_LOG.stop)
+
     # End of app factory.
     logger.info("App started!")
     return app
 
+
+def startup(app: Flask) -> None:
+    """
+    Preloading the caches before any request is served, with
+    the WARM_TOP most requested People and Movies, and the
+    first WARM_PAGES pages of every list.
+    """
+    top = int(Config.get(Config.WARM_TOP, "0"))
+    pages = int(Config.get(Config.WARM_PAGES, "0"))
+    if top or pages:
+        logger.debug("Warming caches.")
+        Warmer(app, popularity=api.API.POPULARITY).warm(top=top, pages=pages)
+        logger.debug("Caches warmed!")
+
+
+# uWSGI is the only server that provides the "uwsgi" module.
+# "flask" commands, such as "flask migrate", import this
+# module too, but never serve requests, nor fork.
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+
+# In preload mode, the app is created once in the master
+# process, and shared with every worker forked from it.
+# Only the master of uWSGI, worker 0, forks the workers,
+# while with lazy-apps every worker creates its own app.
+# Elsewhere, the garbage collector would never be enabled.
+preload = uwsgi is not None and uwsgi.worker_id() == 0 and \
+    Config.get_flag(Config.PRELOAD) and Preload.install()
+if preload:
+    Preload.begin()
 app = create_app()
+
+# The caches are warmed only when the app is served, and
+# never by "flask" commands. In preload mode, this is done
+# once, in the master, and every worker shares them.
+if uwsgi is not None:
+    startup(app)
+if preload:
+    Preload.prepare()
+del preload
 if __name__ == "__main__":
     # Only for debugging while developing
+    startup(app)
     app.run(host='0.0.0.0', debug=True, port=5000)
@@ -0,0 +1,9 @@
+#! /usr/bin/env bash
+# Run by the Docker image before uWSGI starts the workers.
+# Creating and upgrading the DB schema, and the admin, once.
+set -e
+export FLASK_APP=main.py
+flask migrate
+if [ -n "$ADMIN_PASSWORD" ]; then
+    flask create-admin
+fi
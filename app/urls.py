@@ -9,6 +9,7 @@ class URL(object):
     """
     INDEX = "/"
     HEALTH = "/health"
+    METRICS = "/metrics"
     AUTH = "/api/v1/auth"
     PEOPLE = "/api/v1/people"
     PERSON = "/api/v1/people/<int:person_id>"
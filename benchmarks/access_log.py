@@ -0,0 +1,85 @@
+"""
+Request Logging Benchmark.
+
+Compares the time per request of an app that logs every
+request like the views used to, with two ERROR records with
+tracebacks and the JSON body of the request, against the
+access log, with and without sampling, and against no log.
+Logs are written to /dev/null, with the format of the app.
+
+Usage:
+    PYTHONPATH=.:app python benchmarks/access_log.py --requests 5000
+"""
+
+import os
+import time
+import logging
+import argparse
+
+from flask import Flask, request
+
+from app.api.access import AccessLog
+
+LOGGER_FORMAT = '%(asctime)s [%(levelname)s] [%(filename)s:%(lineno)s] %(message)s'
+
+logger = logging.getLogger("benchmark")
+
+
+def get_app(mode: str) -> Flask:
+    """
+    Creates an app with one route, logged as in the mode.
+    """
+    app = Flask(mode)
+    if mode.startswith("access"):
+        sample = 0.1 if mode.endswith("sampled") else 1.0
+        AccessLog(sample=sample, handler=logging.FileHandler(os.devnull)).init_app(app)
+
+    @app.route("/movies/<int:movie_id>")
+    def movie(movie_id: int) -> str:
+        if mode == "before":
+            try:
+                logger.debug("[%s] [%s] [%s]", "GET", movie, request.json)
+                response = "{}"
+                logger.debug("[%s] [%s] [%s]", "GET", movie, response)
+            finally:
+                logger.exception("[%s] [%s] [OK]", "GET", movie)
+                logger.exception("[%s] [%s] [END]", "GET", movie)
+        return "{}"
+
+    return app
+
+
+def measure(app: Flask, requests: int) -> float:
+    """
+    Returns the time per request, in microseconds.
+    """
+    client = app.test_client()
+    for _ in range(100):
+        client.get("/movies/1")
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get("/movies/1")
+    return (time.perf_counter() - start) / requests * 1000000
+
+
+def main() -> None:
+    """
+    Measures every mode, and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    handler = logging.FileHandler(os.devnull)
+    handler.setFormatter(logging.Formatter(LOGGER_FORMAT))
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.INFO)
+    results = {}
+    for mode in ("none", "before", "access", "access-sampled"):
+        results[mode] = measure(get_app(mode), args.requests)
+    for mode, micros in results.items():
+        print("{:16} {:8.1f} us per request, {:8.1f} us of logging".format(
+            mode, micros, micros - results["none"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Preload Memory Benchmark.
+
+Measures the private memory of workers forked from a master
+that holds a warmed document cache, as after a preload, with
+and without the preload mode, and prints the memory saved
+per worker. Every worker runs a full garbage collection, as
+every worker does sooner or later, and then reports its
+private memory, while the master waits for every worker, so
+that no page stops being shared before it is measured.
+
+Usage:
+    PYTHONPATH=.:app python benchmarks/memory.py --workers 4 --documents 20000
+"""
+
+import os
+import gc
+import sys
+import json
+import argparse
+import subprocess
+
+from app.api.cache import Cache
+from app.api.preload import Preload
+from app.api.serializers import Serializer
+
+
+def get_private_kb() -> int:
+    """
+    Returns the private memory of this process, in KB.
+    """
+    total = 0
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1])
+    return total
+
+
+def warm(documents: int) -> None:
+    """
+    Fills the document cache with documents shaped like Movies.
+    """
+    Serializer.CACHE = Cache(size=documents, ttl=3600)
+    for movie_id in range(documents):
+        Serializer.CACHE.set(("movie", movie_id), {
+            "id": movie_id,
+            "title": "Movie {}".format(movie_id),
+            "is_active": True,
+            "release": {"year": 1900 + movie_id % 120, "roman": "MCM"},
+            "actors": [{"id": person_id, "alias": ["Alias {}".format(person_id)]}
+                       for person_id in range(movie_id % 7)],
+            "counts": {"actors": movie_id % 7, "directors": 1, "producers": 0},
+        }, tags={"movie:{}".format(movie_id)})
+
+
+def run(workers: int, documents: int, preload: bool) -> list:
+    """
+    Forks the workers of a warmed master.
+    Returns the private memory of every worker, in KB.
+    """
+    if preload:
+        Preload.begin()
+    warm(documents)
+    if preload:
+        Preload.prepare()
+    pipes = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        done_read, done_write = os.pipe()
+        if os.fork() == 0:
+            if preload:
+                Preload.forked()
+            gc.collect()
+            os.write(write, str(get_private_kb()).encode())
+            os.read(done_read, 1)
+            os._exit(0)
+        pipes.append((read, done_write))
+    sizes = [int(os.read(read, 64)) for read, _ in pipes]
+    for _, done_write in pipes:
+        os.write(done_write, b"x")
+    for _ in range(workers):
+        os.wait()
+    return sizes
+
+
+def main() -> None:
+    """
+    Runs both modes, each in a new process, and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--mode", choices=["plain", "preload"])
+    args = parser.parse_args()
+    if args.mode is not None:
+        print(json.dumps(run(args.workers, args.documents, args.mode == "preload")))
+        return
+    results = {}
+    for mode in ("plain", "preload"):
+        output = subprocess.check_output([
+            sys.executable, __file__,
+            "--workers", str(args.workers),
+            "--documents", str(args.documents),
+            "--mode", mode,
+        ])
+        sizes = json.loads(output.decode().strip().splitlines()[-1])
+        results[mode] = sum(sizes) / len(sizes)
+        print("{:8} private memory per worker: {:10.0f} KB".format(mode, results[mode]))
+    print("{:8} saved per worker:          {:10.0f} KB".format(
+        "", results["plain"] - results["preload"]))
+    if not hasattr(gc, "freeze"):
+        print("Objects can not be frozen before Python 3.7, so nothing is saved.")
+
+
+if __name__ == "__main__":
+    main()
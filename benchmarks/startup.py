@@ -0,0 +1,70 @@
+"""
+Startup Benchmark.
+
+Measures how long a worker takes to start: the time to import
+the modules of the app, and the duration of create_app(), in
+new processes, without a database, since create_app() does no
+I/O. Caches are not warmed.
+
+Usage:
+    PYTHONPATH=.:app python benchmarks/startup.py --runs 10
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Run in every new process: imports every module that main
+# imports, then main itself, which calls create_app(), and
+# then calls create_app() on its own.
+PROBE = """
+import json, logging, time
+start = time.perf_counter()
+import click, flask, flask_sqlalchemy, flask_login, sqlalchemy
+import api, api.health, api.metrics, api.auth, api.people, api.movies, api.roles
+import api.controller.bus, api.shared, api.purge, api.warmer, api.preload
+import api.controller.migrations, api.controller.router, api.controller.pool
+imported = time.perf_counter()
+import main
+loaded = time.perf_counter()
+logging.disable(logging.CRITICAL)
+created = time.perf_counter()
+main.create_app()
+done = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "main": loaded - imported,
+    "create_app": done - created,
+}))
+"""
+
+
+def main() -> None:
+    """
+    Runs the probe, and prints the median times.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    env = dict(os.environ, WARM_TOP="0", WARM_PAGES="0", PRELOAD="", POPULARITY_FILE="")
+    results = {}
+    for _ in range(args.runs):
+        output = subprocess.check_output([sys.executable, "-c", PROBE],
+                                         env=env,
+                                         stderr=subprocess.DEVNULL)
+        times = json.loads(output.decode().strip().splitlines()[-1])
+        for name, seconds in times.items():
+            results.setdefault(name, []).append(seconds)
+    print("import of the modules:     {:8.1f} ms".format(
+        statistics.median(results["import"]) * 1000))
+    print("import of main:            {:8.1f} ms".format(
+        statistics.median(results["main"]) * 1000))
+    print("create_app():              {:8.1f} ms".format(
+        statistics.median(results["create_app"]) * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,4 +9,7 @@ export DB_NAME="maria_dataveis"
 export ADMIN_PASSWORD="admin"
 export ADMIN_USERNAME="admin"
 # export LOGIN_DISABLED="maria_dataveis"
+export FLASK_APP=app/main.py
+flask migrate
+flask create-admin
 python3 app/main.py
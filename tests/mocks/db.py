@@ -44,3 +44,15 @@ class DatabaseMock(Mock):
         db.session.delete() mocker
         """
         logger.debug("Deleting from db session.")
+
+    def execute(self, *args, **kwargs) -> None:
+        """
+        db.session.execute() mocker
+        """
+        logger.debug("Executing statement.")
+
+    def flush(self, *args, **kwargs) -> None:
+        """
+        db.session.flush() mocker
+        """
+        logger.debug("Flushing DB changes.")
@@ -39,6 +39,36 @@ class QueryMock(Mock):
         """
         return self
 
+    def options(self, *args, **kwargs) -> Mock:
+        """
+        Loader options mocker.
+        """
+        return self
+
+    def order_by(self, *args, **kwargs) -> Mock:
+        """
+        Order mocker.
+        """
+        return self
+
+    def limit(self, *args, **kwargs) -> Mock:
+        """
+        Limit mocker.
+        """
+        return self
+
+    def offset(self, *args, **kwargs) -> Mock:
+        """
+        Offset mocker.
+        """
+        return self
+
+    def yield_per(self, *args, **kwargs) -> list:
+        """
+        Mocking Model.query.yield_per() results.
+        """
+        return self.all()
+
     def first(self) -> Mock:
         """
         Mocking Person.query.filter(..).first().
@@ -85,6 +115,13 @@ class QueryMock(Mock):
         """
         return self
 
+    @property
+    def id(self) -> Mock:
+        """
+        Mocking Model.id column.
+        """
+        return self
+
     @property
     def value(self) -> Mock:
         """
@@ -0,0 +1,135 @@
+"""
+Testing app.api.access library.
+"""
+
+import json
+import logging
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from app import api
+from app.api import access, metrics, errors
+
+
+class Collector(logging.Handler):
+    """
+    Handler that keeps the lines it writes.
+    """
+
+    def __init__(self) -> None:
+        """
+        Collector initializer.
+        """
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Keeps a formatted record.
+        """
+        self.lines.append(self.format(record))
+
+
+class TestAccessLog(unittest.TestCase):
+    """
+    Testing AccessLog class.
+    """
+
+    def get_app(self, log: access.AccessLog) -> Flask:
+        """
+        Creates an app with a route that queries a database,
+        and a route that fails.
+        """
+        app = Flask(__name__)
+        engine = create_engine("sqlite://")
+        log.init_app(app)
+
+        @app.route("/movies/<int:movie_id>")
+        def movie(movie_id: int) -> str:
+            engine.execute(text("SELECT 1"))
+            engine.execute(text("SELECT 2"))
+            return "OK"
+
+        @app.route("/fail")
+        def fail() -> tuple:
+            return "FAILED", 500
+
+        return app
+
+    def test_record(self) -> None:
+        """
+        Test AccessLog.record().
+        One JSON line is written per request.
+        """
+        collector = Collector()
+        log = access.AccessLog(handler=collector)
+        client = self.get_app(log).test_client()
+        self.assertEqual(client.get("/movies/12").status_code, 200)
+        client.get("/fail")
+        log.stop()
+        self.assertEqual(len(collector.lines), 2)
+        record = json.loads(collector.lines[0])
+        self.assertEqual(record["method"], "GET")
+        self.assertEqual(record["route"], "/movies/<int:movie_id>")
+        self.assertEqual(record["path"], "/movies/12")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["bytes"], 2)
+        self.assertEqual(record["queries"], 2)
+        self.assertGreaterEqual(record["duration_ms"], record["db_ms"])
+        self.assertTrue(record["time"])
+        self.assertEqual(json.loads(collector.lines[1])["status"], 500)
+        self.assertEqual(log.get_stats(), {"records": 2, "skipped": 0, "dropped": 0})
+
+    def test_sample(self) -> None:
+        """
+        Test AccessLog.record().
+        Successful requests are sampled, and server errors are not.
+        """
+        collector = Collector()
+        log = access.AccessLog(sample=0, handler=collector)
+        client = self.get_app(log).test_client()
+        client.get("/movies/12")
+        client.get("/fail")
+        log.stop()
+        self.assertEqual([json.loads(line)["status"] for line in collector.lines], [500])
+        self.assertEqual(log.get_stats(), {"records": 1, "skipped": 1, "dropped": 0})
+        with self.assertRaises(ValueError):
+            access.AccessLog(sample=2)
+
+    def test_dropped(self) -> None:
+        """
+        Test AccessHandler.enqueue().
+        Records are dropped, without blocking, when the queue is full.
+        """
+        handler = access.AccessHandler(size=1)
+        record = logging.makeLogRecord({"msg": "access"})
+        handler.handle(record)
+        handler.handle(record)
+        self.assertEqual(handler.dropped, 1)
+        self.assertIs(handler.queue.get_nowait(), record)
+
+
+class TestViewLogging(unittest.TestCase):
+    """
+    Testing the logs of the views.
+    """
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    def test_no_traceback(self, *args) -> None:
+        """
+        Test API.get().
+        Successful requests, and client errors, are not logged with a traceback.
+        """
+        with patch.object(api, "logger") as logger:
+            metrics.MetricsAPI().get()
+            metrics.MetricsAPI().post()
+            logger.exception.assert_not_called()
+        with patch.object(api, "logger") as logger, \
+                patch.object(metrics.MetricsAPI, "_get", side_effect=RuntimeError):
+            _, code = metrics.MetricsAPI().get()
+            self.assertEqual(code, errors.MariaException.CODE)
+            self.assertEqual(logger.exception.call_count, 1)
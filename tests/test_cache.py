@@ -0,0 +1,257 @@
+"""
+Testing app.api.cache library.
+"""
+
+import time
+import unittest
+import threading
+from unittest.mock import patch
+
+from app.api import cache
+
+from .utils.random import Random
+
+
+class TestCache(unittest.TestCase):
+    """
+    Testing Cache class.
+    """
+
+    def test_arguments(self) -> None:
+        """
+        Test cache.Cache() arguments.
+        """
+        with self.assertRaises(ValueError):
+            cache.Cache(size=0)
+        with self.assertRaises(ValueError):
+            cache.Cache(size=Random.get_str())
+        with self.assertRaises(ValueError):
+            cache.Cache(ttl=-1)
+        with self.assertRaises(ValueError):
+            cache.Cache(budget=0)
+        with self.assertRaises(ValueError):
+            cache.Cache(stale=-1)
+
+    def test_lru(self) -> None:
+        """
+        Test cache.Cache() evicting the least recently used entry.
+        """
+        c = cache.Cache(size=2)
+        c.set("a", 1)
+        c.set("b", 2)
+        self.assertEqual(c.get("a"), (1, frozenset()))
+        c.set("c", 3)
+        self.assertEqual(c.get("b"), (None, None))
+        self.assertEqual(c.get("a")[0], 1)
+        self.assertEqual(c.get("c")[0], 3)
+        stats = c.get_stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_budget(self) -> None:
+        """
+        Test cache.Cache() evicting entries over its budget.
+        """
+        c = cache.Cache(budget=10)
+        c.set("a", b"1234", cost=4)
+        c.set("b", b"1234", cost=4)
+        c.set("c", b"1234", cost=4)
+        self.assertEqual(c.get("a"), (None, None))
+        self.assertEqual(c.get("b")[0], b"1234")
+        c.set("d", b"12345678901", cost=11)
+        self.assertEqual(c.get("d"), (None, None))
+        self.assertEqual(c.get("b")[0], b"1234")
+        stats = c.get_stats()
+        self.assertEqual(stats["cost"], 8)
+        self.assertEqual(stats["budget"], 10)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["rejected"], 1)
+        c.invalidate()
+        c.clear()
+        self.assertEqual(c.get_stats()["cost"], 0)
+
+    def test_ttl(self) -> None:
+        """
+        Test cache.Cache() expiring entries.
+        """
+        c = cache.Cache(ttl=10)
+        with patch.object(cache.time, "monotonic", return_value=100):
+            c.set("a", 1)
+        with patch.object(cache.time, "monotonic", return_value=105):
+            self.assertEqual(c.get("a")[0], 1)
+        with patch.object(cache.time, "monotonic", return_value=111):
+            self.assertEqual(c.get("a"), (None, None))
+        self.assertEqual(c.get_stats()["expirations"], 1)
+
+    def test_stale_entries(self) -> None:
+        """
+        Test cache.Cache() keeping expired entries for the stale time.
+        """
+        c = cache.Cache(ttl=10, stale=20)
+        with patch.object(cache.time, "monotonic", return_value=100):
+            c.set("a", 1)
+        with patch.object(cache.time, "monotonic", return_value=105):
+            self.assertEqual(c.get_stale("a"), (None, None))
+        with patch.object(cache.time, "monotonic", return_value=115):
+            self.assertEqual(c.get("a"), (None, None))
+            self.assertEqual(c.get_stale("a")[0], 1)
+        with patch.object(cache.time, "monotonic", return_value=131):
+            self.assertEqual(c.get_stale("a"), (None, None))
+        stats = c.get_stats()
+        self.assertEqual(stats["stale"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["size"], 0)
+
+    def test_invalidate(self) -> None:
+        """
+        Test cache.Cache() invalidating entries by tag.
+        """
+        c = cache.Cache()
+        c.set("a", 1, {"movie:1", "person:1"})
+        c.set("b", 2, {"movie:2", "person:1"})
+        c.set("c", 3, {"movie:3"})
+        self.assertEqual(c.invalidate("person:1"), 2)
+        self.assertEqual(c.get("a"), (None, None))
+        self.assertEqual(c.get("b"), (None, None))
+        self.assertEqual(c.get("c")[0], 3)
+        self.assertEqual(c.invalidate("movie:1"), 0)
+        self.assertEqual(c.get_stats()["invalidations"], 2)
+
+    def test_fetch(self) -> None:
+        """
+        Test cache.Cache.fetch() collecting tags of nested entries.
+        """
+        c = cache.Cache()
+
+        def inner() -> int:
+            c.tag("person:1")
+            return 1
+
+        def outer() -> int:
+            c.tag("movie:1")
+            return c.fetch("inner", inner) + 1
+
+        self.assertEqual(c.fetch("outer", outer), 2)
+        self.assertEqual(c.get("outer"), (2, frozenset({"movie:1", "person:1"})))
+        self.assertEqual(c.get("inner"), (1, frozenset({"person:1"})))
+        c.invalidate("person:1")
+        self.assertEqual(c.get_stats()["size"], 0)
+
+    def test_stale(self) -> None:
+        """
+        Test cache.Cache.fetch() not storing values built
+        while entries were invalidated.
+        """
+        c = cache.Cache()
+
+        def build() -> int:
+            c.invalidate("movie:1")
+            return 1
+
+        self.assertEqual(c.fetch("a", build), 1)
+        self.assertEqual(c.get("a"), (None, None))
+
+
+class TestGenerations(unittest.TestCase):
+    """
+    Testing Generations class.
+    """
+
+    def test_bump(self) -> None:
+        """
+        Test cache.Generations.bump().
+        """
+        g = cache.Generations()
+        self.assertEqual(g.get("movie", "person"), (0, 0))
+        g.bump("movie", "movie")
+        self.assertEqual(g.get("movie", "person"), (1, 0))
+        g.bump("person", "movie")
+        self.assertEqual(g.get("person", "movie"), (1, 2))
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Testing SingleFlight class.
+    """
+
+    def run_threads(self, flight: cache.SingleFlight, function: object, count: int=5) -> list:
+        """
+        Calls a function with the same key from many threads.
+        Returns the results.
+        """
+        results = []
+
+        def call() -> None:
+            results.append(flight.do("key", function))
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_arguments(self) -> None:
+        """
+        Test cache.SingleFlight() arguments.
+        """
+        with self.assertRaises(ValueError):
+            cache.SingleFlight(timeout=0)
+
+    def test_shared(self) -> None:
+        """
+        Test cache.SingleFlight.do() sharing the result of a call.
+        """
+        flight = cache.SingleFlight()
+        calls = []
+
+        def function() -> int:
+            calls.append(1)
+            time.sleep(0.2)
+            return len(calls)
+
+        self.assertEqual(self.run_threads(flight, function), [1] * 5)
+        self.assertEqual(flight.get_stats(), {"calls": 1, "shared": 4, "timeouts": 0})
+        self.assertEqual(flight.do("key", function), 2)
+
+    def test_timeout(self) -> None:
+        """
+        Test cache.SingleFlight.do() calling the function on timeouts.
+        """
+        flight = cache.SingleFlight(timeout=0.05)
+        calls = []
+
+        def function() -> int:
+            calls.append(1)
+            time.sleep(0.3)
+            return 1
+
+        self.run_threads(flight, function, count=3)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(flight.get_stats()["timeouts"], 2)
+
+    def test_error(self) -> None:
+        """
+        Test cache.SingleFlight.do() not sharing errors.
+        """
+        flight = cache.SingleFlight()
+        calls = []
+
+        def function() -> int:
+            calls.append(1)
+            time.sleep(0.2)
+            if len(calls) == 1:
+                raise RuntimeError()
+            return len(calls)
+
+        thread = threading.Thread(target=self.assertRaises,
+                                  args=(RuntimeError, flight.do, "key", function))
+        thread.start()
+        time.sleep(0.05)
+        results = self.run_threads(flight, function, count=3)
+        thread.join()
+        self.assertEqual(results, [2, 2, 2])
+        self.assertEqual(len(calls), 2)
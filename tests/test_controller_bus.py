@@ -0,0 +1,122 @@
+"""
+Testing app.api.controller.bus library.
+"""
+
+import os
+import json
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine
+
+from app.api.controller import bus, Controller
+
+from .utils.random import Random
+
+
+class TestBus(unittest.TestCase):
+    """
+    Testing Bus class.
+    """
+
+    def test_arguments(self) -> None:
+        """
+        Test bus.Bus() arguments.
+        """
+        with self.assertRaises(ValueError):
+            bus.Bus(None)
+        with self.assertRaises(ValueError):
+            bus.Bus("postgresql://", channel="lorem; DROP TABLE entity_movie")
+
+    def test_publish(self) -> None:
+        """
+        Test bus.Bus.publish().
+        """
+        session = MagicMock()
+        bus.Bus.publish(session, ("movie", 1))
+        self.assertFalse(session.execute.called)
+        with patch.object(bus.Bus, "CHANNEL", "lorem"):
+            bus.Bus.publish(session, ("movie", 1), ("person", 2))
+        params = session.execute.call_args[0][1]
+        self.assertEqual(params["channel"], "lorem")
+        self.assertEqual(json.loads(params["payload"])[1], [["movie", 1], ["person", 2]])
+
+    def test_decode(self) -> None:
+        """
+        Test bus.Bus.decode().
+        """
+        payload = bus.Bus.encode(("movie", 1))
+        self.assertEqual(bus.Bus.decode(payload), [])
+        with patch.object(bus.Bus, "get_source", return_value=Random.get_str()):
+            self.assertEqual(bus.Bus.decode(payload), [("movie", 1)])
+        self.assertEqual(bus.Bus.decode(Random.get_str()), [])
+        self.assertEqual(bus.Bus.decode(json.dumps([1, [["movie"]]])), [])
+
+    @patch.object(Controller, "notify")
+    def test_dispatch(self, notify) -> None:
+        """
+        Test bus.Bus.dispatch() notifying other processes' writes only.
+        """
+        b = bus.Bus("postgresql://")
+        b.dispatch(bus.Bus.encode(("movie", 1)))
+        self.assertFalse(notify.called)
+        b.dispatch(json.dumps(["other:1", [["movie", 1], ["person", 2]]]))
+        notify.assert_called_once_with(("movie", 1), ("person", 2), remote=True)
+
+    def test_reset(self) -> None:
+        """
+        Test bus.Bus.listen() resetting the caches after the first LISTEN.
+        """
+        calls = []
+        engine = MagicMock()
+        cursor = engine.raw_connection.return_value.connection.cursor.return_value
+        cursor.execute.side_effect = lambda sql: calls.append(sql)
+        stopped = MagicMock()
+        stopped.is_set.return_value = True
+        b = bus.Bus("postgresql://", channel="lorem", reset=lambda: calls.append("reset"))
+        b.listen(engine, stopped)
+        self.assertEqual(calls, ["LISTEN lorem", "reset"])
+        self.assertTrue(b.wait(0))
+        self.assertTrue(engine.raw_connection.return_value.close.called)
+
+
+@unittest.skipUnless(os.environ.get("TEST_POSTGRESQL_URI"), "PostgreSQL is not available.")
+class TestBusPostgreSQL(unittest.TestCase):
+    """
+    Testing Bus class with the PostgreSQL in TEST_POSTGRESQL_URI.
+    """
+
+    def setUp(self) -> None:
+        """
+        Listening before test.
+        """
+        self.uri = os.environ["TEST_POSTGRESQL_URI"]
+        self.channel = "test_{}".format(Random.get_str().lower())
+        self.bus = bus.Bus(self.uri, channel=self.channel, timeout=0.1)
+
+    def tearDown(self) -> None:
+        """
+        Stopping the bus after test.
+        """
+        self.bus.stop()
+
+    @patch.object(Controller, "notify")
+    def test_listen(self, notify) -> None:
+        """
+        Test bus.Bus() receiving a committed write of another process.
+        """
+        self.bus.start()
+        self.assertTrue(self.bus.wait(5))
+        engine = create_engine(self.uri)
+        with patch.object(bus.Bus, "CHANNEL", self.channel):
+            with patch.object(bus.Bus, "get_source", return_value="other:1"):
+                with engine.begin() as connection:
+                    bus.Bus.publish(connection, ("movie", 1))
+                    time.sleep(0.2)
+                    self.assertFalse(notify.called)
+        started = time.monotonic()
+        while not notify.called and time.monotonic() - started < 5:
+            time.sleep(0.01)
+        notify.assert_called_once_with(("movie", 1), remote=True)
+        engine.dispose()
@@ -0,0 +1,128 @@
+"""
+Testing app.api.controller.migrations library.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import inspect, text
+
+from app.api.controller.models import db
+from app.api.controller.models.movie import Movie
+from app.api.controller.migrations import Migrator
+
+
+class TestMigrator(unittest.TestCase):
+    """
+    Testing Migrator class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an empty in-memory database before test.
+        """
+        self.app = Flask(__name__)
+        self.app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+        self.app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def get_columns(self, table: str) -> set:
+        """
+        Returns the names of the columns of a table.
+        """
+        return {info["name"] for info in inspect(db.engine).get_columns(table)}
+
+    def test_migrate(self) -> None:
+        """
+        Test Migrator.migrate().
+        Every migration is applied once.
+        """
+        applied = Migrator.migrate()
+        self.assertEqual(applied, [name for _, name, _ in Migrator.MIGRATIONS])
+        tables = set(inspect(db.engine).get_table_names())
+        self.assertIn("entity_movie", tables)
+        self.assertIn("document", tables)
+        self.assertIn("schema_migration", tables)
+        self.assertIn("actors_count", self.get_columns("entity_movie"))
+        self.assertEqual(Migrator.migrate(), [])
+        count = db.session.execute(text("SELECT COUNT(*) FROM schema_migration")).scalar()
+        self.assertEqual(count, len(Migrator.MIGRATIONS))
+
+    def test_baseline(self) -> None:
+        """
+        Test Migrator.migrate().
+        The first migration creates the baseline tables, and later
+        columns are added by their own migrations.
+        """
+        migrations = Migrator.MIGRATIONS
+        with patch.object(Migrator, "MIGRATIONS", migrations[:1]):
+            Migrator.migrate()
+        tables = set(inspect(db.engine).get_table_names())
+        self.assertNotIn("document", tables)
+        self.assertEqual(self.get_columns("entity_movie"),
+                         {"id", "is_active", "title", "released_at", "created_at"})
+        self.assertEqual(Migrator.migrate(), [name for _, name, _ in migrations[1:]])
+        self.assertIn("document", set(inspect(db.engine).get_table_names()))
+        self.assertEqual(self.get_columns("entity_movie"),
+                         {column.name for column in Movie.__table__.columns})
+
+    def test_models(self) -> None:
+        """
+        Test Migrator.migrate().
+        The frozen migrations create the tables, columns and
+        indexes of the models, as they are now.
+        """
+        Migrator.migrate()
+        for table in db.metadata.sorted_tables:
+            self.assertEqual(self.get_columns(table.name),
+                             {column.name for column in table.columns})
+            indexes = {info["name"] for info in inspect(db.engine).get_indexes(table.name)}
+            self.assertTrue({index.name for index in table.indexes}.issubset(indexes))
+
+    def test_upgrade(self) -> None:
+        """
+        Test Migrator.migrate().
+        Databases created before migrations were recorded are upgraded,
+        and the roles of their rows are counted.
+        """
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE entity_movie (id INTEGER PRIMARY KEY, is_active BOOLEAN, "
+                "title VARCHAR(255) NOT NULL, released_at DATE NOT NULL, created_at DATETIME)"))
+            connection.execute(text(
+                "CREATE TABLE entity_person (id INTEGER PRIMARY KEY, is_active BOOLEAN, "
+                "first_name VARCHAR(255) NOT NULL, last_name VARCHAR(255) NOT NULL, "
+                "created_at DATETIME)"))
+            connection.execute(text(
+                "CREATE TABLE movie_actor (created_at DATETIME, person_id INTEGER, "
+                "movie_id INTEGER, PRIMARY KEY (person_id, movie_id))"))
+            connection.execute(text(
+                "INSERT INTO entity_movie (id, is_active, title, released_at) "
+                "VALUES (1, 1, 'Alien', '1979-01-01'), (2, 1, 'Aliens', '1986-01-01')"))
+            connection.execute(text(
+                "INSERT INTO entity_person (id, is_active, first_name, last_name) "
+                "VALUES (1, 1, 'Sigourney', 'Weaver')"))
+            connection.execute(text(
+                "INSERT INTO movie_actor (person_id, movie_id) VALUES (1, 1), (1, 2)"))
+        Migrator.migrate()
+        self.assertIn("version", self.get_columns("entity_movie"))
+        self.assertIn("movies_as_actor_count", self.get_columns("entity_person"))
+        indexes = {info["name"] for info in inspect(db.engine).get_indexes("movie_actor")}
+        self.assertIn("ix_movie_actor_movie_id", indexes)
+        rows = db.session.execute(text(
+            "SELECT id, version, actors_count, directors_count FROM entity_movie ORDER BY id"))
+        self.assertEqual([tuple(row) for row in rows], [(1, 1, 1, 0), (2, 1, 1, 0)])
+        count = db.session.execute(text(
+            "SELECT movies_as_actor_count FROM entity_person WHERE id = 1")).scalar()
+        self.assertEqual(count, 2)
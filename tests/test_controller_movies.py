@@ -2,12 +2,19 @@
 Testing app.api.controller.movies library.
 """
 
+import datetime
 import unittest
 from unittest.mock import patch
 
-from app.api.controller import movies
+from app.api import constants
+from app.api.controller import movies, people, roles
+from app.api.controller.models import db
+from app.api.controller.models.person import Person, Alias
+from app.api.controller.models.movie import Movie
+from app.api.serializers import MovieSerializer
 
 from .utils.random import Random
+from .utils.database import Database
 
 from .mocks.queries import QueryMock
 from .mocks.db import DatabaseMock
@@ -185,6 +192,28 @@ class TestListMovies(unittest.TestCase):
             list(movies.MoviesController.search(limit=Random.get_float()))
         with self.assertRaises(movies.LimitException):
             list(movies.MoviesController.search(limit=Random.get_str()))
+        with self.assertRaises(movies.CursorException):
+            list(movies.MoviesController.search(cursor=Random.get_str()))
+        with self.assertRaises(movies.CursorException):
+            list(movies.MoviesController.search(cursor=movies.MoviesController.encode_cursor("1")))
+        with self.assertRaises(movies.CursorException):
+            list(movies.MoviesController.search(cursor=movies.MoviesController.encode_cursor(1, 2)))
+        with self.assertRaises(movies.CountException):
+            movies.MoviesController.count(count=Random.get_str())
+        with self.assertRaises(movies.SortException):
+            list(movies.MoviesController.search(sort=Random.get_str()))
+        with self.assertRaises(movies.MovieIDException):
+            movies.MoviesController.get_many([])
+        with self.assertRaises(movies.MovieIDException):
+            movies.MoviesController.get_many([Random.get_str()])
+        with self.assertRaises(movies.MovieIDException):
+            movies.MoviesController.get_many(list(range(1000)))
+        with self.assertRaises(movies.FilterException):
+            list(movies.MoviesController.search(year_from=Random.get_str()))
+        with self.assertRaises(movies.FilterException):
+            list(movies.MoviesController.search(role=Random.get_str()))
+        with self.assertRaises(movies.FilterException):
+            list(movies.MoviesController.search(active=Random.get_str()))
 
     @patch.object(movies, 'Movie', QueryMock(None))
     def test_not_found(self) -> None:
@@ -205,3 +234,511 @@ class TestListMovies(unittest.TestCase):
         results = list(movies.MoviesController.search())
         self.assertIsInstance(results, list)
         self.assertTrue(results)
+
+
+class TestMovieLoadPlan(unittest.TestCase):
+    """
+    Testing MoviesController load plans.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def create_movie(self, size: int) -> int:
+        """
+        Creates a movie with $size actors, directors and producers.
+        """
+        movie = Movie(title=Random.get_str(), released_at=datetime.date(1999, 1, 1))
+        db.session.add(movie)
+        for _ in range(size):
+            person = Person(first_name=Random.get_str(), last_name=Random.get_str())
+            person.aliases.append(Alias(value=Random.get_uuid()))
+            movie.actors.append(person)
+            movie.directors.append(person)
+            movie.producers.append(person)
+        db.session.commit()
+        movie_id = movie.id
+        db.session.expunge_all()
+        return movie_id
+
+    def count_queries(self, movie_id: int) -> int:
+        """
+        Loads and serializes a movie, counting the queries executed.
+        """
+        with Database.count_queries() as statements:
+            movie = movies.MoviesController.get_by_id(movie_id,
+                                                      plan=MovieSerializer.PLAN)
+            MovieSerializer.serialize(movie)
+        db.session.expunge_all()
+        return len(statements)
+
+    def test_get_by_id(self) -> None:
+        """
+        Test movies.MoviesController.get_by_id() with a load plan.
+        The number of queries must not depend on the size of the cast.
+        """
+        small = self.count_queries(self.create_movie(size=2))
+        large = self.count_queries(self.create_movie(size=40))
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 16)
+
+    def test_get_by_id_cached(self) -> None:
+        """
+        Test movies.MoviesController.get_by_id() with a load plan,
+        of a movie already loaded without it in the same request.
+        The movie is loaded again with the plan, only once.
+        """
+        movie_id = self.create_movie(size=40)
+        expected = self.count_queries(movie_id)
+        with self.app.test_request_context():
+            movie = movies.MoviesController.get_by_id(movie_id)
+            with Database.count_queries() as statements:
+                self.assertIs(movies.MoviesController.get_by_id(movie_id,
+                                                                plan=MovieSerializer.PLAN), movie)
+                MovieSerializer.serialize(movie)
+            self.assertEqual(len(statements), expected)
+            with Database.count_queries() as statements:
+                movies.MoviesController.get_by_id(movie_id, plan=MovieSerializer.PLAN)
+                movies.MoviesController.get_many([movie_id], plan={"actors": {}})
+            self.assertEqual(len(statements), 0)
+
+    def test_get_many(self) -> None:
+        """
+        Test movies.MoviesController.get_many() with a load plan.
+        The number of queries must not depend on the number of IDs,
+        movies must keep the requested order, and missing IDs are reported.
+        """
+        movie_ids = [self.create_movie(size=size) for size in (1, 20, 3)]
+        with Database.count_queries() as statements:
+            results, missing = movies.MoviesController.get_many([movie_ids[0]],
+                                                                plan=MovieSerializer.PLAN)
+        single = len(statements)
+        db.session.expunge_all()
+        requested = [movie_ids[2], 9999, movie_ids[0], movie_ids[1], movie_ids[2]]
+        with Database.count_queries() as statements:
+            results, missing = movies.MoviesController.get_many(requested,
+                                                                plan=MovieSerializer.PLAN)
+            for movie in results:
+                MovieSerializer.serialize(movie)
+        self.assertEqual(len(statements), single)
+        self.assertEqual([movie.id for movie in results],
+                         [movie_ids[2], movie_ids[0], movie_ids[1]])
+        self.assertEqual(missing, [9999])
+
+    def test_search(self) -> None:
+        """
+        Test movies.MoviesController.search() with a load plan.
+        """
+        self.create_movie(size=2)
+        self.create_movie(size=40)
+        with Database.count_queries() as statements:
+            results = list(movies.MoviesController.search(page=1,
+                                                          plan=MovieSerializer.PLAN))
+            for movie in results:
+                MovieSerializer.serialize(movie)
+        self.assertEqual(len(results), 2)
+        self.assertLessEqual(len(statements), 16)
+
+    def test_cursor(self) -> None:
+        """
+        Test movies.MoviesController.search() with a cursor.
+        Following the cursors must visit every movie once, in order.
+        """
+        movie_ids = [self.create_movie(size=1) for _ in range(5)]
+        results, cursor = [], ""
+        while cursor is not None:
+            page = list(movies.MoviesController.search(limit=2, cursor=cursor))
+            results.extend(movie.id for movie in page)
+            cursor = movies.MoviesController.get_cursor(page[-1]) \
+                if len(page) == 2 else None
+        self.assertEqual(results, sorted(movie_ids))
+
+    def test_search_stream(self) -> None:
+        """
+        Test movies.MoviesController.search() from a server-side cursor.
+        """
+        movie_ids = [self.create_movie(size=3) for _ in range(5)]
+        results = movies.MoviesController.search(limit=1000,
+                                                 plan=MovieSerializer.PLAN,
+                                                 yield_per=2)
+        documents = [MovieSerializer.serialize(movie) for movie in results]
+        self.assertEqual([document["id"] for document in documents], movie_ids)
+        self.assertTrue(all(len(document["actors"]) == 3 for document in documents))
+        with self.assertRaises(movies.LimitException):
+            list(movies.MoviesController.search(limit=1000))
+
+    def test_count(self) -> None:
+        """
+        Test movies.MoviesController.count() modes.
+        Listing must not count, and estimates are cached.
+        """
+        self.create_movie(size=1)
+        with Database.count_queries() as statements:
+            list(movies.MoviesController.search(page=1))
+        self.assertFalse([s for s in statements if "count(" in s.lower()])
+        self.assertIsNone(movies.MoviesController.count())
+        self.assertIsNone(movies.MoviesController.count(count="none"))
+        self.assertEqual(movies.MoviesController.count(count="exact"), 1)
+        self.assertEqual(movies.MoviesController.count(count="estimate"), 1)
+        self.create_movie(size=1)
+        self.assertEqual(movies.MoviesController.count(count="exact"), 2)
+        with Database.count_queries() as statements:
+            self.assertEqual(movies.MoviesController.count(count="estimate"), 1)
+        self.assertFalse(statements)
+
+    def test_count_filtered(self) -> None:
+        """
+        Test movies.MoviesController.count() not estimating filtered queries
+        without PostgreSQL, and bounding the cached estimates.
+        """
+        self.create_movie(size=1)
+        with Database.count_queries() as statements:
+            self.assertIsNone(movies.MoviesController.count(count="estimate", title="a"))
+        self.assertFalse([s for s in statements if "count(" in s.lower()])
+        self.assertEqual(movies.MoviesController.count(count="exact", active="true"), 1)
+        counts = movies.MoviesController._Controller__counts
+        for title in range(counts.size + 10):
+            movies.MoviesController.count(count="estimate", title=str(title))
+        self.assertLessEqual(counts.get_stats()["size"], counts.size)
+
+
+class TestSearchMovies(unittest.TestCase):
+    """
+    Testing MoviesController filters and sorting.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        for title, year, is_active in [("Star Wars", 1977, True),
+                                       ("Star Trek", 1979, True),
+                                       ("Stargate", 1994, False),
+                                       ("Alien Nation", 1988, True),
+                                       ("Star%Wars", 1999, True)]:
+            movie = Movie(title=title, released_at=datetime.date(year, 1, 1))
+            movie.is_active = is_active
+            db.session.add(movie)
+        movie.actors.append(Person(first_name="Lorem", last_name="Ipsum"))
+        db.session.commit()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def search(self, **kwargs) -> list:
+        """
+        Returns the titles of the movies found.
+        """
+        return [
+            movie.title
+            for movie in movies.MoviesController.search(**kwargs)
+        ]
+
+    def explain(self, sort: str=None, **filters) -> str:
+        """
+        Returns the query plan of a search.
+        """
+        controller = movies.MoviesController
+        columns, descending = controller.get_order(controller.SORTS, sort)
+        query = controller.filter(**controller.get_filters(**filters))
+        return Database.explain(controller.order(query, columns, descending).limit(10))
+
+    def test_filters(self) -> None:
+        """
+        Test movies.MoviesController.search() filters.
+        """
+        self.assertEqual(self.search(title="Star", sort="title"),
+                         ["Star Trek", "Star Wars", "Star%Wars", "Stargate"])
+        self.assertEqual(self.search(title="Star%"), ["Star%Wars"])
+        self.assertEqual(self.search(title="star"), [])
+        self.assertEqual(self.search(year_from="1979", year_to="1994"),
+                         ["Star Trek", "Stargate", "Alien Nation"])
+        self.assertEqual(self.search(active="false"), ["Stargate"])
+        self.assertEqual(self.search(role="actor"), ["Star%Wars"])
+        self.assertEqual(self.search(role="director"), [])
+        self.assertEqual(movies.MoviesController.count(count="exact", active="true"), 4)
+
+    def test_sort(self) -> None:
+        """
+        Test movies.MoviesController.search() sorting.
+        Following the cursors must visit every movie once, in order.
+        """
+        expected = self.search(sort="-released_at")
+        self.assertEqual(expected[0], "Star%Wars")
+        results, cursor = [], ""
+        while cursor is not None:
+            page = list(movies.MoviesController.search(limit=2,
+                                                       cursor=cursor,
+                                                       sort="-released_at"))
+            results.extend(movie.title for movie in page)
+            cursor = movies.MoviesController.get_cursor(page[-1], sort="-released_at") \
+                if len(page) == 2 else None
+        self.assertEqual(results, expected)
+
+    def test_indexes(self) -> None:
+        """
+        Test the query plans of movies.MoviesController filters.
+        Every filter must be an index search, without sorting.
+        """
+        plan = self.explain(title="Star", sort="title")
+        self.assertIn("USING INDEX ix_entity_movie_title", plan)
+        plan = self.explain(year_from=1990, year_to=1999, sort="-released_at")
+        self.assertIn("USING INDEX ix_entity_movie_released_at", plan)
+        plan = self.explain(active=True)
+        self.assertIn("USING INDEX ix_entity_movie_is_active", plan)
+        plan = self.explain(role="producer")
+        self.assertIn("USING INDEX ix_movie_producer_movie_id", plan)
+        for plan in (self.explain(title="Star", sort="title"),
+                     self.explain(year_from=1990, sort="released_at"),
+                     self.explain(active=True)):
+            self.assertNotIn("SCAN", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+class TestMovieLoader(unittest.TestCase):
+    """
+    Testing MoviesController request-scoped lookups.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        for _ in range(3):
+            db.session.add(Movie(title=Random.get_str(),
+                                 released_at=datetime.date(1999, 1, 1)))
+        db.session.commit()
+        self.movie_ids = [movie.id for movie in Movie.query.all()]
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_cached(self) -> None:
+        """
+        Test movies.MoviesController.get_by_id() twice in one request.
+        """
+        with self.app.test_request_context():
+            with Database.count_queries() as statements:
+                movie = movies.MoviesController.get_by_id(self.movie_ids[0])
+                self.assertIs(movies.MoviesController.get_by_id(self.movie_ids[0]), movie)
+                self.assertIs(movies.MoviesController.get_many(self.movie_ids[:1])[0][0], movie)
+            self.assertEqual(len(statements), 1)
+            movies.MoviesController.delete(self.movie_ids[0])
+            with self.assertRaises(movies.MovieNotFoundException):
+                movies.MoviesController.get_by_id(self.movie_ids[0])
+
+    def test_coalesced(self) -> None:
+        """
+        Test movies.MoviesController.prime() and get_by_id().
+        Primed lookups are loaded in a single query.
+        """
+        with self.app.test_request_context():
+            with Database.count_queries() as statements:
+                movies.MoviesController.prime(*self.movie_ids)
+                for movie_id in self.movie_ids:
+                    movies.MoviesController.get_by_id(movie_id)
+            self.assertEqual(len(statements), 1)
+            self.assertIn(" IN ", statements[0])
+
+    def test_not_cached(self) -> None:
+        """
+        Test movies.MoviesController.get_by_id() out of requests.
+        """
+        with Database.count_queries() as statements:
+            movies.MoviesController.get_by_id(self.movie_ids[0])
+            movies.MoviesController.get_by_id(self.movie_ids[0])
+        self.assertEqual(len(statements), 2)
+
+
+class TestMovieVersions(unittest.TestCase):
+    """
+    Testing versions of the documents including changed entities.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        A and B are movies. P acts in A. Q acts in A and B.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        self.a = Movie(title=Random.get_str(), released_at=datetime.date(1999, 1, 1))
+        self.b = Movie(title=Random.get_str(), released_at=datetime.date(2001, 1, 1))
+        self.p = Person(first_name=Random.get_str(), last_name=Random.get_str())
+        self.q = Person(first_name=Random.get_str(), last_name=Random.get_str())
+        self.a.actors.extend([self.p, self.q])
+        self.b.actors.append(self.q)
+        db.session.add_all([self.a, self.b])
+        db.session.commit()
+        self.ids = (self.a.id, self.b.id, self.p.id, self.q.id)
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def get_versions(self) -> tuple:
+        """
+        Returns the versions of A, B, P and Q.
+        """
+        a, b, p, q = self.ids
+        return (movies.MoviesController.get_version(a),
+                movies.MoviesController.get_version(b),
+                people.PeopleController.get_version(p),
+                people.PeopleController.get_version(q))
+
+    def test_get_version(self) -> None:
+        """
+        Test movies.MoviesController.get_version().
+        """
+        with self.assertRaises(movies.MovieIDException):
+            movies.MoviesController.get_version(Random.get_str())
+        with Database.count_queries() as statements:
+            self.assertEqual(movies.MoviesController.get_version(self.a.id), 1)
+        self.assertEqual(len(statements), 1)
+        self.assertIsNone(movies.MoviesController.get_version(self.a.id + self.b.id))
+        movies.MoviesController.delete(movie_id=self.a.id)
+        self.assertIsNone(movies.MoviesController.get_version(self.a.id))
+
+    def test_update_movie(self) -> None:
+        """
+        Test updating B, which is included in Q and in A through Q.
+        """
+        movies.MoviesController.update(movie_id=self.b.id, title=Random.get_str())
+        self.assertEqual(self.get_versions(), (2, 2, 1, 2))
+
+    def test_update_person(self) -> None:
+        """
+        Test updating P, which is included in A.
+        """
+        people.PeopleController.update(person_id=self.p.id, first_name=Random.get_str())
+        self.assertEqual(self.get_versions(), (2, 1, 2, 1))
+
+    def test_roles(self) -> None:
+        """
+        Test adding and removing P to B, which changes P, B, A through P,
+        and Q through the counts of B.
+        """
+        roles.RolesController.add_actor(self.p.id, self.b.id)
+        self.assertEqual(self.get_versions(), (2, 2, 2, 2))
+        roles.RolesController.delete_actor(self.p.id, self.b.id)
+        self.assertEqual(self.get_versions(), (3, 3, 3, 3))
+
+
+class TestRoleCounts(unittest.TestCase):
+    """
+    Testing role counts of movies and people.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        A and B are movies. P acts in A. Q acts in A and B.
+        Roles are added without counting them.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        self.a = Movie(title=Random.get_str(), released_at=datetime.date(1999, 1, 1))
+        self.b = Movie(title=Random.get_str(), released_at=datetime.date(2001, 1, 1))
+        self.p = Person(first_name=Random.get_str(), last_name=Random.get_str())
+        self.q = Person(first_name=Random.get_str(), last_name=Random.get_str())
+        self.a.actors.extend([self.p, self.q])
+        self.b.actors.append(self.q)
+        db.session.add_all([self.a, self.b])
+        db.session.commit()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_roles(self) -> None:
+        """
+        Test adding and removing roles counting them.
+        """
+        roles.RolesController.repair_counts()
+        roles.RolesController.add_director(self.p.id, self.b.id)
+        roles.RolesController.add_director(self.p.id, self.b.id)
+        roles.RolesController.add_producer(self.p.id, self.b.id)
+        self.assertEqual((self.b.actors_count, self.b.directors_count, self.b.producers_count),
+                         (1, 1, 1))
+        self.assertEqual((self.p.movies_as_actor_count,
+                          self.p.movies_as_director_count,
+                          self.p.movies_as_producer_count), (1, 1, 1))
+        roles.RolesController.delete_director(self.p.id, self.b.id)
+        roles.RolesController.delete_director(self.p.id, self.b.id)
+        roles.RolesController.delete_actor(self.q.id, self.b.id)
+        self.assertEqual((self.b.actors_count, self.b.directors_count), (0, 0))
+        self.assertEqual(self.p.movies_as_director_count, 0)
+        self.assertEqual(self.q.movies_as_actor_count, 1)
+        self.assertEqual(MovieSerializer.to_json(self.b)[constants.Movie.COUNTS], {
+            constants.Actor.PLURAL: 0,
+            constants.Director.PLURAL: 0,
+            constants.Producer.PLURAL: 1,
+        })
+
+    def test_add_actor_twice(self) -> None:
+        """
+        Test adding the same actor twice, which leaves the session usable
+        by the listeners and the serializers.
+        """
+        roles.RolesController.repair_counts()
+        versions = []
+        listener = (lambda *entities: versions.append(movies.MoviesController.get_version(self.a.id)),
+                    False)
+        with patch.object(roles.Controller, "_Controller__listeners", [listener]):
+            roles.RolesController.add_actor(self.q.id, self.a.id)
+        self.assertEqual(len(versions), 1)
+        self.assertEqual(self.a.actors_count, 2)
+        self.assertEqual(self.q.movies_as_actor_count, 2)
+        counts = MovieSerializer.serialize(self.a)[constants.Movie.COUNTS]
+        self.assertEqual(counts[constants.Actor.PLURAL], 2)
+
+    def test_repair_counts(self) -> None:
+        """
+        Test repairing the counts of every person and movie.
+        """
+        self.assertEqual(self.a.actors_count, 0)
+        with patch.object(roles.RolesController, "REPAIR_BATCH", 1):
+            self.assertEqual(roles.RolesController.repair_counts(), (2, 2))
+        self.assertEqual((self.a.actors_count, self.b.actors_count), (2, 1))
+        self.assertEqual((self.p.movies_as_actor_count, self.q.movies_as_actor_count), (1, 2))
+        self.assertGreater(movies.MoviesController.get_version(self.a.id), 1)
+        self.assertEqual(roles.RolesController.repair_counts(), (0, 0))
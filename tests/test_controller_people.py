@@ -2,12 +2,17 @@
 Testing app.api.controller.people library.
 """
 
+import datetime
 import unittest
 from unittest.mock import patch
 
 from app.api.controller import people
+from app.api.controller.models import db
+from app.api.controller.models.person import Person
+from app.api.controller.models.movie import Movie
 
 from .utils.random import Random
+from .utils.database import Database
 
 from .mocks.queries import QueryMock
 from .mocks.db import DatabaseMock
@@ -229,6 +234,24 @@ class TestListPeople(unittest.TestCase):
             list(people.PeopleController.search(limit=Random.get_float()))
         with self.assertRaises(people.LimitException):
             list(people.PeopleController.search(limit=Random.get_str()))
+        with self.assertRaises(people.CursorException):
+            list(people.PeopleController.search(cursor=Random.get_str()))
+        with self.assertRaises(people.CursorException):
+            list(people.PeopleController.search(cursor=people.PeopleController.encode_cursor("1")))
+        with self.assertRaises(people.CursorException):
+            list(people.PeopleController.search(cursor=people.PeopleController.encode_cursor(1, 2)))
+        with self.assertRaises(people.CountException):
+            people.PeopleController.count(count=Random.get_str())
+        with self.assertRaises(people.SortException):
+            list(people.PeopleController.search(sort=Random.get_str()))
+        with self.assertRaises(people.PersonIDException):
+            people.PeopleController.get_many([])
+        with self.assertRaises(people.PersonIDException):
+            people.PeopleController.get_many([True])
+        with self.assertRaises(people.FilterException):
+            list(people.PeopleController.search(role=Random.get_str()))
+        with self.assertRaises(people.FilterException):
+            list(people.PeopleController.search(active=Random.get_str()))
 
     @patch.object(people, 'Person', QueryMock(None))
     def test_not_found(self) -> None:
@@ -249,3 +272,85 @@ class TestListPeople(unittest.TestCase):
         results = list(people.PeopleController.search())
         self.assertIsInstance(results, list)
         self.assertTrue(results)
+
+
+class TestSearchPeople(unittest.TestCase):
+    """
+    Testing PeopleController filters and sorting.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        movie = Movie(title="Lorem Ipsum", released_at=datetime.date(1999, 1, 1))
+        for first_name, last_name, is_active in [("Alice", "Smith", True),
+                                                 ("Bobby", "Smithers", True),
+                                                 ("Carol", "Smith", False),
+                                                 ("David", "Jones", True)]:
+            person = Person(first_name=first_name, last_name=last_name)
+            person.is_active = is_active
+            db.session.add(person)
+        movie.directors.append(person)
+        db.session.add(movie)
+        db.session.commit()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def search(self, **kwargs) -> list:
+        """
+        Returns the first names of the people found.
+        """
+        return [
+            person.first_name
+            for person in people.PeopleController.search(**kwargs)
+        ]
+
+    def explain(self, sort: str=None, **filters) -> str:
+        """
+        Returns the query plan of a search.
+        """
+        controller = people.PeopleController
+        columns, descending = controller.get_order(controller.SORTS, sort)
+        query = controller.filter(**controller.get_filters(**filters))
+        return Database.explain(controller.order(query, columns, descending).limit(10))
+
+    def test_filters(self) -> None:
+        """
+        Test people.PeopleController.search() filters and sorting.
+        """
+        self.assertEqual(self.search(last_name="Smith", sort="-last_name"),
+                         ["Bobby", "Carol", "Alice"])
+        self.assertEqual(self.search(last_name="Smith", active="true"),
+                         ["Alice", "Bobby"])
+        self.assertEqual(self.search(role="director"), ["David"])
+        self.assertEqual(self.search(role="actor"), [])
+        self.assertEqual(self.search(sort="first_name", page=2, limit=3), ["David"])
+        results, missing = people.PeopleController.get_many([4, 3, 2])
+        self.assertEqual([person.first_name for person in results], ["David", "Bobby"])
+        self.assertEqual(missing, [3])
+
+    def test_indexes(self) -> None:
+        """
+        Test the query plans of people.PeopleController filters.
+        """
+        plan = self.explain(last_name="Smi", sort="last_name")
+        self.assertIn("USING INDEX ix_entity_person_last_name", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        plan = self.explain(active=True)
+        self.assertIn("USING INDEX ix_entity_person_is_active", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        plan = self.explain(sort="-first_name")
+        self.assertIn("USING INDEX ix_entity_person_first_name", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        plan = self.explain(role="director")
+        self.assertIn("movie_director USING", plan)
@@ -0,0 +1,118 @@
+"""
+Testing app.api.controller.pool library.
+"""
+
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from sqlalchemy import create_engine, exc
+
+from app.api.controller import Controller
+from app.api.controller.models import db
+from app.api.controller.pool import MonitoredPool
+
+
+class TestMonitoredPool(unittest.TestCase):
+    """
+    Testing MonitoredPool class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating a pool of one connection, and one more in overflow,
+        to an SQLite database file.
+        """
+        descriptor, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(descriptor)
+        self.engine = create_engine("sqlite:///" + self.path,
+                                    poolclass=MonitoredPool,
+                                    pool_size=1,
+                                    max_overflow=1,
+                                    pool_timeout=0.01)
+
+    def tearDown(self) -> None:
+        """
+        Removing the database file after test.
+        """
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_checkouts(self) -> None:
+        """
+        Test MonitoredPool.get_stats().
+        Checkouts, connects, overflow and timeouts are counted.
+        """
+        stats = self.engine.pool.get_stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["max_overflow"], 1)
+        self.assertEqual(stats["checkouts"], 0)
+        first = self.engine.connect()
+        second = self.engine.connect()
+        with self.assertRaises(exc.TimeoutError):
+            self.engine.connect()
+        stats = self.engine.pool.get_stats()
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["connects"], 2)
+        self.assertEqual(stats["checked_out"], 2)
+        self.assertEqual(stats["overflow"], 1)
+        self.assertEqual(stats["peak_overflow"], 1)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["max_wait"], 0.01)
+        self.assertGreaterEqual(stats["wait"], stats["max_wait"])
+        first.close()
+        second.close()
+        self.engine.connect().close()
+        stats = self.engine.pool.get_stats()
+        self.assertEqual(stats["checkouts"], 3)
+        self.assertEqual(stats["connects"], 2)
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["overflow"], 0)
+        self.assertGreater(stats["max_age"], 0)
+        self.assertGreater(stats["mean_age"], 0)
+
+    def test_invalidations(self) -> None:
+        """
+        Test MonitoredPool.get_stats().
+        Invalidated connections are counted, and replaced.
+        """
+        connection = self.engine.connect()
+        connection.invalidate()
+        connection.close()
+        self.engine.connect().close()
+        stats = self.engine.pool.get_stats()
+        self.assertEqual(stats["invalidations"], 1)
+        self.assertEqual(stats["connects"], 2)
+
+
+class TestPoolStats(unittest.TestCase):
+    """
+    Testing Controller.get_pool_stats().
+    """
+
+    def test_pool_stats(self) -> None:
+        """
+        Test Controller.get_pool_stats() and Controller.dispose().
+        Monitored pools are reported by bind, and disposed.
+        """
+        self.assertEqual(Controller.get_pool_stats(), {})
+        directory = tempfile.mkdtemp()
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(directory, "a.db")
+        app.config["SQLALCHEMY_BINDS"] = {
+            "replica-0": "sqlite:///" + os.path.join(directory, "b.db"),
+        }
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": MonitoredPool}
+        db.init_app(app)
+        with app.app_context():
+            db.engine.connect().close()
+            stats = Controller.get_pool_stats()
+            pool = db.engine.pool
+            Controller.dispose()
+            self.assertIsNot(db.engine.pool, pool)
+            self.assertEqual(Controller.get_pool_stats()["primary"]["checkouts"], 0)
+        self.assertEqual(sorted(stats), ["primary", "replica-0"])
+        self.assertEqual(stats["primary"]["checkouts"], 1)
+        self.assertEqual(stats["replica-0"]["checkouts"], 0)
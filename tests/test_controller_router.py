@@ -0,0 +1,121 @@
+"""
+Testing app.api.controller.router library.
+"""
+
+import time
+import datetime
+import unittest
+from unittest.mock import patch
+
+from flask import Response
+from sqlalchemy import text
+
+from app.api.controller import movies
+from app.api.controller.models import db
+from app.api.controller.models.movie import Movie
+from app.api.controller.router import Router
+
+from .utils.database import Database
+
+
+@patch.object(Router, "REPLICAS", ("replica",))
+class TestRouter(unittest.TestCase):
+    """
+    Testing Router class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory primary and replica before test.
+        The movie is only in the primary, as if it was not replicated yet.
+        """
+        self.app = Database.get_app(binds={"replica": "sqlite://"})
+        self.context = self.app.app_context()
+        self.context.push()
+        movie = Movie(title="Alien", released_at=datetime.date(1979, 1, 1))
+        db.session.add(movie)
+        db.session.commit()
+        self.movie_id = movie.id
+        db.session.remove()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory databases after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_read(self) -> None:
+        """
+        Test Router.read().
+        Reads of GET requests are sent to the replica.
+        """
+        with self.app.test_request_context():
+            Router.read()
+            self.assertEqual(Router.get_replica(), "replica")
+            self.assertIsNone(movies.MoviesController.get_version(self.movie_id))
+            with self.assertRaises(movies.MovieNotFoundException):
+                movies.MoviesController.get_by_id(self.movie_id)
+
+    def test_writes(self) -> None:
+        """
+        Test Router.read().
+        Flushes and raw SQL are sent to the primary.
+        """
+        with self.app.test_request_context():
+            Router.read()
+            db.session.add(Movie(title="Aliens", released_at=datetime.date(1986, 1, 1)))
+            db.session.commit()
+            count = db.session.execute(text("SELECT COUNT(*) FROM entity_movie")).scalar()
+            self.assertEqual(count, 2)
+            self.assertEqual(db.session.query(Movie).count(), 0)
+
+    def test_sticky(self) -> None:
+        """
+        Test Router.stick().
+        Clients that wrote read from the primary for the window.
+        """
+        with self.app.test_request_context():
+            response = Response()
+            Router.stick(response)
+            cookie = response.headers["Set-Cookie"]
+            self.assertIn(Router.COOKIE, cookie)
+            Router.stick(Response(status=400))
+        headers = {"Cookie": cookie.split(";")[0]}
+        with self.app.test_request_context(headers=headers):
+            self.assertTrue(Router.is_sticky())
+            Router.read()
+            self.assertIsNone(Router.get_replica())
+            self.assertEqual(movies.MoviesController.get_version(self.movie_id), 1)
+        headers = {"Cookie": "{}={}".format(Router.COOKIE, time.time() - 1)}
+        with self.app.test_request_context(headers=headers):
+            self.assertFalse(Router.is_sticky())
+        with self.app.test_request_context(headers={"Cookie": Router.COOKIE + "=x"}):
+            self.assertFalse(Router.is_sticky())
+
+    def test_no_replicas(self) -> None:
+        """
+        Test Router.read() and Router.stick() without replicas.
+        """
+        with patch.object(Router, "REPLICAS", ()):
+            with self.app.test_request_context():
+                Router.read()
+                self.assertIsNone(Router.get_replica())
+                self.assertEqual(movies.MoviesController.get_version(self.movie_id), 1)
+                response = Response()
+                Router.stick(response)
+                self.assertNotIn("Set-Cookie", response.headers)
+
+    def test_lagging(self) -> None:
+        """
+        Test Router.is_lagging().
+        Replicas may be behind for the window after a write.
+        """
+        with self.app.test_request_context():
+            self.assertFalse(Router.is_lagging())
+            Router.read()
+            Router.written(("movie", self.movie_id))
+            self.assertTrue(Router.is_lagging())
+            with patch.object(Router, "WINDOW", 0):
+                self.assertFalse(Router.is_lagging())
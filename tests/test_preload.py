@@ -0,0 +1,195 @@
+"""
+Testing app.api.preload library.
+"""
+
+import gc
+import sys
+import logging
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+from app.api import preload
+from app.api.preload import Preload, Daemon
+from app.api.access import AccessLog
+from app.api.purge import Purger
+from app.api.controller.bus import Bus
+
+
+class TestPreload(unittest.TestCase):
+    """
+    Testing Preload class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Removing the callbacks of the app before test.
+        """
+        self.before = patch.object(Preload, "_Preload__before", [])
+        self.after = patch.object(Preload, "_Preload__after", [])
+        self.before.start()
+        self.after.start()
+
+    def tearDown(self) -> None:
+        """
+        Restoring the callbacks, and the garbage collector, after test.
+        """
+        self.before.stop()
+        self.after.stop()
+        Preload._Preload__disabled = False
+        gc.enable()
+
+    def test_callbacks(self) -> None:
+        """
+        Test Preload.prepare() and Preload.forked().
+        """
+        calls = []
+        Preload.before_fork(lambda: calls.append("before"))
+        Preload.after_fork(lambda: calls.append("after"))
+        Preload.prepare()
+        self.assertEqual(calls, ["before"])
+        Preload.forked()
+        self.assertEqual(calls, ["before", "after"])
+
+    def test_no_threads(self) -> None:
+        """
+        Test Preload.prepare() stopping every thread before the fork.
+        """
+        threads = set(threading.enumerate())
+        daemons = [
+            Bus("postgresql://127.0.0.1:1/maria", retry=60),
+            AccessLog(handler=logging.NullHandler()),
+            Purger("http://127.0.0.1:1/purge"),
+        ]
+        for daemon in daemons:
+            daemon.start()
+            Preload.before_fork(daemon.stop)
+        self.assertGreater(len(set(threading.enumerate()) - threads), 0)
+        alive = []
+
+        def freeze() -> None:
+            alive.extend(set(threading.enumerate()) - threads)
+
+        with patch.object(preload.gc, "freeze", freeze, create=True), \
+                patch.object(preload.gc, "get_freeze_count", lambda: 0, create=True):
+            Preload.prepare()
+        self.assertEqual(alive, [])
+
+    def test_freeze(self) -> None:
+        """
+        Test Preload.begin(), Preload.prepare() and Preload.forked().
+        The garbage collector is stopped in the master, and objects
+        are frozen before the fork, if they can be.
+        """
+        freeze = MagicMock()
+        with patch.object(preload.gc, "freeze", freeze, create=True), \
+                patch.object(preload.gc, "get_freeze_count", lambda: 0, create=True):
+            Preload.begin()
+            self.assertFalse(gc.isenabled())
+            Preload.prepare()
+            self.assertEqual(freeze.call_count, 1)
+            Preload.forked()
+            self.assertTrue(gc.isenabled())
+
+    def test_no_freeze(self) -> None:
+        """
+        Test Preload.begin().
+        The garbage collector is not stopped if objects can not be frozen.
+        """
+        with patch.object(preload, "gc", MagicMock(spec=["disable", "isenabled"])) as mock:
+            Preload.begin()
+            mock.disable.assert_not_called()
+
+    def test_install(self) -> None:
+        """
+        Test Preload.install().
+        """
+        uwsgidecorators = MagicMock()
+        with patch.dict(sys.modules, {"uwsgidecorators": uwsgidecorators}):
+            self.assertTrue(Preload.install())
+        uwsgidecorators.postfork.assert_called_once_with(Preload.forked)
+        register_at_fork = MagicMock()
+        with patch.dict(sys.modules, {"uwsgidecorators": None}), \
+                patch.object(preload.os, "register_at_fork", register_at_fork, create=True):
+            self.assertTrue(Preload.install())
+        register_at_fork.assert_called_once_with(after_in_child=Preload.forked)
+        with patch.dict(sys.modules, {"uwsgidecorators": None}), \
+                patch.object(preload, "os", MagicMock(spec=["getpid"])):
+            self.assertFalse(Preload.install())
+
+
+class Ticker(Daemon):
+    """
+    Daemon counting the processes it started in.
+    """
+
+    NAME = "ticker"
+
+    def __init__(self) -> None:
+        """
+        Ticker initializer.
+        """
+        super().__init__()
+        self.starts = 0
+        self.events = []
+
+    def before_start(self) -> None:
+        """
+        Counts a start.
+        """
+        self.starts += 1
+
+    def run(self, stopped: threading.Event) -> None:
+        """
+        Waits until stopped.
+        """
+        self.events.append(stopped)
+        stopped.wait()
+
+
+class TestDaemon(unittest.TestCase):
+    """
+    Testing Daemon class.
+    """
+
+    def get_threads(self) -> list:
+        """
+        Returns the threads of the tickers.
+        """
+        return [thread for thread in threading.enumerate() if thread.name == Ticker.NAME]
+
+    def test_start(self) -> None:
+        """
+        Test Daemon.start() starting one thread per process.
+        """
+        ticker = Ticker()
+        self.assertFalse(ticker.is_started())
+        ticker.start()
+        ticker.start()
+        self.assertTrue(ticker.is_started())
+        self.assertEqual(ticker.starts, 1)
+        self.assertEqual(len(self.get_threads()), 1)
+        with patch.object(preload.os, "getpid", return_value=-1):
+            self.assertFalse(ticker.is_started())
+            ticker.start()
+            self.assertEqual(ticker.starts, 2)
+            self.assertEqual(len(self.get_threads()), 2)
+            ticker.stop()
+        self.assertEqual(len(self.get_threads()), 1)
+        ticker.events[0].set()
+        for thread in self.get_threads():
+            thread.join()
+
+    def test_stop(self) -> None:
+        """
+        Test Daemon.stop() waiting for the thread, and restarting it.
+        """
+        ticker = Ticker()
+        ticker.stop()
+        ticker.start()
+        ticker.stop()
+        self.assertFalse(ticker.is_started())
+        self.assertEqual(self.get_threads(), [])
+        ticker.start()
+        self.assertEqual(ticker.starts, 2)
+        ticker.stop()
@@ -0,0 +1,122 @@
+"""
+Testing app.api.purge library.
+"""
+
+import threading
+import unittest
+import http.server
+
+from app.api import purge, constants
+
+
+class Receiver(http.server.BaseHTTPRequestHandler):
+    """
+    Fake purge endpoint of a reverse proxy.
+    """
+
+    purges = []
+    status = 200
+
+    def do_PURGE(self) -> None:
+        """
+        Records a purge request.
+        """
+        self.purges.append(self.headers[constants.Surrogate.HEADER].split())
+        self.send_response(self.status)
+        self.end_headers()
+
+    def log_message(self, *args) -> None:
+        """
+        Silences the access log.
+        """
+
+
+class TestPurger(unittest.TestCase):
+    """
+    Testing Purger class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Starting a fake purge endpoint before test.
+        """
+        Receiver.purges = []
+        Receiver.status = 200
+        self.server = http.server.HTTPServer(("127.0.0.1", 0), Receiver)
+        self.url = "http://127.0.0.1:{}/purge".format(self.server.server_port)
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def tearDown(self) -> None:
+        """
+        Stopping the fake purge endpoint after test.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_arguments(self) -> None:
+        """
+        Test purge.Purger() arguments.
+        """
+        with self.assertRaises(ValueError):
+            purge.Purger(None)
+        with self.assertRaises(ValueError):
+            purge.Purger(self.url, batch=0)
+
+    def test_get_keys(self) -> None:
+        """
+        Test purge.Purger.get_keys() including every list.
+        """
+        self.assertEqual(purge.Purger.get_keys(("movie", 12), ("person", 7)), {
+            "movie-12",
+            "person-7",
+            constants.Surrogate.MOVIES,
+            constants.Surrogate.PEOPLE,
+        })
+
+    def test_purge(self) -> None:
+        """
+        Test purge.Purger.purge() sending the keys of the changed entities.
+        """
+        p = purge.Purger(self.url)
+        p.purge(("movie", 12), ("person", 7))
+        p.wait()
+        self.assertEqual(Receiver.purges, [
+            sorted(purge.Purger.get_keys(("movie", 12), ("person", 7))),
+        ])
+
+    def test_batch(self) -> None:
+        """
+        Test purge.Purger.purge() splitting many keys into batches.
+        """
+        p = purge.Purger(self.url, batch=2)
+        p.purge(("movie", 1), ("movie", 2))
+        p.wait()
+        self.assertEqual(len(Receiver.purges), 2)
+        self.assertEqual(sum(Receiver.purges, []),
+                         sorted(purge.Purger.get_keys(("movie", 1), ("movie", 2))))
+
+    def test_failure(self) -> None:
+        """
+        Test purge.Purger.purge() surviving failed purges.
+        """
+        Receiver.status = 500
+        p = purge.Purger(self.url)
+        p.purge(("movie", 1))
+        p.wait()
+        Receiver.status = 200
+        p.purge(("movie", 2))
+        p.wait()
+        self.assertEqual(len(Receiver.purges), 2)
+        self.assertIn("movie-2", Receiver.purges[1])
+
+    def test_stop(self) -> None:
+        """
+        Test purge.Purger.stop() sending the queued purges, and stopping.
+        """
+        threads = set(threading.enumerate())
+        p = purge.Purger(self.url)
+        p.purge(("movie", 1))
+        p.stop()
+        self.assertFalse(p.is_started())
+        self.assertEqual(set(threading.enumerate()), threads)
+        self.assertEqual(len(Receiver.purges), 1)
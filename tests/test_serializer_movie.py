@@ -0,0 +1,350 @@
+"""
+Testing app.api.serializers library.
+"""
+
+import json
+import datetime
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from app.api import constants, errors
+from app.api import movies as views
+from app.api.serializers import Serializer
+from app.api.controller import movies, people, roles, documents
+from app.api.controller.models import db
+from app.api.controller.models.person import Person, Alias
+from app.api.controller.models.movie import Movie
+from app.api.serializers import MovieSerializer, PersonSerializer
+
+from .utils.random import Random
+from .utils.database import Database
+
+
+class TestMovieSerializer(unittest.TestCase):
+    """
+    Testing MovieSerializer class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        self.movie = Movie(title=Random.get_str(), released_at=datetime.date(1999, 1, 1))
+        self.other = Movie(title=Random.get_str(), released_at=datetime.date(2001, 1, 1))
+        db.session.add(self.movie)
+        db.session.add(self.other)
+        for _ in range(20):
+            person = Person(first_name=Random.get_str(), last_name=Random.get_str())
+            person.aliases.append(Alias(value=Random.get_uuid()))
+            self.movie.actors.append(person)
+            self.movie.producers.append(person)
+            self.other.actors.append(person)
+        db.session.commit()
+        self.movie = movies.MoviesController.get_by_id(self.movie.id,
+                                                       plan=MovieSerializer.PLAN)
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_serialize(self) -> None:
+        """
+        Test MovieSerializer.serialize().
+        """
+        s = MovieSerializer.serialize(self.movie)
+        self.assertEqual(s[constants.Movie.ID], self.movie.id)
+        self.assertEqual(len(s[constants.Actor.PLURAL]), 20)
+        self.assertEqual(len(s[constants.Producer.PLURAL]), 20)
+        self.assertFalse(s[constants.Director.PLURAL])
+
+    def test_normalize(self) -> None:
+        """
+        Test MovieSerializer.normalize_many().
+        Every referenced object is included once.
+        """
+        documents, included = MovieSerializer.normalize_many(self.movie)
+        s = documents[0]
+        self.assertEqual(s[constants.Movie.ID], self.movie.id)
+        self.assertEqual(s[constants.Actor.PLURAL], s[constants.Producer.PLURAL])
+        self.assertEqual(len(s[constants.Actor.PLURAL]), 20)
+        self.assertEqual(len(included[constants.Person.PLURAL]), 20)
+        self.assertEqual(list(included[constants.Movie.PLURAL]), [self.other.id])
+        for person_id in s[constants.Actor.PLURAL]:
+            person = included[constants.Person.PLURAL][person_id]
+            self.assertIn(self.movie.id, person[constants.Movie.PLURAL][constants.Actor.SINGULAR])
+            self.assertIn(self.other.id, person[constants.Movie.PLURAL][constants.Actor.SINGULAR])
+
+    def test_normalize_size(self) -> None:
+        """
+        Test MovieSerializer.normalize_many() payload size.
+        """
+        documents, included = MovieSerializer.normalize_many(self.movie)
+        normalized = json.dumps([documents, included])
+        deep = json.dumps(MovieSerializer.serialize(self.movie))
+        self.assertLess(len(normalized) * 2, len(deep))
+
+    def test_plan(self) -> None:
+        """
+        Test MovieSerializer.get_plan().
+        The default plan covers the default expansion.
+        """
+        self.assertEqual(MovieSerializer.get_plan(), MovieSerializer.PLAN)
+        self.assertEqual(PersonSerializer.get_plan(), PersonSerializer.PLAN)
+        self.assertEqual(MovieSerializer.get_plan(expand={}), {})
+        fields = {constants.Person.SINGULAR: {constants.Person.ID}}
+        self.assertEqual(MovieSerializer.get_plan(expand={"actors": {}}, fields=fields),
+                         {"actors": {}})
+
+    def test_expand(self) -> None:
+        """
+        Test MovieSerializer.get_expand().
+        """
+        self.assertIsNone(MovieSerializer.get_expand({}))
+        self.assertEqual(MovieSerializer.get_expand({"expand": ""}), {})
+        self.assertEqual(MovieSerializer.get_expand({"expand": "actors.movies,directors"}),
+                         {"actors": {"movies": {}}, "directors": {}})
+        with self.assertRaises(errors.ExpandFormException):
+            MovieSerializer.get_expand({"expand": "movies"})
+        with self.assertRaises(errors.ExpandFormException):
+            MovieSerializer.get_expand({"expand": "actors.actors"})
+        with self.assertRaises(errors.ExpandFormException):
+            MovieSerializer.get_expand({"expand": "actors.movies.actors.movies"})
+
+    def test_fields(self) -> None:
+        """
+        Test MovieSerializer.get_fields().
+        """
+        self.assertEqual(MovieSerializer.get_fields({}), {})
+        fields = MovieSerializer.get_fields({"fields[movie]": "id,title,released_at.year"})
+        self.assertEqual(fields, {"movie": {"id", "title", "released_at.year"}})
+        with self.assertRaises(errors.FieldsFormException):
+            MovieSerializer.get_fields({"fields[movie]": "id,aliases"})
+
+    def test_sparse(self) -> None:
+        """
+        Test MovieSerializer.serialize() with fields and no expansion.
+        Relationships are not loaded from the DB.
+        """
+        db.session.expunge_all()
+        fields = {constants.Movie.SINGULAR: {"id", "title", "released_at.year"}}
+        with Database.count_queries() as statements:
+            movie = movies.MoviesController.get_by_id(self.other.id,
+                                                      plan=MovieSerializer.get_plan({}, fields))
+            s = MovieSerializer.serialize(movie, expand={}, fields=fields)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(s, {
+            constants.Movie.ID: self.other.id,
+            constants.Movie.TITLE: self.other.title,
+            constants.Movie.RELEASED_AT: {
+                constants.Movie.Release.YEAR: 2001,
+            },
+        })
+
+    def test_expand_depth(self) -> None:
+        """
+        Test MovieSerializer.serialize() with a custom expansion.
+        """
+        fields = {constants.Person.SINGULAR: {"id"}}
+        s = MovieSerializer.serialize(self.movie, expand={"actors": {}}, fields=fields)
+        self.assertNotIn(constants.Producer.PLURAL, s)
+        self.assertEqual(len(s[constants.Actor.PLURAL]), 20)
+        for person in s[constants.Actor.PLURAL]:
+            self.assertEqual(list(person), ["id"])
+
+
+class TestSerializerCache(unittest.TestCase):
+    """
+    Testing Serializer document cache.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        self.movie = Movie(title=Random.get_str(), released_at=datetime.date(1999, 1, 1))
+        self.person = Person(first_name=Random.get_str(), last_name=Random.get_str())
+        self.other = Person(first_name=Random.get_str(), last_name=Random.get_str())
+        self.movie.actors.append(self.person)
+        db.session.add(self.movie)
+        db.session.add(self.other)
+        db.session.commit()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_cached(self) -> None:
+        """
+        Test MovieSerializer.serialize() caching documents.
+        """
+        self.assertIsNone(MovieSerializer.get_cached(self.movie.id, 1))
+        s = MovieSerializer.serialize(self.movie)
+        self.assertEqual(MovieSerializer.get_cached(self.movie.id, 1), s)
+        self.assertIsNone(MovieSerializer.get_cached(self.movie.id, 2))
+        fields = {constants.Movie.SINGULAR: {constants.Movie.ID}}
+        self.assertIsNone(MovieSerializer.get_cached(self.movie.id, 1, fields=fields))
+        self.assertEqual(MovieSerializer.serialize(self.movie), s)
+        self.assertGreaterEqual(MovieSerializer.CACHE.get_stats()["hits"], 2)
+
+    def test_update(self) -> None:
+        """
+        Test documents being invalidated by updates of nested entities.
+        """
+        MovieSerializer.serialize(self.movie)
+        PersonSerializer.serialize(self.other)
+        name = Random.get_str()
+        people.PeopleController.update(person_id=self.person.id, first_name=name)
+        self.assertIsNone(MovieSerializer.get_cached(self.movie.id, 1))
+        self.assertIsNotNone(PersonSerializer.get_cached(self.other.id, 1))
+        s = MovieSerializer.serialize(self.movie)
+        self.assertEqual(s[constants.Actor.PLURAL][0][constants.Person.FIRST_NAME], name)
+
+    def test_roles(self) -> None:
+        """
+        Test documents of both sides being invalidated by role changes.
+        """
+        MovieSerializer.serialize(self.movie)
+        PersonSerializer.serialize(self.other)
+        roles.RolesController.add_director(self.other.id, self.movie.id)
+        self.assertIsNone(MovieSerializer.get_cached(self.movie.id, 1))
+        self.assertIsNone(PersonSerializer.get_cached(self.other.id, 1))
+        self.assertGreaterEqual(MovieSerializer.CACHE.get_stats()["invalidations"], 2)
+
+    def test_inactive(self) -> None:
+        """
+        Test documents of inactive entities not being cached.
+        """
+        self.movie.is_active = False
+        db.session.commit()
+        MovieSerializer.serialize(self.movie)
+        self.assertIsNone(MovieSerializer.get_cached(self.movie.id, 1))
+
+    def test_etag(self) -> None:
+        """
+        Test MovieSerializer.get_etag().
+        """
+        etag = MovieSerializer.get_etag(self.movie.id, 1)
+        expand = MovieSerializer.EXPAND
+        self.assertEqual(etag, MovieSerializer.get_etag(self.movie.id, 1, expand=expand))
+        self.assertNotEqual(etag, MovieSerializer.get_etag(self.movie.id, 2))
+        self.assertNotEqual(etag, MovieSerializer.get_etag(self.movie.id, 1, expand={}))
+        self.assertNotEqual(etag, MovieSerializer.get_etag(self.movie.id, 1, normalized=True))
+        self.assertTrue(MovieSerializer.is_versioned())
+        self.assertTrue(MovieSerializer.is_versioned({constants.Actor.PLURAL: {}}))
+        self.assertFalse(MovieSerializer.is_versioned({constants.Actor.PLURAL: {
+            constants.Movie.PLURAL: {constants.Actor.PLURAL: {}},
+        }}))
+
+
+class TestSerializerDocuments(unittest.TestCase):
+    """
+    Testing materialized documents.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an in-memory database before test.
+        """
+        self.app = Database.get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        self.movie = Movie(title=Random.get_str(), released_at=datetime.date(1999, 1, 1))
+        self.person = Person(first_name=Random.get_str(), last_name=Random.get_str())
+        self.movie.actors.append(self.person)
+        db.session.add(self.movie)
+        db.session.commit()
+        self.materialized = patch.object(Serializer, "MATERIALIZED", True)
+        self.materialized.start()
+
+    def tearDown(self) -> None:
+        """
+        Dropping the in-memory database after test.
+        """
+        self.materialized.stop()
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_materialize(self) -> None:
+        """
+        Test MovieSerializer.materialize() storing the default document.
+        """
+        self.assertIsNone(MovieSerializer.get_materialized(self.movie.id, 1))
+        s = MovieSerializer.materialize(self.movie)
+        with MovieSerializer.CACHE.collect() as tags:
+            self.assertEqual(MovieSerializer.get_materialized(self.movie.id, 1), s)
+        self.assertEqual(tags, {"movie:{}".format(self.movie.id),
+                                "person:{}".format(self.person.id)})
+        self.assertIsNone(MovieSerializer.get_materialized(self.movie.id, 2))
+        with patch.object(Serializer, "MATERIALIZED", False):
+            self.assertIsNone(MovieSerializer.get_materialized(self.movie.id, 1))
+
+    def test_refresh(self) -> None:
+        """
+        Test Serializer.refresh() materializing the changed entities.
+        """
+        MovieSerializer.materialize(self.movie)
+        name = Random.get_str()
+        people.PeopleController.update(person_id=self.person.id, first_name=name)
+        self.assertIsNone(MovieSerializer.get_materialized(self.movie.id, 2))
+        Serializer.refresh(("person", self.person.id), ("movie", self.movie.id))
+        s = MovieSerializer.get_materialized(self.movie.id, 2)
+        self.assertEqual(s[constants.Actor.PLURAL][0][constants.Person.FIRST_NAME], name)
+        self.assertIsNotNone(PersonSerializer.get_materialized(self.person.id, 2))
+        self.movie.is_active = False
+        db.session.commit()
+        Serializer.refresh(("movie", self.movie.id))
+
+    def test_materialize_outdated(self) -> None:
+        """
+        Test Serializer.materialize_outdated() rendering missing and outdated documents.
+        """
+        self.assertEqual(Serializer.materialize_outdated(batch=1), 2)
+        self.assertIsNotNone(MovieSerializer.get_materialized(self.movie.id, 1))
+        self.assertIsNotNone(PersonSerializer.get_materialized(self.person.id, 1))
+        self.assertEqual(Serializer.materialize_outdated(), 0)
+        people.PeopleController.update(person_id=self.person.id, first_name=Random.get_str())
+        self.assertEqual(Serializer.materialize_outdated(), 2)
+        self.assertIsNotNone(MovieSerializer.get_materialized(self.movie.id, 2))
+
+    def test_save_older(self) -> None:
+        """
+        Test DocumentsController.save() keeping the document of a newer version.
+        """
+        documents.DocumentsController.save("movie", self.movie.id, 3, "{}")
+        documents.DocumentsController.save("movie", self.movie.id, 2, "[]")
+        self.assertEqual(documents.DocumentsController.get("movie", self.movie.id, 3)[0], "{}")
+
+    def test_get(self) -> None:
+        """
+        Test detail reads of materialized documents in two queries.
+        """
+        movie_id = self.movie.id
+        with Database.count_queries() as statements:
+            with Flask(__name__).test_request_context("/movies/{}".format(movie_id)):
+                response = views.MovieAPI().get(movie_id=movie_id)
+        self.assertEqual([q for q in statements if not q.lstrip().startswith("SELECT")], [])
+        self.assertIsNone(MovieSerializer.get_materialized(movie_id, 1))
+        Serializer.refresh(("movie", movie_id))
+        MovieSerializer.CACHE.clear()
+        with Database.count_queries() as statements:
+            with Flask(__name__).test_request_context("/movies/{}?lorem".format(movie_id)):
+                materialized = views.MovieAPI().get(movie_id=movie_id)
+        self.assertEqual(materialized.get_data(), response.get_data())
+        self.assertEqual(len(statements), 2)
@@ -0,0 +1,236 @@
+"""
+Testing app.api.shared library.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+from unittest.mock import patch
+
+from flask import Flask
+
+from app import api
+from app.api import shared, movies
+
+from .utils.random import Random
+
+from .mocks.models import MovieMock
+
+
+def run(target: object) -> int:
+    """
+    Runs a function in a forked process.
+    Returns the exit code of the process.
+    """
+    process = multiprocessing.get_context("fork").Process(target=target)
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+class TestSharedCache(unittest.TestCase):
+    """
+    Testing SharedCache class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating a temporary directory before test.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache")
+
+    def tearDown(self) -> None:
+        """
+        Removing the temporary directory after test.
+        """
+        shutil.rmtree(self.directory)
+
+    def test_arguments(self) -> None:
+        """
+        Test shared.SharedCache() arguments.
+        """
+        with self.assertRaises(ValueError):
+            shared.SharedCache(self.path, size=0)
+        with self.assertRaises(ValueError):
+            shared.SharedCache(self.path, slot_size=8)
+        with self.assertRaises(ValueError):
+            shared.SharedCache(None)
+
+    def test_lru(self) -> None:
+        """
+        Test shared.SharedCache() evicting the least recently used entry.
+        """
+        c = shared.SharedCache(self.path, size=8, slot_size=1024)
+        for index in range(8):
+            c.set(index, str(index))
+        self.assertEqual(c.get(0)[0], "0")
+        c.set(8, "8")
+        self.assertEqual(c.get(1), (None, None))
+        self.assertEqual(c.get(0)[0], "0")
+        self.assertEqual(c.get(8)[0], "8")
+        c.set(8, "nine")
+        self.assertEqual(c.get(8)[0], "nine")
+        c.set(9, "x" * 1024)
+        self.assertEqual(c.get(9), (None, None))
+        stats = c.get_stats()
+        self.assertEqual(stats["size"], 8)
+        self.assertEqual(stats["max_size"], 8)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["hits"], 4)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["rejected"], 1)
+        c.clear()
+        self.assertEqual(c.get_stats()["size"], 0)
+        self.assertEqual(c.get_stats()["cost"], 0)
+
+    def test_stale(self) -> None:
+        """
+        Test shared.SharedCache() keeping expired entries for the stale time.
+        """
+        c = shared.SharedCache(self.path, size=8, ttl=10, stale=20)
+        with patch.object(shared.time, "time", return_value=100):
+            c.set("a", 1)
+        with patch.object(shared.time, "time", return_value=115):
+            self.assertEqual(c.get("a"), (None, None))
+            self.assertEqual(c.get_stale("a")[0], 1)
+        with patch.object(shared.time, "time", return_value=131):
+            self.assertEqual(c.get_stale("a"), (None, None))
+        stats = c.get_stats()
+        self.assertEqual(stats["stale"], 1)
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["size"], 0)
+
+    def test_invalidate(self) -> None:
+        """
+        Test shared.SharedCache() invalidating entries by tag.
+        """
+        c = shared.SharedCache(self.path, size=64, slot_size=1024)
+
+        def inner() -> dict:
+            c.tag("person:1")
+            return {"id": 1}
+
+        def outer() -> dict:
+            c.tag("movie:1")
+            return {"id": 1, "actors": [c.fetch("person", inner)]}
+
+        c.set("other", Random.get_str(), {"movie:2"})
+        document = c.fetch("movie", outer)
+        self.assertEqual(c.get("movie"), (document, frozenset({"movie:1", "person:1"})))
+        self.assertEqual(c.invalidate("person:1"), 2)
+        self.assertEqual(c.get("movie"), (None, None))
+        self.assertIsNotNone(c.get("other")[0])
+        self.assertEqual(c.get_stats()["invalidations"], 2)
+
+    def test_processes(self) -> None:
+        """
+        Test shared.SharedCache() entries being shared by processes.
+        """
+        c = shared.SharedCache(self.path, size=64, slot_size=1024)
+        c.set("parent", "lorem", {"movie:1"})
+
+        def child() -> None:
+            assert c.get("parent")[0] == "lorem"
+            c.set("child", "ipsum")
+            c.invalidate("movie:1")
+
+        self.assertEqual(run(child), 0)
+        self.assertEqual(c.get("child")[0], "ipsum")
+        self.assertEqual(c.get("parent"), (None, None))
+        other = shared.SharedCache(self.path, size=64, slot_size=1024)
+        self.assertEqual(other.get("child")[0], "ipsum")
+        self.assertEqual(other.get_stats()["hits"], 3)
+
+    def test_buckets(self) -> None:
+        """
+        Test shared.SharedCache() locking every bucket on its own.
+        """
+        c = shared.SharedCache(self.path, size=16, slot_size=1024)
+        keys = {}
+        for key in range(100):
+            keys.setdefault(shared.SharedMemory.get_hash(key) % c.buckets, key)
+        c.set(keys[1], "lorem")
+        context = multiprocessing.get_context("fork")
+        locked, release = context.Event(), context.Event()
+
+        def child() -> None:
+            with c.memory.lock(c.HEADER_SIZE, c.bucket_size):
+                locked.set()
+                release.wait(5)
+
+        process = context.Process(target=child)
+        process.start()
+        try:
+            self.assertTrue(locked.wait(5))
+            self.assertEqual(c.get(keys[1])[0], "lorem")
+            c.set(keys[1], "ipsum")
+            self.assertEqual(c.get(keys[1])[0], "ipsum")
+        finally:
+            release.set()
+            process.join()
+        self.assertEqual(c.get_stats()["size"], 1)
+
+    def test_generations(self) -> None:
+        """
+        Test shared.SharedGenerations() being shared by processes.
+        """
+        g = shared.SharedGenerations(self.path)
+        g.bump("movie")
+        self.assertEqual(run(lambda: g.bump("movie", "person")), 0)
+        self.assertEqual(g.get("movie", "person"), (2, 1))
+
+
+class TestSharedResponses(unittest.TestCase):
+    """
+    Testing responses cached by a process and served by another.
+    """
+
+    def setUp(self) -> None:
+        """
+        Sharing the response cache before test.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.responses, self.generations = api.API.RESPONSES, api.API.GENERATIONS
+        api.API.RESPONSES = shared.SharedCache(os.path.join(self.directory, "responses"))
+        api.API.GENERATIONS = shared.SharedGenerations(os.path.join(self.directory, "generations"))
+
+    def tearDown(self) -> None:
+        """
+        Restoring the response cache after test.
+        """
+        api.API.RESPONSES, api.API.GENERATIONS = self.responses, self.generations
+        shutil.rmtree(self.directory)
+
+    def get(self) -> object:
+        """
+        Sends a GET request.
+        """
+        with Flask(__name__).test_request_context("/?limit=10"):
+            return movies.MoviesAPI().get()
+
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: {"id": 1})
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_cursor", return_value=None)
+    def test_get(self, *args) -> None:
+        """
+        Test a GET request served by another process.
+        """
+        def child() -> None:
+            with patch.object(movies.movies.MoviesController, "search") as mock:
+                mock.return_value = [MovieMock()]
+                assert self.get().status_code == 200
+
+        self.assertEqual(run(child), 0)
+        with patch.object(movies.movies.MoviesController, "search") as mock:
+            response = self.get()
+            self.assertFalse(mock.called)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(), b'{"movies":[{"id":1}]}\n')
+        self.assertEqual(run(lambda: api.Controller.notify(("movie", 1))), 0)
+        with patch.object(movies.movies.MoviesController, "search") as mock:
+            mock.return_value = []
+            self.get()
+            self.assertTrue(mock.called)
@@ -0,0 +1,77 @@
+"""
+Testing app.api.stream library.
+"""
+
+import json
+import unittest
+
+from flask import Flask
+
+from app.api.stream import Stream
+
+from .utils.random import Random
+
+
+class TestStream(unittest.TestCase):
+    """
+    Testing Stream class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Streams serialize with the app JSON encoder.
+        """
+        self.context = Flask(__name__).app_context()
+        self.context.push()
+        self.items = [Random.get_int() for _ in range(5)]
+
+    def tearDown(self) -> None:
+        """
+        Popping the app context after test.
+        """
+        self.context.pop()
+
+    def test_json(self) -> None:
+        """
+        Test streaming a JSON array with a trailer.
+        """
+        stream = Stream("items",
+                        iter(self.items),
+                        lambda x: {"id": x},
+                        trailer=lambda last, size: {"last": last, "size": size})
+        self.assertEqual(stream.mimetype, Stream.JSON)
+        chunks = list(stream)
+        self.assertGreater(len(chunks), len(self.items))
+        self.assertEqual(json.loads("".join(chunks)), {
+            "items": [{"id": x} for x in self.items],
+            "last": self.items[-1],
+            "size": len(self.items),
+        })
+
+    def test_empty(self) -> None:
+        """
+        Test streaming an empty JSON array.
+        """
+        stream = Stream("items", iter([]), lambda x: x)
+        self.assertEqual(json.loads("".join(stream)), {"items": []})
+
+    def test_ndjson(self) -> None:
+        """
+        Test streaming NDJSON.
+        """
+        stream = Stream("items", iter(self.items), lambda x: {"id": x}, ndjson=True)
+        self.assertEqual(stream.mimetype, Stream.NDJSON)
+        lines = "".join(stream).splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [{"id": x} for x in self.items])
+
+    def test_errors(self) -> None:
+        """
+        Test errors raised before streaming.
+        """
+        def generator():
+            raise ValueError()
+            yield
+
+        with self.assertRaises(ValueError):
+            Stream("items", generator(), lambda x: x)
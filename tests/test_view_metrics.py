@@ -0,0 +1,61 @@
+"""
+Testing metrics API.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from app import api
+
+from app.api import metrics
+from app.api import errors
+from app.api import constants
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """
+    Testing metrics endpoint.
+    """
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    def test_get(self, *args):
+        """
+        Test GET request.
+        """
+        response = metrics.MetricsAPI().get()
+        self.assertIsInstance(response, dict)
+        self.assertIn(constants.Metrics.DOCUMENTS, response[constants.Metrics.CACHE])
+        self.assertIn(constants.Metrics.RESPONSES, response[constants.Metrics.CACHE])
+        self.assertIn(constants.Metrics.FLIGHTS, response[constants.Metrics.CACHE])
+        self.assertIn(constants.Metrics.POOLS, response)
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    def test_post(self, *args):
+        """
+        Test POST request.
+        """
+        response = metrics.MetricsAPI().post()
+        self.assertIn(str(errors.MethodNotImplementedException.SUBCODE),
+                      str(response))
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    def test_put(self, *args):
+        """
+        Test PUT request.
+        """
+        response = metrics.MetricsAPI().put()
+        self.assertIn(str(errors.MethodNotImplementedException.SUBCODE),
+                      str(response))
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    def test_delete(self, *args):
+        """
+        Test DELETE request.
+        """
+        response = metrics.MetricsAPI().delete()
+        self.assertIn(str(errors.MethodNotImplementedException.SUBCODE),
+                      str(response))
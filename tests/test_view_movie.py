@@ -5,6 +5,8 @@ Testing movie API.
 import unittest
 from unittest.mock import patch
 
+from flask import Flask
+
 from app import api
 
 from app.api import movies
@@ -24,7 +26,8 @@ class TestMovieEndpoint(unittest.TestCase):
     @patch.object(api, "jsonify", lambda x: x)
     @patch("app.api.request", json={})
     @patch("app.api.movies.request", json={})
-    @patch.object(movies.MovieSerializer, "serialize", lambda x: x)
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: x)
+    @patch.object(movies.movies.MoviesController, "get_version", return_value=None)
     @patch.object(movies.movies.MoviesController, "get_by_id", return_value=MovieMock())
     def test_get(self, *args):
         """
@@ -37,6 +40,49 @@ class TestMovieEndpoint(unittest.TestCase):
         self.assertTrue(response[constants.Movie.SINGULAR].title)
         self.assertTrue(response[constants.Movie.SINGULAR].created_at)
 
+
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: {"id": x.id})
+    @patch.object(movies.movies.MoviesController, "get_version", return_value=3)
+    def test_get_etag(self, *args):
+        """
+        Test GET request with If-None-Match.
+        """
+        with patch.object(movies.movies.MoviesController, "get_by_id") as mock:
+            mock.return_value = MovieMock()
+            with Flask(__name__).test_request_context():
+                response = movies.MovieAPI().get(movie_id=1)
+                self.assertEqual(response.status_code, 200)
+                etag, _ = response.get_etag()
+                self.assertTrue(etag)
+            headers = {"If-None-Match": '"{}"'.format(etag)}
+            with Flask(__name__).test_request_context(headers=headers):
+                response = movies.MovieAPI().get(movie_id=1)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.get_etag()[0], etag)
+                self.assertFalse(response.data)
+            self.assertEqual(mock.call_count, 1)
+            with Flask(__name__).test_request_context("/?expand=actors.movies.actors",
+                                                      headers=headers):
+                response = movies.MovieAPI().get(movie_id=1)
+                self.assertIsNone(response.get_etag()[0])
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    @patch("app.api.movies.request", json={}, args={"format": "normalized"})
+    @patch.object(movies.MovieSerializer, "normalize_many",
+                  lambda x, **kwargs: ([x], {constants.Person.PLURAL: {}}))
+    @patch.object(movies.movies.MoviesController, "get_version", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_by_id", return_value=MovieMock())
+    def test_get_normalized(self, *args):
+        """
+        Test GET request with the normalized format.
+        """
+        response = movies.MovieAPI().get(movie_id=Random.get_int())
+        self.assertIsInstance(response, dict)
+        self.assertIn(constants.Movie.SINGULAR, response)
+        self.assertIn(constants.Format.INCLUDED, response)
+        self.assertTrue(response[constants.Movie.SINGULAR].title)
+
     @patch.object(api, "jsonify", lambda x: x)
     @patch.object(movies.MovieSerializer, "serialize", lambda x: x)
     @patch("app.api.request", json={})
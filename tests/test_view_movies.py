@@ -2,14 +2,22 @@
 Testing movies API.
 """
 
+import time
 import unittest
+import threading
 from unittest.mock import patch
 
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
 from app import api
 
+from app.api import cache
 from app.api import movies
 from app.api import errors
 from app.api import constants
+from app.api.cache import Cache
+from app.api.controller import Controller
 
 from .utils.random import Random
 
@@ -24,7 +32,9 @@ class TestMoviesEndpoint(unittest.TestCase):
     @patch.object(api, "jsonify", lambda x: x)
     @patch("app.api.request", json={})
     @patch("app.api.movies.request", json={})
-    @patch.object(movies.MovieSerializer, "serialize", lambda x: x)
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: x)
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_cursor", return_value=None)
     @patch.object(movies.movies.MoviesController, "search",
                   return_value=[MovieMock(), MovieMock(), MovieMock()])
     def test_get(self, *args):
@@ -139,3 +149,199 @@ class TestMoviesEndpoint(unittest.TestCase):
             response = movies.MoviesAPI().get()
             self.assertIn(str(errors.LimitFormException.SUBCODE),
                           str(response))
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    @patch("app.api.movies.request", json={}, args={"ids": "3,1,2"})
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: x)
+    def test_get_many(self, *args):
+        """
+        Test GET request with a list of IDs.
+        """
+        with patch.object(movies.movies.MoviesController, "get_many") as mock:
+            mock.return_value = ([MovieMock(), MovieMock()], [2])
+            response = movies.MoviesAPI().get()
+            self.assertEqual(mock.call_args[1]["movie_ids"], [3, 1, 2])
+        self.assertIsInstance(response, dict)
+        self.assertEqual(len(response[constants.Movie.PLURAL]), 2)
+        self.assertEqual(response[constants.Batch.MISSING], [2])
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    @patch("app.api.movies.request", json={}, args={"ids": "1,lorem"})
+    def test_get_many_bad_ids(self, *args):
+        """
+        Test GET request with a bad list of IDs.
+        """
+        response = movies.MoviesAPI().get()
+        self.assertIn(str(errors.IdsFormException.SUBCODE), str(response))
+
+    @patch("app.api.request", json={})
+    @patch("app.api.movies.request", json={}, args={"format": "ndjson"})
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: {"id": x.id})
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    def test_get_stream(self, *args):
+        """
+        Test GET request streaming NDJSON.
+        """
+        with patch.object(movies.movies.MoviesController, "search") as mock:
+            mock.return_value = iter([MovieMock(), MovieMock()])
+            with Flask(__name__).test_request_context():
+                response = movies.MoviesAPI().get()
+                self.assertEqual(response.mimetype, "application/x-ndjson")
+                self.assertEqual(len(list(response.response)), 2)
+            self.assertTrue(mock.call_args[1]["yield_per"])
+
+
+class TestMoviesResponseCache(unittest.TestCase):
+    """
+    Testing cached responses of the movies endpoint.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an empty response cache before test.
+        """
+        self.responses = api.API.RESPONSES
+        api.API.RESPONSES = Cache()
+
+    def tearDown(self) -> None:
+        """
+        Restoring the response cache after test.
+        """
+        api.API.RESPONSES = self.responses
+
+    def get(self, path: str) -> object:
+        """
+        Sends a GET request.
+        """
+        with Flask(__name__).test_request_context(path):
+            return movies.MoviesAPI().get()
+
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: {"id": x.id})
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_cursor", return_value=None)
+    def test_cached(self, *args):
+        """
+        Test GET requests being cached until a write.
+        """
+        with patch.object(movies.movies.MoviesController, "search") as mock:
+            mock.return_value = [MovieMock()]
+            response = self.get("/?limit=10&sort=title")
+            self.assertEqual(response.status_code, 200)
+            cached = self.get("/?sort=title&limit=10")
+            self.assertEqual(cached.get_data(), response.get_data())
+            self.assertEqual(mock.call_count, 1)
+            self.get("/?sort=title&limit=20")
+            self.assertEqual(mock.call_count, 2)
+            Controller.notify(("person", Random.get_int()))
+            self.get("/?limit=10&sort=title")
+            self.assertEqual(mock.call_count, 3)
+        stats = api.API.RESPONSES.get_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["cost"], len(response.get_data()) * 3)
+
+    @patch.object(movies.MovieSerializer, "serialize",
+                  lambda x, **kwargs: movies.MovieSerializer.CACHE.tag("movie:12") or {"id": 12})
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_cursor", return_value=None)
+    @patch.object(movies.movies.MoviesController, "search", return_value=[MovieMock()])
+    def test_surrogate_keys(self, *args):
+        """
+        Test GET responses being public, with surrogate keys.
+        """
+        with patch.object(api.API, "PROXY_MAX_AGE", 600):
+            response = self.get("/?limit=10")
+            cached = self.get("/?limit=10")
+        for r in (response, cached):
+            self.assertEqual(r.headers["Cache-Control"], "public, max-age=0, s-maxage=600")
+            self.assertEqual(r.headers[constants.Surrogate.HEADER], "movie-12 movies-list")
+
+    @patch.object(movies.MovieSerializer, "serialize",
+                  lambda x, **kwargs: movies.MovieSerializer.CACHE.tag(*[
+                      "person:{}".format(i) for i in range(5000)
+                  ]) or {"id": 12})
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_cursor", return_value=None)
+    @patch.object(movies.movies.MoviesController, "search", return_value=[MovieMock()])
+    def test_surrogate_keys_many(self, *args):
+        """
+        Test GET responses including many entities, with the keys of their lists.
+        """
+        response = self.get("/?limit=10")
+        self.assertEqual(response.headers[constants.Surrogate.HEADER], "people-list movies-list")
+        self.assertEqual(api.API.get_surrogate_keys({"movie:1", "person:2"}),
+                         ["movie-1", "person-2"])
+
+    @patch.object(movies.movies.MoviesController, "search", side_effect=movies.movies.SortException)
+    def test_not_cached(self, *args):
+        """
+        Test errors not being cached.
+        """
+        self.get("/?sort=lorem")
+        self.get("/?sort=lorem")
+        self.assertEqual(api.API.RESPONSES.get_stats()["size"], 0)
+
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: {"id": 1})
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_cursor", return_value=None)
+    def test_coalesced(self, *args):
+        """
+        Test concurrent GET requests being built once.
+        """
+        def search(*args, **kwargs) -> list:
+            time.sleep(0.2)
+            return [MovieMock()]
+
+        responses = []
+        with patch.object(movies.movies.MoviesController, "search", side_effect=search) as mock:
+            threads = [
+                threading.Thread(target=lambda: responses.append(self.get("/?limit=5")))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(mock.call_count, 1)
+        self.assertEqual(len(set(response.get_data() for response in responses)), 1)
+        self.assertEqual(len(set(id(response) for response in responses)), 5)
+
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: {"id": x.id})
+    @patch.object(movies.movies.MoviesController, "count", return_value=None)
+    @patch.object(movies.movies.MoviesController, "get_cursor", return_value=None)
+    def test_stale(self, *args):
+        """
+        Test expired GET responses being sent while revalidated.
+        """
+        api.API.RESPONSES = Cache(ttl=10, stale=60)
+        with patch.object(movies.movies.MoviesController, "search") as mock:
+            mock.return_value = [MovieMock()]
+            with patch.object(cache.time, "monotonic", return_value=100):
+                response = self.get("/?limit=10")
+            self.assertNotIn("Warning", response.headers)
+            mock.side_effect = OperationalError("SELECT", {}, Exception())
+            with patch.object(cache.time, "monotonic", return_value=120):
+                stale = self.get("/?limit=10")
+                self.wait()
+                self.assertEqual(stale.get_data(), response.get_data())
+                self.assertEqual(stale.headers["Warning"], api.API.STALE_WARNING)
+                self.assertEqual(mock.call_count, 2)
+                self.assertEqual(self.get("/?limit=10").get_data(), response.get_data())
+                self.wait()
+            mock.side_effect = None
+            with patch.object(cache.time, "monotonic", return_value=130):
+                self.get("/?limit=10")
+                self.wait()
+                revalidated = self.get("/?limit=10")
+            self.assertNotIn("Warning", revalidated.headers)
+            self.assertEqual(mock.call_count, 4)
+        self.assertEqual(api.API.RESPONSES.get_stats()["stale"], 3)
+
+    def wait(self) -> None:
+        """
+        Waits for the responses being revalidated.
+        """
+        for thread in threading.enumerate():
+            if thread.name == "revalidate":
+                thread.join()
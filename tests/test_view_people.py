@@ -5,6 +5,8 @@ Testing people API.
 import unittest
 from unittest.mock import patch
 
+from flask import Flask
+
 from app import api
 
 from app.api import people
@@ -24,7 +26,9 @@ class TestPeopleEndpoint(unittest.TestCase):
     @patch.object(api, "jsonify", lambda x: x)
     @patch("app.api.request", json={})
     @patch("app.api.people.request", json={})
-    @patch.object(people.PersonSerializer, "serialize", lambda x: x)
+    @patch.object(people.PersonSerializer, "serialize", lambda x, **kwargs: x)
+    @patch.object(people.people.PeopleController, "count", return_value=None)
+    @patch.object(people.people.PeopleController, "get_cursor", return_value=None)
     @patch.object(people.people.PeopleController, "search",
                   return_value=[PersonMock(), PersonMock(), PersonMock()])
     def test_get(self, *args):
@@ -171,3 +175,45 @@ class TestPeopleEndpoint(unittest.TestCase):
             response = people.PeopleAPI().get()
             self.assertIn(str(errors.LimitFormException.SUBCODE),
                           str(response))
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    @patch("app.api.people.request", json={}, args={"ids": "3,1,2"})
+    @patch.object(people.PersonSerializer, "serialize", lambda x, **kwargs: x)
+    def test_get_many(self, *args):
+        """
+        Test GET request with a list of IDs.
+        """
+        with patch.object(people.people.PeopleController, "get_many") as mock:
+            mock.return_value = ([PersonMock(), PersonMock()], [2])
+            response = people.PeopleAPI().get()
+            self.assertEqual(mock.call_args[1]["person_ids"], [3, 1, 2])
+        self.assertIsInstance(response, dict)
+        self.assertEqual(len(response[constants.Person.PLURAL]), 2)
+        self.assertEqual(response[constants.Batch.MISSING], [2])
+
+    @patch.object(api, "jsonify", lambda x: x)
+    @patch("app.api.request", json={})
+    @patch("app.api.people.request", json={}, args={"ids": "1,lorem"})
+    def test_get_many_bad_ids(self, *args):
+        """
+        Test GET request with a bad list of IDs.
+        """
+        response = people.PeopleAPI().get()
+        self.assertIn(str(errors.IdsFormException.SUBCODE), str(response))
+
+    @patch("app.api.request", json={})
+    @patch("app.api.people.request", json={}, args={"format": "ndjson"})
+    @patch.object(people.PersonSerializer, "serialize", lambda x, **kwargs: {"id": x.id})
+    @patch.object(people.people.PeopleController, "count", return_value=None)
+    def test_get_stream(self, *args):
+        """
+        Test GET request streaming NDJSON.
+        """
+        with patch.object(people.people.PeopleController, "search") as mock:
+            mock.return_value = iter([PersonMock(), PersonMock()])
+            with Flask(__name__).test_request_context():
+                response = people.PeopleAPI().get()
+                self.assertEqual(response.mimetype, "application/x-ndjson")
+                self.assertEqual(len(list(response.response)), 2)
+            self.assertTrue(mock.call_args[1]["yield_per"])
@@ -5,6 +5,8 @@ Testing person API.
 import unittest
 from unittest.mock import patch
 
+from flask import Flask
+
 from app import api
 
 from app.api import people
@@ -24,7 +26,8 @@ class TestPersonEndpoint(unittest.TestCase):
     @patch.object(api, "jsonify", lambda x: x)
     @patch("app.api.request", json={})
     @patch("app.api.people.request", json={})
-    @patch.object(people.PersonSerializer, "serialize", lambda x: x)
+    @patch.object(people.PersonSerializer, "serialize", lambda x, **kwargs: x)
+    @patch.object(people.people.PeopleController, "get_version", return_value=None)
     @patch.object(people.people.PeopleController, "get_by_id", return_value=PersonMock())
     def test_get(self, *args):
         """
@@ -37,6 +40,32 @@ class TestPersonEndpoint(unittest.TestCase):
         self.assertTrue(response[constants.Person.SINGULAR].last_name)
         self.assertTrue(response[constants.Person.SINGULAR].created_at)
 
+
+    @patch.object(people.PersonSerializer, "serialize", lambda x, **kwargs: {"id": x.id})
+    @patch.object(people.people.PeopleController, "get_version", return_value=3)
+    def test_get_etag(self, *args):
+        """
+        Test GET request with If-None-Match.
+        """
+        with patch.object(people.people.PeopleController, "get_by_id") as mock:
+            mock.return_value = PersonMock()
+            with Flask(__name__).test_request_context():
+                response = people.PersonAPI().get(person_id=1)
+                self.assertEqual(response.status_code, 200)
+                etag, _ = response.get_etag()
+                self.assertTrue(etag)
+            headers = {"If-None-Match": '"{}"'.format(etag)}
+            with Flask(__name__).test_request_context(headers=headers):
+                response = people.PersonAPI().get(person_id=1)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.get_etag()[0], etag)
+                self.assertFalse(response.data)
+            self.assertEqual(mock.call_count, 1)
+            with Flask(__name__).test_request_context("/?expand=movies.actors.movies",
+                                                      headers=headers):
+                response = people.PersonAPI().get(person_id=1)
+                self.assertIsNone(response.get_etag()[0])
+
     @patch.object(api, "jsonify", lambda x: x)
     @patch.object(people.PersonSerializer, "serialize", lambda x: x)
     @patch("app.api.request", json={})
@@ -0,0 +1,223 @@
+"""
+Testing app.api.warmer library.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+from app import api
+from app.api import warmer, movies
+
+from .mocks.models import MovieMock
+
+
+class TestPopularity(unittest.TestCase):
+    """
+    Testing Popularity class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating a temporary directory before test.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "popularity.json")
+
+    def tearDown(self) -> None:
+        """
+        Removing the temporary directory after test.
+        """
+        shutil.rmtree(self.directory)
+
+    def test_arguments(self) -> None:
+        """
+        Test warmer.Popularity() arguments.
+        """
+        with self.assertRaises(ValueError):
+            warmer.Popularity(None)
+        with self.assertRaises(ValueError):
+            warmer.Popularity(self.path, interval=0)
+        with self.assertRaises(ValueError):
+            warmer.Popularity(self.path, size=0)
+
+    def test_top(self) -> None:
+        """
+        Test warmer.Popularity.get_top() adding the counts of every process.
+        """
+        first = warmer.Popularity(self.path)
+        second = warmer.Popularity(self.path)
+        for movie_id in (1, 2, 2, 3, 3, 3):
+            first.record("movie", movie_id)
+        second.record("movie", 1)
+        second.record("movie", 1)
+        second.record("person", 7)
+        self.assertEqual(first.get_top("movie", 2), [])
+        first.flush()
+        second.flush()
+        self.assertEqual(first.get_top("movie", 2), [1, 3])
+        self.assertEqual(second.get_top("movie", 5), [1, 3, 2])
+        self.assertEqual(second.get_top("person", 5), [7])
+        first.stop()
+        second.stop()
+
+    def test_interval(self) -> None:
+        """
+        Test warmer.Popularity.record() flushing in its thread only.
+        """
+        p = warmer.Popularity(self.path, interval=0.01)
+        with patch.object(warmer.Popularity, "flush") as flush:
+            p.record("movie", 1)
+            self.assertFalse(flush.called)
+            self.assertTrue(p.is_started())
+            time.sleep(0.1)
+            p.stop()
+        self.assertTrue(flush.called)
+        self.assertFalse(p.is_started())
+
+    def test_stop(self) -> None:
+        """
+        Test warmer.Popularity.stop() flushing the pending counts.
+        """
+        p = warmer.Popularity(self.path)
+        p.record("movie", 1)
+        self.assertEqual(p.get_top("movie", 1), [])
+        p.stop()
+        self.assertEqual(p.get_top("movie", 1), [1])
+
+    def test_size(self) -> None:
+        """
+        Test warmer.Popularity.flush() keeping the most requested entities only.
+        """
+        p = warmer.Popularity(self.path, size=2)
+        for movie_id in (1, 2, 2, 3, 3, 3, 4):
+            p.record("movie", movie_id)
+        p.record("person", 7)
+        p.flush()
+        p.record("movie", 4)
+        p.flush()
+        self.assertEqual(p.load(), {"movie": {"3": 3, "2": 2}, "person": {"7": 1}})
+        p.stop()
+
+    def test_invalid(self) -> None:
+        """
+        Test warmer.Popularity.load() ignoring an invalid file.
+        """
+        with open(self.path, "w") as f:
+            f.write("lorem")
+        p = warmer.Popularity(self.path)
+        self.assertEqual(p.get_top("movie", 1), [])
+        p.record("movie", 1)
+        p.stop()
+        self.assertEqual(p.get_top("movie", 1), [1])
+
+
+class TestWarmer(unittest.TestCase):
+    """
+    Testing Warmer class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating an app with fake views before test.
+        """
+        self.requested = []
+        self.app = Flask(__name__)
+
+        def view(**kwargs) -> str:
+            self.requested.append(kwargs)
+            return "" if kwargs.get("movie_id") != 404 else ("", 404)
+
+        self.app.before_request(lambda: self.warming.append(warmer.Warmer.is_warming()))
+        self.warming = []
+        self.app.add_url_rule("/movies/<int:movie_id>", "movie", view)
+        self.app.add_url_rule("/people/<int:person_id>", "person", view)
+        self.app.add_url_rule("/movies", "movies", view)
+        self.app.add_url_rule("/people", "people", view)
+        self.directory = tempfile.mkdtemp()
+        self.popularity = warmer.Popularity(os.path.join(self.directory, "popularity.json"))
+
+    def tearDown(self) -> None:
+        """
+        Stopping the popularity record, and removing
+        the temporary directory after test.
+        """
+        self.popularity.stop()
+        shutil.rmtree(self.directory)
+
+    def test_get_paths(self) -> None:
+        """
+        Test warmer.Warmer.get_paths().
+        """
+        for movie_id in (5, 5, 6):
+            self.popularity.record("movie", movie_id)
+        self.popularity.flush()
+        w = warmer.Warmer(self.app, popularity=self.popularity)
+        self.assertEqual(w.get_paths(top=1, movie_ids=[1, 5], person_ids=[2], pages=2), [
+            "/movies/1",
+            "/movies/5",
+            "/people/2",
+            "/movies",
+            "/movies?page=2",
+            "/people",
+            "/people?page=2",
+        ])
+        self.assertEqual(w.get_paths(), [])
+
+    def test_warm(self) -> None:
+        """
+        Test warmer.Warmer.warm() requesting every path through the app.
+        """
+        w = warmer.Warmer(self.app)
+        self.assertEqual(w.warm(top=10, movie_ids=[1, 404], pages=1), 3)
+        self.assertEqual(len(self.requested), 4)
+        self.assertEqual(self.warming, [True] * 4)
+        self.app.test_client().get("/movies")
+        self.assertEqual(self.warming[-1], False)
+
+
+class TestPopularityRecording(unittest.TestCase):
+    """
+    Testing requests being counted in the popularity record.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creating a popularity record before test.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.popularity = warmer.Popularity(os.path.join(self.directory, "popularity.json"))
+
+    def tearDown(self) -> None:
+        """
+        Stopping the popularity record, and removing
+        the temporary directory after test.
+        """
+        self.popularity.stop()
+        shutil.rmtree(self.directory)
+
+    @patch.object(movies.MovieSerializer, "serialize", lambda x, **kwargs: {"id": x.id})
+    @patch.object(movies.movies.MoviesController, "get_version", return_value=None)
+    def test_get(self, *args) -> None:
+        """
+        Test successful GET requests of details being counted.
+        """
+        with patch.object(api.API, "POPULARITY", self.popularity):
+            with patch.object(movies.movies.MoviesController, "get_by_id") as mock:
+                mock.return_value = MovieMock()
+                with Flask(__name__).test_request_context("/movies/1"):
+                    movies.MovieAPI().get(movie_id=1)
+                    movies.MovieAPI().get(movie_id=1)
+                with Flask(__name__).test_request_context("/movies/3",
+                                                          environ_base={warmer.Warmer.ENVIRON: True}):
+                    movies.MovieAPI().get(movie_id=3)
+                mock.side_effect = movies.movies.MovieNotFoundException
+                with Flask(__name__).test_request_context("/movies/2"):
+                    movies.MovieAPI().get(movie_id=2)
+        self.popularity.stop()
+        self.assertEqual(self.popularity.load(), {"movie": {"1": 2}})
@@ -0,0 +1,72 @@
+"""
+Unit Test Database Utilities.
+"""
+
+import contextlib
+
+from flask import Flask
+from sqlalchemy import event
+
+from app.api.controller.models import db
+from app.api import API
+from app.api.cache import Cache
+from app.api.serializers import Serializer
+from app.api.controller.models import movie, person, role, user, document  # Registering all tables.
+
+
+class Database(object):
+    """
+    In-memory database utilities.
+    """
+
+    URI = "sqlite://"
+
+    @classmethod
+    def get_app(cls, binds: dict=None) -> Flask:
+        """
+        Creates a Flask app bound to an in-memory database,
+        and to other in-memory databases by bind, if any, such as
+        replicas, with the same tables.
+        Cached documents and responses of previous databases are removed.
+        """
+        Serializer.CACHE = Cache()
+        API.RESPONSES = Cache()
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = cls.URI
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+        app.config["SQLALCHEMY_BINDS"] = binds or {}
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            for bind in app.config["SQLALCHEMY_BINDS"]:
+                db.Model.metadata.create_all(bind=db.get_engine(bind=bind))
+        return app
+
+    @staticmethod
+    @contextlib.contextmanager
+    def count_queries() -> list:
+        """
+        Collects every SQL statement executed in the block.
+        """
+        statements = []
+
+        def collect(conn, cursor, statement, *args) -> None:
+            statements.append(statement)
+
+        engine = db.get_engine()
+        event.listen(engine, "before_cursor_execute", collect)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", collect)
+
+    @staticmethod
+    def explain(query: object) -> str:
+        """
+        Returns the SQLite query plan of a query.
+        """
+        statement = query.statement.compile(dialect=db.session.get_bind().dialect)
+        params = [statement.params[name] for name in statement.positiontup]
+        cursor = db.session.connection().connection.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN " + str(statement), params)
+        return "\n".join(row[-1] for row in cursor.fetchall())